@@ -5,30 +5,97 @@ This module provides the application factory pattern for creating Flask app inst
 Routes are organized in separate blueprint modules in the routes package.
 """
 
+import atexit
+import time
+from contextlib import contextmanager
+
 from flask import Flask
-from database import init_database, add_sample_data
-from routes import register_blueprints
+import database
+
 
+@contextmanager
+def _timed(timings, phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = time.perf_counter() - start
 
-def create_app():
+
+def create_app(config=None):
     """
     Application factory function to create and configure Flask app.
-    
+
+    Settings come from LIBRARY_* environment variables (e.g.
+    LIBRARY_PRODUCTION=true, LIBRARY_STORAGE=memory,
+    LIBRARY_SECRET_KEY=...), then from config. In production mode an
+    up-to-date database is used as is: no DDL, no sample data, and the
+    search index is built in the background. STORAGE picks the book and
+    borrow-record store: 'sqlite' (library.db) or 'memory' (a fresh
+    in-process store per app, for tests and load tests).
+
     Returns:
         Flask: Configured Flask application instance
     """
+    started = time.perf_counter()
+    timings = {}
     app = Flask(__name__)
     app.secret_key = "super secret key"
-    
-    # Initialize the database
-    init_database()
-    
+    app.config['PRODUCTION'] = False
+    app.config['STORAGE'] = 'sqlite'
+    app.config.from_prefixed_env('LIBRARY')
+    app.config.update(config or {})
+    production = app.config['PRODUCTION']
+
+    # Blueprints, services and metrics are only imported once an app is built
+    with _timed(timings, 'imports'):
+        from routes import register_blueprints
+        from services.search_index import catalog_index
+        import metrics
+        from repository import create_repository, set_repository
+
+    # Book and borrow-record storage for the service layer
+    repository = create_repository(app.config['STORAGE'])
+    set_repository(repository)
+    sqlite = app.config['STORAGE'] == 'sqlite'
+
+    # Initialize the database, or just check its schema version in production
+    with _timed(timings, 'schema'):
+        if sqlite and production:
+            database.ensure_schema()
+        elif sqlite:
+            database.init_database()
+
     # Add sample data for testing and demonstration
-    add_sample_data()
-    
+    with _timed(timings, 'sample_data'):
+        if not production:
+            repository.add_sample_data()
+
+    # Build the in-memory search index from the books table; the in-memory
+    # store searches its own rows
+    with _timed(timings, 'search_index'):
+        if sqlite and production:
+            catalog_index.build_in_background()
+        elif sqlite:
+            catalog_index.build()
+
     # Register all route blueprints
-    register_blueprints(app)
-    
+    with _timed(timings, 'blueprints'):
+        register_blueprints(app)
+
+    # Time requests, SQL and template rendering for /api/metrics and Server-Timing
+    metrics.init_app(app)
+
+    # Close pooled database connections when the process shuts down
+    atexit.register(database.close_all_connections)
+
+    timings['total'] = time.perf_counter() - started
+    app.config['STARTUP_TIMINGS'] = timings
+    metrics.observe_startup(timings)
+    app.logger.info('Started in %.1f ms (%s)', timings['total'] * 1000,
+                    ', '.join(f'{phase}={seconds * 1000:.1f}ms' for phase, seconds in timings.items()
+                              if phase != 'total'))
+
     return app
 
 
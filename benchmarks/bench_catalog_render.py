@@ -0,0 +1,91 @@
+"""
+Benchmark - Catalog page render time, full Jinja loop vs. cached row fragments
+
+Renders catalog.html for a page of synthetic books (no database needed)
+the way /catalog did before the fragment cache, and with rows joined from
+the cache: cold, warm, and warm with a share of rows changing availability
+between renders, as borrows and returns would.
+
+Usage:
+    python benchmarks/bench_catalog_render.py --rows 200 --renders 500 --churn 0.05
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, render_template  # noqa: E402
+
+from bench_search_index import make_books, percentile  # noqa: E402
+from routes import register_blueprints  # noqa: E402
+from routes.fragment_cache import clear_fragment_cache, render_catalog_rows  # noqa: E402
+
+
+def make_page(rows, seed):
+    rng = random.Random(seed)
+    books = []
+    for book_id, title, author in make_books(rows, seed):
+        total = rng.randint(1, 5)
+        books.append({'id': book_id, 'title': title, 'author': author, 'isbn': f"978{book_id:010d}",
+                      'total_copies': total, 'available_copies': rng.randint(0, total)})
+    return books
+
+
+def time_renders(renders, render, before=None):
+    timings = []
+    for _ in range(renders):
+        if before:
+            before()
+        start = time.perf_counter()
+        render()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200, help='books on the page (/catalog allows up to 200)')
+    parser.add_argument('--renders', type=int, default=500)
+    parser.add_argument('--churn', type=float, default=0.05,
+                        help='share of rows whose availability changes between renders')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    app = Flask('app', root_path=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    register_blueprints(app)
+    books = make_page(args.rows, args.seed)
+    rng = random.Random(args.seed + 1)
+    page = {'next_cursor': None, 'is_first_page': True}
+
+    def full_loop():
+        render_template('catalog.html', books=books, **page)
+
+    def cached():
+        render_template('catalog.html', books=books, rows=render_catalog_rows(books), **page)
+
+    def churn():
+        for book in rng.sample(books, int(len(books) * args.churn)):
+            book['available_copies'] = (book['available_copies'] + 1) % (book['total_copies'] + 1)
+
+    with app.test_request_context('/catalog'):
+        full_loop(), cached()  # compile templates outside the timings
+        results = [
+            ('full jinja loop', time_renders(args.renders, full_loop)),
+            ('cached, cold', time_renders(args.renders, cached, clear_fragment_cache)),
+            ('cached, warm', time_renders(args.renders, cached)),
+            (f'cached, {args.churn:.0%} churn', time_renders(args.renders, cached, churn)),
+        ]
+
+    baseline = percentile(results[0][1], 50)
+    for name, samples in results:
+        p50 = percentile(samples, 50)
+        print(f"{name:>20}: n={len(samples):<5} p50={p50:8.3f}ms p99={percentile(samples, 99):8.3f}ms "
+              f"max={max(samples):8.3f}ms  x{baseline / p50:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark - In-memory trigram index vs. substring scan for catalog search
+
+Builds an index over synthetic books (no database needed) and reports
+latency percentiles for title and author searches.
+
+Usage:
+    python benchmarks/bench_search_index.py --books 1000000 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.search_index import TrigramIndex  # noqa: E402
+
+SYLLABLES = ("ka ri mo len ta vor in el an sha dor ith ul mer gra bel fen "
+             "tor ous ric ald win hal cor nes pra lin ost vey dun mar sil").split()
+
+
+def make_vocabulary(rng, size):
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def make_books(n, seed):
+    rng = random.Random(seed)
+    words = make_vocabulary(rng, 20000)
+    names = make_vocabulary(rng, 3000)
+    for book_id in range(1, n + 1):
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(1, 5))).title()
+        author = f"{rng.choice(names).title()} {rng.choice(names).title()}"
+        yield book_id, title, author
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--scan-queries', type=int, default=20,
+                        help='queries to time with the full substring scan')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rows = list(make_books(args.books, args.seed))
+    index = TrigramIndex()
+    start = time.perf_counter()
+    index.add_many(rows)
+    build_s = time.perf_counter() - start
+    print(f"built index over {len(index):,} books in {build_s:.1f}s")
+
+    rng = random.Random(args.seed + 1)
+    queries = []
+    for _ in range(args.queries):
+        book_id, title, author = rng.choice(rows)
+        field, value = rng.choice((('title', title), ('author', author)))
+        start_at = rng.randint(0, max(0, len(value) - 4))
+        queries.append((field, value[start_at:start_at + rng.randint(3, 8)]))
+
+    timings = []
+    for field, term in queries:
+        start = time.perf_counter()
+        index.search(term, field, limit=50)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    scan_timings = []
+    for field, term in queries[:args.scan_queries]:
+        position = 1 if field == 'title' else 2
+        needle = term.lower()
+        start = time.perf_counter()
+        sorted((r for r in rows if needle in r[position].lower()), key=lambda r: (r[1], r[0]))[:50]
+        scan_timings.append((time.perf_counter() - start) * 1000)
+
+    for name, samples in (('trigram index', timings), ('substring scan', scan_timings)):
+        print(f"{name:>15}: n={len(samples):<5} p50={percentile(samples, 50):8.2f}ms "
+              f"p99={percentile(samples, 99):8.2f}ms max={max(samples):8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+Benchmark - Latency and throughput of the library service functions
+
+Seeds a scratch database at the requested scale with the synthetic data
+generator (the same data as `cli.py generate`), then times each service
+function call by call and writes latency percentiles and throughput to a
+JSON file, so runs can be compared over time.
+
+Usage:
+    python benchmarks/bench_services.py --books 1000000 --patrons 100000 --loans 10000000
+    python benchmarks/bench_services.py --reuse --ops 2000 --output results.json
+    python benchmarks/bench_services.py --storage memory --books 100000 --loans 1000000
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database  # noqa: E402
+from bench_search_index import percentile  # noqa: E402
+from repository import InMemoryRepository, set_repository  # noqa: E402
+from services.synthetic_data import LibraryGenerator, generate_library, isbn13  # noqa: E402
+
+
+def isbn_for(n):
+    # 979 prefix: never collides with the generator's 978 catalog
+    return isbn13(f"979{n:09d}")
+
+
+def measure(name, calls):
+    """Time each zero-argument call and summarise the latencies in milliseconds."""
+    timings = []
+    started = time.perf_counter()
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - started
+    result = {
+        'ops': len(timings),
+        'seconds': round(elapsed, 4),
+        'throughput_ops_s': round(len(timings) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(statistics.mean(timings), 4),
+        'p50_ms': round(percentile(timings, 50), 4),
+        'p90_ms': round(percentile(timings, 90), 4),
+        'p99_ms': round(percentile(timings, 99), 4),
+        'max_ms': round(max(timings), 4),
+    }
+    print(f"{name:>30}: n={result['ops']:<6} {result['throughput_ops_s']:>9} ops/s "
+          f"p50={result['p50_ms']:8.3f}ms p99={result['p99_ms']:8.3f}ms")
+    return result
+
+
+def sqlite_inputs(ops):
+    """Sample (books, active loans, patrons, available book IDs, titles) from the database."""
+    conn = database.get_db_connection()
+    books = conn.execute('SELECT MAX(id) FROM books').fetchone()[0] or 0
+    active = conn.execute('''
+        SELECT patron_id, book_id FROM borrow_records WHERE return_date IS NULL LIMIT ?
+    ''', (ops * 10,)).fetchall()
+    patrons = [row[0] for row in conn.execute(
+        'SELECT patron_id FROM patron_summary ORDER BY random() LIMIT ?', (ops,))]
+    available = [row[0] for row in conn.execute(
+        'SELECT id FROM books WHERE available_copies > 0 ORDER BY random() LIMIT ?', (ops,))]
+    titles = [row[0] for row in conn.execute(
+        'SELECT title FROM books ORDER BY random() LIMIT ?', (ops,))]
+    conn.close()
+    return books, active, patrons, available, titles
+
+
+def load_memory_store(books, patrons, loans, seed, ops):
+    """
+    Fill an in-memory repository with the generator's data through the
+    repository interface, and sample the benchmark inputs from the rows.
+    """
+    store = InMemoryRepository()
+    set_repository(store)
+    generator = LibraryGenerator(books, patrons, loans, seed)
+    loans = list(generator.loan_rows())
+    active = []
+    # Returned loans first: returning marks every open loan of that patron and book
+    for patron_id, book_id, borrowed, due, returned, *_ in sorted(loans, key=lambda row: row[4] is None):
+        store.insert_borrow_record(patron_id, book_id, datetime.fromisoformat(borrowed),
+                                   datetime.fromisoformat(due))
+        if returned:
+            store.update_borrow_record_return_date(patron_id, book_id, datetime.fromisoformat(returned))
+        elif len(active) < ops * 10:
+            active.append((patron_id, book_id))
+    rows = list(generator.book_rows())
+    for _, title, author, isbn, total, available in rows:
+        store.insert_book(title, author, isbn, total, available)
+
+    rng = random.Random(seed + 2)
+    sample = rng.sample(rows, min(ops, len(rows)))
+    patron_ids = [str(100000 + n) for n in rng.sample(range(patrons), min(ops, patrons))]
+    return (len(rows), active, patron_ids, [row[0] for row in sample if row[5] > 0],
+            [row[1] for row in sample])
+
+
+def run_benchmarks(ops, seed, use_index, inputs):
+    import services.library_service as ls
+    from services.search_index import catalog_index
+
+    rng = random.Random(seed + 1)
+    books, active, patrons, available, titles = inputs
+    if use_index:
+        catalog_index.build()
+
+    results = {}
+    new_isbns = [isbn_for(books + 1000000 + n) for n in range(ops)]
+    results['add_book_to_catalog'] = measure('add_book_to_catalog', (
+        (lambda isbn=isbn: ls.add_book_to_catalog("Benchmark Title", "Benchmark Author", isbn, 3))
+        for isbn in new_isbns))
+
+    # Fresh patron IDs stay under the borrow limit
+    borrowers = [(str(900000 + n), book_id) for n, book_id in enumerate(available)]
+    results['borrow_book_by_patron'] = measure('borrow_book_by_patron', (
+        (lambda p=p, b=b: ls.borrow_book_by_patron(p, b)) for p, b in borrowers))
+    results['return_book_by_patron'] = measure('return_book_by_patron', (
+        (lambda p=p, b=b: ls.return_book_by_patron(p, b)) for p, b in borrowers))
+
+    fee_loans = [rng.choice(active) for _ in range(ops)] if active else []
+    if fee_loans:
+        results['calculate_late_fee_for_book'] = measure('calculate_late_fee_for_book', (
+            (lambda p=p, b=b: ls.calculate_late_fee_for_book(p, b)) for p, b in fee_loans))
+
+    terms = []
+    for title in titles:
+        start_at = rng.randint(0, max(0, len(title) - 4))
+        terms.append(title[start_at:start_at + rng.randint(3, 8)])
+    results['search_books_in_catalog'] = measure('search_books_in_catalog', (
+        (lambda t=t: ls.search_books_in_catalog(t, 'title', limit=50)) for t in terms))
+
+    results['get_patron_status_report'] = measure('get_patron_status_report', (
+        (lambda p=p: ls.get_patron_status_report(p)) for p in patrons))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--patrons', type=int, default=10000)
+    parser.add_argument('--loans', type=int, default=1000000)
+    parser.add_argument('--ops', type=int, default=1000, help='calls timed per function')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database', default=os.path.join(ROOT, 'benchmarks', 'bench_library.db'),
+                        help='scratch database file (default: %(default)s)')
+    parser.add_argument('--reuse', action='store_true',
+                        help='benchmark an existing database instead of seeding a new one')
+    parser.add_argument('--storage', choices=('sqlite', 'memory'), default='sqlite',
+                        help='repository the service functions run against (default: %(default)s)')
+    parser.add_argument('--no-index', action='store_true',
+                        help='search through SQLite instead of the in-memory trigram index')
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/<timestamp>.json)')
+    args = parser.parse_args(argv)
+
+    database.DATABASE = args.database
+    seed_seconds = None
+    if args.storage == 'memory':
+        start = time.perf_counter()
+        inputs = load_memory_store(args.books, args.patrons, args.loans, args.seed, args.ops)
+        seed_seconds = round(time.perf_counter() - start, 2)
+        print(f"loaded {args.books:,} books, {args.loans:,} loans into memory in {seed_seconds}s")
+    elif not args.reuse:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.database + suffix):
+                os.remove(args.database + suffix)
+        database.init_database()
+        start = time.perf_counter()
+        generate_library(args.books, args.patrons, args.loans, args.seed)
+        seed_seconds = round(time.perf_counter() - start, 2)
+        print(f"seeded {args.books:,} books, {args.loans:,} loans in {seed_seconds}s")
+    else:
+        database.init_database()
+    if args.storage == 'sqlite':
+        inputs = sqlite_inputs(args.ops)
+
+    try:
+        # The trigram index is built from SQLite, so it only applies there
+        results = run_benchmarks(args.ops, args.seed, args.storage == 'sqlite' and not args.no_index, inputs)
+    finally:
+        database.close_all_connections()
+
+    started_at = datetime.now()
+    report = {
+        'benchmark': 'services',
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'scale': {'books': args.books, 'patrons': args.patrons, 'loans': args.loans,
+                  'reused_database': args.reuse},
+        'ops': args.ops,
+        'seed': args.seed,
+        'storage': args.storage,
+        'search_index': args.storage == 'sqlite' and not args.no_index,
+        'seed_seconds': seed_seconds,
+        'results': results,
+    }
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results',
+                                         f"services-{started_at:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark - Cold start of the Flask application
+
+Starts a fresh interpreter per run that imports app and calls create_app()
+against a scratch database, in development mode (DDL, sample data, index
+built inline) and production mode (schema version check, index built in
+the background). Reports the wall time of each run and the create_app()
+phase breakdown it recorded.
+
+Usage:
+    python benchmarks/bench_startup.py --books 100000 --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database  # noqa: E402
+from bench_search_index import percentile  # noqa: E402
+from services.synthetic_data import generate_library  # noqa: E402
+
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+import database
+database.DATABASE = sys.argv[1]
+import app
+created = app.create_app({'PRODUCTION': sys.argv[2] == 'production'})
+timings = dict(created.config['STARTUP_TIMINGS'], process=time.perf_counter() - start)
+print(json.dumps(timings))
+'''
+
+
+def cold_start(path, mode):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', CHILD, path, mode], cwd=ROOT, env=dict(os.environ),
+                            capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['wall'] = time.perf_counter() - start
+    return timings
+
+
+def report(name, runs):
+    walls = [run['wall'] * 1000 for run in runs]
+    phases = [phase for phase in runs[0] if phase not in ('wall', 'process')]
+    breakdown = ' '.join(f"{phase}={statistics.median(run[phase] for run in runs) * 1000:.1f}"
+                         for phase in phases)
+    print(f"{name:>12}: n={len(walls):<3} wall p50={percentile(walls, 50):7.1f}ms "
+          f"max={max(walls):7.1f}ms | create_app ms: {breakdown}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--patrons', type=int, default=10000)
+    parser.add_argument('--loans', type=int, default=200000)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--database', default=os.path.join(ROOT, 'benchmarks', 'bench_startup.db'),
+                        help='scratch database file (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(args.database + suffix):
+            os.remove(args.database + suffix)
+    database.DATABASE = args.database
+    database.init_database()
+    generate_library(args.books, args.patrons, args.loans)
+    database.close_all_connections()
+    print(f"seeded {args.books:,} books, {args.loans:,} loans")
+
+    for mode in ('development', 'production'):
+        report(mode, [cold_start(args.database, mode) for _ in range(args.runs)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Command-line tools for the Library Management System.
+
+Usage:
+    python cli.py [--database PATH] <command> [options]
+
+Commands:
+    import-books    Bulk import books from a CSV or JSONL file
+    fees            Compute outstanding late fees for every patron
+    check-summary   Verify (or rebuild) the patron_summary table
+    generate        Fill an empty database with seeded synthetic data
+    slow-queries    Rank statements in the slow query log by total time
+    export-loans    Stream borrow records as NDJSON or CSV
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import date, datetime
+
+import database
+
+
+def cmd_import_books(args) -> int:
+    """Stream a CSV/JSONL file into the catalog and report rejected rows."""
+    from services.catalog_import import import_books
+
+    fmt = args.format or ('jsonl' if args.file.endswith(('.jsonl', '.ndjson')) else 'csv')
+    rejects_file = open(args.rejects, 'w', newline='') if args.rejects else sys.stderr
+    writer = csv.writer(rejects_file)
+    writer.writerow(['line', 'isbn', 'reason'])
+
+    def on_reject(line_number, row, reason):
+        writer.writerow([line_number, (row or {}).get('isbn', ''), reason])
+
+    try:
+        with open(args.file, newline='', encoding='utf-8') as stream:
+            counts = import_books(stream, fmt, args.batch_size, on_reject)
+    finally:
+        if args.rejects:
+            rejects_file.close()
+
+    print(f"Imported {counts['imported']} book(s), rejected {counts['rejected']}.")
+    return 0 if counts['rejected'] == 0 else 1
+
+
+def cmd_fees(args) -> int:
+    """Write outstanding late fees per patron as CSV."""
+    from services.fee_engine import outstanding_fees_by_patron
+
+    today = date.fromisoformat(args.date) if args.date else None
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(['patron_id', 'open_loans', 'overdue_loans', 'total_fee'])
+        for row in outstanding_fees_by_patron(today):
+            writer.writerow([row['patron_id'], row['open_loans'], row['overdue_loans'],
+                             f"{row['total_fee']:.2f}"])
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+def cmd_check_summary(args) -> int:
+    """Report patron_summary rows that disagree with borrow_records."""
+    if args.rebuild:
+        count = database.rebuild_patron_summary()
+        print(f"Rebuilt patron_summary for {count} patron(s).")
+        return 0
+
+    problems = database.check_patron_summary()
+    for problem in problems:
+        print(f"{problem['patron_id']}: stored={problem['stored']} expected={problem['expected']}")
+    print(f"{len(problems)} inconsistent patron(s).")
+    return 0 if not problems else 1
+
+
+def cmd_generate(args) -> int:
+    """Generate a reproducible catalog and borrow history."""
+    from services.synthetic_data import generate_library
+
+    as_of = datetime.fromisoformat(args.as_of) if args.as_of else None
+    mix = {'active': args.active, 'overdue': args.overdue, 'returned': 1 - args.active - args.overdue}
+    start = time.perf_counter()
+    try:
+        counts = generate_library(args.books, args.patrons, args.loans, args.seed, as_of,
+                                  args.zipf, mix, args.batch_size)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Generated {counts['books']} book(s) and {counts['loans']} loan(s) "
+          f"({counts['active']} unreturned) in {time.perf_counter() - start:.1f}s.")
+    return 0
+
+
+def cmd_slow_queries(args) -> int:
+    """Summarise the slow query log (including rotated files), slowest total first."""
+    import slow_queries
+
+    paths = slow_queries.log_files(args.log)
+    ranked = slow_queries.summarize(slow_queries.read_entries(paths))[:args.top]
+    if args.json:
+        print(json.dumps(ranked, indent=2))
+        return 0
+    if not ranked:
+        print(f"No slow queries logged in {args.log or slow_queries.LOG_FILE}.")
+        return 0
+    for rank, group in enumerate(ranked, start=1):
+        scan = "  FULL SCAN" if group['full_scan'] else ""
+        print(f"{rank:>3}. total={group['total_ms']:.1f}ms count={group['count']} "
+              f"mean={group['mean_ms']:.1f}ms max={group['max_ms']:.1f}ms{scan}")
+        print(f"     {group['sql']}")
+        print(f"     params: {json.dumps(group['params'])}")
+        for detail in group['plan'] or ():
+            print(f"     plan: {detail}")
+    return 0
+
+
+def cmd_export_loans(args) -> int:
+    """Stream borrow records (all, or one patron's history) to a file or stdout."""
+    from services.loan_export import export_loans
+
+    try:
+        chunks = export_loans(args.format, args.patron, args.since, args.until, args.batch_size)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Library Management System tools")
+    parser.add_argument('--database', default=database.DATABASE,
+                        help="SQLite database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    imp = commands.add_parser('import-books', help="bulk import books from CSV or JSONL")
+    imp.add_argument('file', help="CSV file with a header row, or JSONL file")
+    imp.add_argument('--format', choices=('csv', 'jsonl'),
+                     help="input format (default: from file extension)")
+    imp.add_argument('--batch-size', type=int, default=1000,
+                     help="rows per insert transaction (default: %(default)s)")
+    imp.add_argument('--rejects', help="write rejected rows to this CSV instead of stderr")
+    imp.set_defaults(func=cmd_import_books)
+
+    fees = commands.add_parser('fees', help="compute outstanding late fees per patron")
+    fees.add_argument('--date', help="compute fees as of this date, YYYY-MM-DD (default: today)")
+    fees.add_argument('--output', help="write CSV to this file instead of stdout")
+    fees.set_defaults(func=cmd_fees)
+
+    summary = commands.add_parser('check-summary', help="verify the patron_summary table")
+    summary.add_argument('--rebuild', action='store_true',
+                         help="recompute the table from borrow_records instead of checking it")
+    summary.set_defaults(func=cmd_check_summary)
+
+    gen = commands.add_parser('generate', help="fill an empty database with synthetic data")
+    gen.add_argument('--books', type=int, default=100000, help="catalog size (default: %(default)s)")
+    gen.add_argument('--patrons', type=int, default=10000, help="patron count (default: %(default)s)")
+    gen.add_argument('--loans', type=int, default=1000000, help="borrow records (default: %(default)s)")
+    gen.add_argument('--seed', type=int, default=42, help="random seed (default: %(default)s)")
+    gen.add_argument('--as-of', help="date the history ends, YYYY-MM-DD; pass it to reproduce "
+                                     "a database exactly (default: today)")
+    gen.add_argument('--zipf', type=float, default=1.0,
+                     help="Zipf exponent for title popularity (default: %(default)s)")
+    gen.add_argument('--active', type=float, default=0.12,
+                     help="share of loans still out and not yet due (default: %(default)s)")
+    gen.add_argument('--overdue', type=float, default=0.08,
+                     help="share of loans still out and overdue (default: %(default)s)")
+    gen.add_argument('--batch-size', type=int, default=50000,
+                     help="rows per insert transaction (default: %(default)s)")
+    gen.set_defaults(func=cmd_generate)
+
+    slow = commands.add_parser('slow-queries', help="summarise the slow query log")
+    slow.add_argument('--log', help="slow query log file (default: slow_queries.log)")
+    slow.add_argument('--top', type=int, default=10,
+                      help="number of statements to show (default: %(default)s)")
+    slow.add_argument('--json', action='store_true', help="print the ranking as JSON")
+    slow.set_defaults(func=cmd_slow_queries)
+
+    export = commands.add_parser('export-loans', help="stream borrow records as NDJSON or CSV")
+    export.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson',
+                        help="output format (default: %(default)s)")
+    export.add_argument('--patron', help="export only this patron's history")
+    export.add_argument('--since', help="only loans borrowed on or after this date, YYYY-MM-DD")
+    export.add_argument('--until', help="only loans borrowed before this date, YYYY-MM-DD")
+    export.add_argument('--batch-size', type=int, default=1000,
+                        help="rows read per fetch (default: %(default)s)")
+    export.add_argument('--output', help="write to this file instead of stdout")
+    export.set_defaults(func=cmd_export_loans)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    database.DATABASE = args.database
+    database.init_database()
+    try:
+        return args.func(args)
+    finally:
+        database.close_all_connections()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
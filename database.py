@@ -3,22 +3,490 @@ Database module for Library Management System
 Handles all database operations and connections
 """
 
+import os
+import queue
 import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from time import perf_counter
 from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import slow_queries
+from metrics import observe_sql
+from timestamps import to_epoch
 
 # Database configuration
 DATABASE = 'library.db'
 
-def get_db_connection():
-    """Get a database connection."""
-    conn = sqlite3.connect(DATABASE)
+# Connection pool configuration
+POOL_SIZE = 8                      # idle connections kept per database file
+CACHED_STATEMENTS = 256            # prepared statements cached per connection
+MMAP_SIZE = 64 * 1024 * 1024       # bytes of the database file to memory-map
+WRITE_LOCK_TIMEOUT = 5.0           # seconds to wait for the writer connection
+
+_pools: Dict[str, queue.LifoQueue] = {}
+_pools_lock = threading.Lock()
+_writers: Dict[str, Tuple[threading.RLock, Optional['PooledConnection']]] = {}
+_local = threading.local()
+
+
+class TransactionAborted(Exception):
+    """Raised to roll back a unit of work; the message is shown to the user."""
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that belongs to a pool, or is a database's writer.
+    Calling close() rolls back any uncommitted work and hands the
+    connection back to its pool (or the writer lock back) instead of
+    closing it. While the connection is inside a unit of work, commit()
+    and close() are left to the unit of work.
+    """
+
+    def execute(self, sql, parameters=()):
+        start = perf_counter()
+        try:
+            return sqlite3.Connection.execute(self, sql, parameters)
+        finally:
+            elapsed = perf_counter() - start
+            _record_query(sql, elapsed)
+            if slow_queries.THRESHOLD is not None and elapsed >= slow_queries.THRESHOLD:
+                slow_queries.record(self, sql, parameters, elapsed)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = perf_counter()
+        try:
+            return sqlite3.Connection.executemany(self, sql, seq_of_parameters)
+        finally:
+            elapsed = perf_counter() - start
+            _record_query(sql, elapsed)
+            if slow_queries.THRESHOLD is not None and elapsed >= slow_queries.THRESHOLD:
+                slow_queries.record(self, sql, None, elapsed, many=True)
+
+    def commit(self):
+        if self.uow_depth:
+            return
+        sqlite3.Connection.commit(self)
+
+    def close(self):
+        if self.uow_depth:
+            return
+        if self.is_writer:
+            _release_writer(self)
+        else:
+            _release_connection(self)
+
+    def close_physical(self):
+        """Really close the underlying SQLite connection."""
+        sqlite3.Connection.close(self)
+
+
+def _record_query(sql: str, seconds: float):
+    """
+    Account one statement to the current thread's query counters and the
+    SQL latency histogram. Only the time spent in execute()/executemany()
+    is measured, not rows fetched from the cursor afterwards.
+    """
+    counters = getattr(_local, 'query_counters', None)
+    if counters:
+        for counter in counters:
+            counter['count'] += 1
+            counter['seconds'] += seconds
+    observe_sql(sql, seconds)
+
+def start_query_counter() -> Dict:
+    """
+    Start counting SQL statements executed on the current thread.
+    Returns a dict whose 'count' and 'seconds' keys hold running totals;
+    pass it to stop_query_counter() when done.
+    """
+    counter = {'count': 0, 'seconds': 0.0}
+    counters = getattr(_local, 'query_counters', None)
+    if counters is None:
+        counters = _local.query_counters = []
+    counters.append(counter)
+    return counter
+
+def stop_query_counter(counter: Dict):
+    """Stop updating a counter returned by start_query_counter()."""
+    counters = getattr(_local, 'query_counters', None) or []
+    for index, active in enumerate(counters):
+        if active is counter:  # by identity: equal totals don't mean the same counter
+            del counters[index]
+            break
+
+@contextmanager
+def count_queries():
+    """
+    Count and time SQL statements executed on the current thread inside
+    the block. Yields a dict with running 'count' and 'seconds' totals.
+    """
+    counter = start_query_counter()
+    try:
+        yield counter
+    finally:
+        stop_query_counter(counter)
+
+def _read_only_uri(path: str) -> str:
+    return f'file:{quote(os.path.abspath(path))}?mode=ro'
+
+def _open_connection(path: str, read_only: bool = False) -> PooledConnection:
+    """
+    Open and configure a new connection for the pool. Read-only
+    connections open the file with mode=ro and set query_only, and are
+    pooled separately under their URI.
+    """
+    target = _read_only_uri(path) if read_only else path
+    conn = sqlite3.connect(target, factory=PooledConnection, uri=read_only,
+                           cached_statements=CACHED_STATEMENTS,
+                           check_same_thread=False)
     conn.row_factory = sqlite3.Row  # This enables column access by name
+    if read_only:
+        conn.execute('PRAGMA query_only=ON')
+    else:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+    conn.pool_key = target
+    conn.checked_out = True
+    conn.is_writer = False
+    conn.write_holds = 0
+    conn.uow_depth = 0
+    conn.after_transaction = []
     return conn
 
+
+def _get_pool(path: str) -> queue.LifoQueue:
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = queue.LifoQueue(maxsize=POOL_SIZE)
+            _pools[path] = pool
+        return pool
+
+
+def _release_connection(conn: PooledConnection):
+    """Return a connection to its pool, closing it if the pool is full."""
+    if not getattr(conn, 'checked_out', False):
+        return  # already released
+    conn.checked_out = False
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+    except sqlite3.Error:
+        conn.close_physical()
+        return
+    with _pools_lock:
+        pool = _pools.get(conn.pool_key)
+    try:
+        if pool is None:
+            raise queue.Full
+        pool.put_nowait(conn)
+    except queue.Full:
+        conn.close_physical()
+
+
+def get_db_connection():
+    """
+    Get a read-write database connection from the pool.
+    Connections are configured once (WAL, synchronous=NORMAL, mmap) and
+    reused; close() returns the connection to the pool. Inside a
+    unit_of_work() block the transaction's connection is returned.
+    The helpers below read through get_read_connection() and write
+    through get_write_connection().
+    """
+    uow_conn = getattr(_local, 'uow_conn', None)
+    if uow_conn is not None:
+        return uow_conn
+    pool = _get_pool(DATABASE)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        return _open_connection(DATABASE)
+    conn.checked_out = True
+    return conn
+
+
+def get_read_connection():
+    """
+    Get a read-only connection from the pool for queries that never write.
+    It is opened with mode=ro and query_only, so under WAL it reads the
+    last committed snapshot without waiting on the writer. Inside a
+    unit_of_work() block the transaction's connection is returned, so
+    reads see the block's own uncommitted writes.
+    """
+    uow_conn = getattr(_local, 'uow_conn', None)
+    if uow_conn is not None:
+        return uow_conn
+    uri = _read_only_uri(DATABASE)
+    pool = _get_pool(uri)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        return _open_connection(DATABASE, read_only=True)
+    conn.checked_out = True
+    return conn
+
+
+def get_write_connection():
+    """
+    Get the database's single writer connection, waiting up to
+    WRITE_LOCK_TIMEOUT seconds for other threads to finish with it.
+    Writes are serialised here rather than contending for SQLite's write
+    lock. close() rolls back anything uncommitted and hands the writer to
+    the next thread. Inside a unit_of_work() block the transaction's
+    connection is returned.
+    """
+    uow_conn = getattr(_local, 'uow_conn', None)
+    if uow_conn is not None:
+        return uow_conn
+    path = DATABASE
+    with _pools_lock:
+        lock = _writers.setdefault(path, (threading.RLock(), None))[0]
+    if not lock.acquire(timeout=WRITE_LOCK_TIMEOUT):
+        raise TransactionAborted("Database is busy. Please try again.")
+    # Re-read under the lock: the thread we waited for may have opened (or
+    # close_all_connections() closed) the writer meanwhile
+    with _pools_lock:
+        conn = _writers[path][1]
+    if conn is None:
+        conn = _open_connection(path)
+        conn.is_writer = True
+        with _pools_lock:
+            _writers[path] = (lock, conn)
+    conn.write_holds += 1
+    return conn
+
+
+def _release_writer(conn: PooledConnection):
+    """Give up one hold on the writer connection."""
+    if conn.write_holds <= 0:
+        return  # already released
+    conn.write_holds -= 1
+    with _pools_lock:
+        lock = _writers[conn.pool_key][0]
+    if conn.write_holds == 0:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            pass
+    lock.release()
+
+
+def close_all_connections():
+    """
+    Close every idle pooled connection and idle writer (called on app
+    teardown). A writer that is checked out is left open for its holder;
+    each path keeps its writer lock so later writers still queue on it.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        writers = list(_writers.items())
+    for path, (lock, writer) in writers:
+        if writer is None or not lock.acquire(blocking=False):
+            continue
+        try:
+            if writer.write_holds == 0:  # not held further up this thread's stack
+                with _pools_lock:
+                    _writers[path] = (lock, None)
+                writer.close_physical()
+        finally:
+            lock.release()
+    for pool in pools:
+        while True:
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close_physical()
+
+# Catalog Cache
+#
+# Book rows are read far more often than they change, so lookups by ID and
+# ISBN and the full catalog listing are served from a bounded in-process
+# LRU cache. insert_book and update_book_availability invalidate the
+# affected entries once their change is committed. Writes made by other
+# processes, or by raw SQL that bypasses those helpers, are not seen until
+# the entry is evicted or invalidated.
+
+BOOK_CACHE_SIZE = 10000
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with hit/miss/eviction counters.
+
+    Readers take a generation token before querying the database and pass
+    it to put(); invalidate() bumps the generation, so a value read before
+    a concurrent write can never be stored after that write's invalidation.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Get (found, value) for key, marking it most recently used."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, generation: int):
+        """Store value unless the cache was invalidated since generation was read."""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        """Drop keys from the cache."""
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+_book_cache = LRUCache(BOOK_CACHE_SIZE)
+
+def get_cache_stats() -> Dict:
+    """Get hit/miss/eviction counters for the catalog cache."""
+    return _book_cache.stats()
+
+def clear_book_cache():
+    """Drop every cached catalog entry."""
+    _book_cache.clear()
+
+def _cached_lookup(key, load):
+    """Read-through helper: return the cached value for key or load and cache it."""
+    # Inside a transaction, read through its connection: a cached row may
+    # predate this transaction's own writes, and what it reads may not be
+    # committed yet
+    if getattr(_local, 'uow_conn', None) is not None:
+        return load()
+    key = (DATABASE,) + key
+    found, value = _book_cache.get(key)
+    if found:
+        return value
+    generation = _book_cache.generation
+    value = load()
+    if value is not None:
+        _book_cache.put(key, value, generation)
+    return value
+
+def _invalidate_books(*keys):
+    """
+    Invalidate cached catalog entries (and the full listing) after a write.
+    Inside a unit of work the entries are dropped again once it ends, so
+    readers cannot re-cache the pre-commit value.
+    """
+    keys = [(DATABASE,) + key for key in keys] + [(DATABASE, 'all')]
+    _book_cache.invalidate(*keys)
+    uow_conn = getattr(_local, 'uow_conn', None)
+    if uow_conn is not None:
+        uow_conn.after_transaction.append(lambda: _book_cache.invalidate(*keys))
+
+@contextmanager
+def unit_of_work():
+    """
+    Run a group of database operations in one BEGIN IMMEDIATE transaction.
+
+    Helpers called inside the block share its connection and their own
+    commit()/close() calls are deferred. The block commits when it exits
+    normally and rolls back if an exception escapes; raise
+    TransactionAborted to roll back with a user-facing message. Nested
+    blocks run as savepoints of the outer transaction.
+    """
+    conn = getattr(_local, 'uow_conn', None)
+    if conn is not None:
+        name = f'uow_{conn.uow_depth}'
+        conn.execute(f'SAVEPOINT {name}')
+        conn.uow_depth += 1
+        try:
+            yield conn
+        except BaseException:
+            conn.uow_depth -= 1
+            conn.execute(f'ROLLBACK TO {name}')
+            conn.execute(f'RELEASE {name}')
+            raise
+        conn.uow_depth -= 1
+        conn.execute(f'RELEASE {name}')
+        return
+
+    conn = get_write_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+    except sqlite3.Error as e:
+        conn.close()
+        raise TransactionAborted("Database is busy. Please try again.") from e
+
+    conn.uow_depth = 1
+    conn.after_transaction = []
+    _local.uow_conn = conn
+    try:
+        yield conn
+    except BaseException:
+        conn.uow_depth = 0
+        _local.uow_conn = None
+        conn.rollback()
+        _end_transaction(conn)
+        raise
+
+    conn.uow_depth = 0
+    _local.uow_conn = None
+    try:
+        conn.commit()
+    except sqlite3.Error as e:
+        raise TransactionAborted("Database error occurred while saving changes.") from e
+    finally:
+        _end_transaction(conn)
+
+def _end_transaction(conn):
+    """
+    Run callbacks registered during a unit of work, then release its
+    connection. Cache invalidations run while the writer is still held,
+    so the next writer can't read an entry cached before this commit.
+    """
+    callbacks, conn.after_transaction = conn.after_transaction, []
+    try:
+        for callback in callbacks:
+            callback()
+    finally:
+        conn.close()
+
 def init_database():
     """Initialize the database with required tables."""
-    conn = get_db_connection()
+    conn = get_write_connection()
     
     # Create books table
     conn.execute('''
@@ -47,21 +515,365 @@ def init_database():
     
     conn.commit()
     conn.close()
+    
+    # Bring existing databases up to the current schema version
+    migrate_database()
+
+# Schema Migrations
+#
+# Each migration upgrades the schema by one version. The current version
+# is stored in PRAGMA user_version; migrate_database() applies every
+# migration above it in order, each in its own transaction. Append new
+# migrations to MIGRATIONS, never edit or reorder existing ones.
+
+def _migration_001_borrow_record_indexes(conn):
+    """Index borrow_records for patron, book and active-loan lookups."""
+    # Active loans per patron: borrow count, current loans, active record lookup
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_active_patron
+        ON borrow_records (patron_id) WHERE return_date IS NULL
+    ''')
+    # Loans of a book by a patron
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_book_patron
+        ON borrow_records (book_id, patron_id)
+    ''')
+    # Full patron history
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_patron
+        ON borrow_records (patron_id, borrow_date)
+    ''')
+
+def _migration_002_books_fulltext(conn):
+    """
+    Full-text index over book titles and authors, kept in sync by triggers.
+    The trigram tokenizer gives case-insensitive substring matching. SQLite
+    builds without FTS5 skip it and searches fall back to a table scan.
+    """
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                title, author,
+                content='books', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_after_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_after_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_after_update AFTER UPDATE OF title, author ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author)
+            VALUES ('delete', old.id, old.title, old.author);
+            INSERT INTO books_fts (rowid, title, author) VALUES (new.id, new.title, new.author);
+        END
+    ''')
+    conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+def _migration_003_books_title_index(conn):
+    """Index books by (title, id) for ordered, keyset-paginated catalog listing."""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_books_title_id ON books (title, id)
+    ''')
+
+# Recomputes patron_summary rows from borrow_records
+_PATRON_SUMMARY_SELECT = '''
+    SELECT patron_id,
+           SUM(return_date IS NULL) AS active_loans,
+           MIN(CASE WHEN return_date IS NULL THEN due_date END) AS earliest_due_date,
+           MAX(max(borrow_date, coalesce(return_date, ''))) AS last_activity
+    FROM borrow_records
+    GROUP BY patron_id
+'''
+
+def _migration_004_patron_summary(conn):
+    """
+    Per-patron summary of active loans, earliest due date and last activity.
+    Triggers on borrow_records keep it current inside the writing transaction,
+    so the borrow limit check is a primary-key lookup.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS patron_summary (
+            patron_id TEXT PRIMARY KEY,
+            active_loans INTEGER NOT NULL DEFAULT 0,
+            earliest_due_date TEXT,
+            last_activity TEXT
+        )
+    ''')
+    earliest_due = '''(
+        SELECT MIN(due_date) FROM borrow_records
+        WHERE patron_id = {who}.patron_id AND return_date IS NULL
+    )'''
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS patron_summary_after_insert AFTER INSERT ON borrow_records BEGIN
+            INSERT OR IGNORE INTO patron_summary (patron_id) VALUES (new.patron_id);
+            UPDATE patron_summary SET
+                active_loans = active_loans + (new.return_date IS NULL),
+                earliest_due_date = {earliest_due.format(who='new')},
+                last_activity = max(coalesce(last_activity, ''), new.borrow_date,
+                                    coalesce(new.return_date, ''))
+            WHERE patron_id = new.patron_id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS patron_summary_after_update
+        AFTER UPDATE OF patron_id, due_date, return_date ON borrow_records BEGIN
+            UPDATE patron_summary SET
+                active_loans = active_loans - (old.return_date IS NULL),
+                earliest_due_date = {earliest_due.format(who='old')}
+            WHERE patron_id = old.patron_id;
+            INSERT OR IGNORE INTO patron_summary (patron_id) VALUES (new.patron_id);
+            UPDATE patron_summary SET
+                active_loans = active_loans + (new.return_date IS NULL),
+                earliest_due_date = {earliest_due.format(who='new')},
+                last_activity = max(coalesce(last_activity, ''), new.borrow_date,
+                                    coalesce(new.return_date, ''))
+            WHERE patron_id = new.patron_id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS patron_summary_after_delete AFTER DELETE ON borrow_records BEGIN
+            UPDATE patron_summary SET
+                active_loans = active_loans - (old.return_date IS NULL),
+                earliest_due_date = {earliest_due.format(who='old')}
+            WHERE patron_id = old.patron_id;
+        END
+    ''')
+    _rebuild_patron_summary(conn)
+
+# SQLite expression for the epoch seconds of an ISO text column; NULL if unparseable
+_EPOCH_SQL = "CAST(strftime('%s', {column}) AS INTEGER)"
+_EPOCH_ASSIGNMENTS = ', '.join(
+    f"{prefix}_ts = {_EPOCH_SQL.format(column=prefix + '_date')}"
+    for prefix in ('borrow', 'due', 'return')
+)
+
+def _migration_005_borrow_record_epochs(conn):
+    """
+    Integer epoch-second copies of the borrow, due and return dates, so date
+    ranges and ordering are indexable. The ISO text columns stay the source
+    of truth: triggers fill the *_ts columns for writers that only set the
+    text, and existing rows are backfilled in batches by
+    backfill_borrow_record_epochs() rather than inside this transaction.
+    """
+    columns = {row['name'] for row in conn.execute('PRAGMA table_info(borrow_records)')}
+    for column in ('borrow_ts', 'due_ts', 'return_ts'):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE borrow_records ADD COLUMN {column} INTEGER')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS borrow_records_epoch_after_insert AFTER INSERT ON borrow_records
+        WHEN new.borrow_ts IS NULL OR new.due_ts IS NULL
+             OR (new.return_date IS NOT NULL AND new.return_ts IS NULL)
+        BEGIN
+            UPDATE borrow_records SET {_EPOCH_ASSIGNMENTS} WHERE id = new.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS borrow_records_epoch_after_update
+        AFTER UPDATE OF borrow_date, due_date, return_date ON borrow_records BEGIN
+            UPDATE borrow_records SET {_EPOCH_ASSIGNMENTS} WHERE id = new.id;
+        END
+    ''')
+    # Full patron history, oldest first
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_patron_borrow_ts
+        ON borrow_records (patron_id, borrow_ts)
+    ''')
+    # Open loans by due date, for overdue range scans
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_active_due_ts
+        ON borrow_records (due_ts) WHERE return_date IS NULL
+    ''')
+    conn.execute('DROP INDEX IF EXISTS idx_borrow_records_patron')
+
+def _migration_006_catalog_version(conn):
+    """
+    Single-row catalog version counter with the time of the last change,
+    bumped by triggers on every insert, update and delete of books so
+    HTTP responses can be validated against it from any process.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            modified_at INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT OR IGNORE INTO catalog_version (id, version, modified_at)
+        VALUES (1, 1, CAST(strftime('%s', 'now') AS INTEGER))
+    ''')
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS catalog_version_after_{event.lower()} AFTER {event} ON books BEGIN
+                UPDATE catalog_version
+                SET version = version + 1, modified_at = CAST(strftime('%s', 'now') AS INTEGER)
+                WHERE id = 1;
+            END
+        ''')
+
+def _migration_007_epoch_backfill_index(conn):
+    """
+    Index the borrow records whose *_ts columns are not filled yet, so
+    every startup can cheaply check for an unfinished backfill.
+    """
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_records_epoch_pending
+        ON borrow_records (id) WHERE borrow_ts IS NULL
+    ''')
+
+MIGRATIONS = [
+    _migration_001_borrow_record_indexes,
+    _migration_002_books_fulltext,
+    _migration_003_books_title_index,
+    _migration_004_patron_summary,
+    _migration_005_borrow_record_epochs,
+    _migration_006_catalog_version,
+    _migration_007_epoch_backfill_index,
+]
+
+def get_schema_version() -> int:
+    """Get the schema version stored in the database file."""
+    conn = get_read_connection()
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    conn.close()
+    return version
+
+def schema_is_current() -> bool:
+    """Check whether the database file exists and is at the newest schema version."""
+    return os.path.exists(DATABASE) and get_schema_version() >= len(MIGRATIONS)
+
+def ensure_schema() -> bool:
+    """
+    Run init_database() only when the schema is missing or out of date, and
+    return whether it ran. A worker starting against an up-to-date database
+    then reads one PRAGMA and checks for an unfinished *_ts backfill instead
+    of running DDL and opening a write transaction per migration.
+    """
+    if schema_is_current():
+        _resume_epoch_backfill()
+        return False
+    init_database()
+    return True
+
+def migrate_database() -> int:
+    """
+    Apply all pending migrations in order and return the resulting schema version.
+    Safe to run from several processes at once: each migration re-checks the
+    version inside its BEGIN IMMEDIATE transaction before applying.
+    """
+    version = get_schema_version()
+    for number, migration in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        with unit_of_work() as conn:
+            if conn.execute('PRAGMA user_version').fetchone()[0] >= number:
+                continue
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+        version = number
+    _resume_epoch_backfill()
+    return get_schema_version()
+
+@contextmanager
+def bulk_load():
+    """
+    Load data fast into a database nobody else is using. Triggers and
+    secondary indexes are dropped for the duration of the block, then every
+    migration is re-run to recreate them and rebuild the derived tables
+    (full-text index, patron_summary). Rows written inside the block must
+    fill the borrow_records *_ts columns themselves.
+    """
+    with unit_of_work() as conn:
+        derived = conn.execute('''
+            SELECT type, name FROM sqlite_master
+            WHERE type = 'trigger' OR (type = 'index' AND sql IS NOT NULL)
+        ''').fetchall()
+        for kind, name in derived:
+            conn.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+    try:
+        yield
+    finally:
+        with unit_of_work() as conn:
+            for migration in MIGRATIONS:
+                migration(conn)
+            conn.execute('''
+                UPDATE catalog_version
+                SET version = version + 1, modified_at = CAST(strftime('%s', 'now') AS INTEGER)
+            ''')
+        _invalidate_books()
+
+def backfill_borrow_record_epochs(batch_size: int = 5000) -> int:
+    """
+    Fill the *_ts columns of borrow records written before migration 5 and
+    return how many rows were updated. Rows are walked in ID order, one short
+    transaction per batch, so other connections keep reading and writing
+    while a large table is converted. Safe to re-run; rows whose borrow date
+    cannot be parsed are left alone.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        with unit_of_work() as conn:
+            ids = [row[0] for row in conn.execute('''
+                SELECT id FROM borrow_records
+                WHERE id > ? AND borrow_ts IS NULL
+                ORDER BY id LIMIT ?
+            ''', (last_id, batch_size))]
+            if not ids:
+                break
+            cur = conn.execute(f'''
+                UPDATE borrow_records SET {_EPOCH_ASSIGNMENTS}
+                WHERE id BETWEEN ? AND ? AND borrow_ts IS NULL
+                  AND strftime('%s', borrow_date) IS NOT NULL
+            ''', (ids[0], ids[-1]))
+            updated += cur.rowcount
+            last_id = ids[-1]
+    return updated
+
+# Any parseable borrow record still missing its *_ts columns; the planner
+# would otherwise scan a whole covering index to find none
+_EPOCH_PENDING_SQL = '''
+    SELECT 1 FROM borrow_records INDEXED BY idx_borrow_records_epoch_pending
+    WHERE borrow_ts IS NULL AND strftime('%s', borrow_date) IS NOT NULL
+    LIMIT 1
+'''
+
+def _resume_epoch_backfill():
+    """
+    Run backfill_borrow_record_epochs() if any parseable row still lacks its
+    *_ts columns, e.g. after the process that applied migration 5 died
+    partway through.
+    """
+    conn = get_read_connection()
+    pending = conn.execute(_EPOCH_PENDING_SQL).fetchone()
+    conn.close()
+    if pending:
+        backfill_borrow_record_epochs()
+
+SAMPLE_BOOKS = [
+    ('The Great Gatsby', 'F. Scott Fitzgerald', '9780743273565', 3),
+    ('To Kill a Mockingbird', 'Harper Lee', '9780061120084', 2),
+    ('1984', 'George Orwell', '9780451524935', 1)
+]
 
 def add_sample_data():
     """Add sample data to the database if it's empty."""
-    conn = get_db_connection()
+    conn = get_write_connection()
     book_count = conn.execute('SELECT COUNT(*) as count FROM books').fetchone()['count']
     
     if book_count == 0:
         # Add sample books
-        sample_books = [
-            ('The Great Gatsby', 'F. Scott Fitzgerald', '9780743273565', 3),
-            ('To Kill a Mockingbird', 'Harper Lee', '9780061120084', 2),
-            ('1984', 'George Orwell', '9780451524935', 1)
-        ]
-        
-        for title, author, isbn, copies in sample_books:
+        for title, author, isbn, copies in SAMPLE_BOOKS:
             conn.execute('''
                 INSERT INTO books (title, author, isbn, total_copies, available_copies)
                 VALUES (?, ?, ?, ?, ?)
@@ -85,35 +897,112 @@ def add_sample_data():
 # Helper Functions for Database Operations
 
 def get_all_books() -> List[Dict]:
-    """Get all books from the database."""
-    conn = get_db_connection()
-    books = conn.execute('SELECT * FROM books ORDER BY title').fetchall()
+    """Get all books from the database (cached)."""
+    def load():
+        conn = get_read_connection()
+        books = conn.execute('SELECT * FROM books ORDER BY title').fetchall()
+        conn.close()
+        return tuple(dict(book) for book in books)
+    return [dict(book) for book in _cached_lookup(('all',), load)]
+
+def get_books_page(after: Optional[Tuple[str, int]] = None, limit: int = 50) -> List[Dict]:
+    """
+    Get up to limit books ordered by (title, id), starting after the
+    (title, id) key of the last book on the previous page. Uses the
+    idx_books_title_id index, so the cost does not grow with the page number.
+    """
+    conn = get_read_connection()
+    if after is None:
+        books = conn.execute(
+            'SELECT * FROM books ORDER BY title, id LIMIT ?', (limit,)
+        ).fetchall()
+    else:
+        books = conn.execute(
+            'SELECT * FROM books WHERE (title, id) > (?, ?) ORDER BY title, id LIMIT ?',
+            (after[0], after[1], limit)
+        ).fetchall()
     conn.close()
     return [dict(book) for book in books]
 
 def get_book_by_id(book_id: int) -> Optional[Dict]:
-    """Get a specific book by ID."""
-    conn = get_db_connection()
-    book = conn.execute('SELECT * FROM books WHERE id = ?', (book_id,)).fetchone()
-    conn.close()
+    """Get a specific book by ID (cached)."""
+    def load():
+        conn = get_read_connection()
+        book = conn.execute('SELECT * FROM books WHERE id = ?', (book_id,)).fetchone()
+        conn.close()
+        return dict(book) if book else None
+    book = _cached_lookup(('id', book_id), load)
     return dict(book) if book else None
 
 def get_book_by_isbn(isbn: str) -> Optional[Dict]:
-    """Get a specific book by ISBN."""
-    conn = get_db_connection()
-    book = conn.execute('SELECT * FROM books WHERE isbn = ?', (isbn,)).fetchone()
+    """Get a specific book by ISBN (cached as an ISBN -> ID mapping)."""
+    def load():
+        conn = get_read_connection()
+        row = conn.execute('SELECT id FROM books WHERE isbn = ?', (isbn,)).fetchone()
+        conn.close()
+        return row['id'] if row else None
+    book_id = _cached_lookup(('isbn', isbn), load)
+    return get_book_by_id(book_id) if book_id is not None else None
+
+def get_books_by_ids(book_ids: List[int]) -> List[Dict]:
+    """Get books by ID, in the order the IDs were given."""
+    conn = get_read_connection()
+    found = {}
+    for start in range(0, len(book_ids), 500):
+        chunk = book_ids[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        for book in conn.execute(f'SELECT * FROM books WHERE id IN ({placeholders})', chunk):
+            found[book['id']] = dict(book)
     conn.close()
-    return dict(book) if book else None
+    return [found[book_id] for book_id in book_ids if book_id in found]
+
+def _has_fulltext_index(conn) -> bool:
+    """Check whether the books_fts table exists in this database."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+    ).fetchone()
+    return row is not None
+
+def search_books(term: str, field: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+    """
+    Search books whose title or author contains term (case-insensitive).
+    Uses the books_fts trigram index, best matches first. Terms shorter than
+    three characters cannot use the index and fall back to a scan.
+    """
+    if field not in ('title', 'author'):
+        raise ValueError(f"Unsupported search field: {field}")
+    limit = -1 if limit is None else limit
+
+    conn = get_read_connection()
+    if len(term) >= 3 and _has_fulltext_index(conn):
+        # Quote the term as an FTS5 string so punctuation is matched literally
+        query = '%s : "%s"' % (field, term.replace('"', '""'))
+        books = conn.execute('''
+            SELECT b.* FROM books_fts f
+            JOIN books b ON b.id = f.rowid
+            WHERE books_fts MATCH ?
+            ORDER BY f.rank, b.title, b.id
+            LIMIT ? OFFSET ?
+        ''', (query, limit, offset)).fetchall()
+    else:
+        books = conn.execute(f'''
+            SELECT * FROM books
+            WHERE instr(lower({field}), lower(?)) > 0
+            ORDER BY title, id
+            LIMIT ? OFFSET ?
+        ''', (term, limit, offset)).fetchall()
+    conn.close()
+    return [dict(book) for book in books]
 
 def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
     """Get currently borrowed books for a patron."""
-    conn = get_db_connection()
+    conn = get_read_connection()
     records = conn.execute('''
-        SELECT br.*, b.title, b.author 
+        SELECT br.book_id, br.borrow_date, br.due_date, b.title, b.author
         FROM borrow_records br 
         JOIN books b ON br.book_id = b.id 
         WHERE br.patron_id = ? AND br.return_date IS NULL
-        ORDER BY br.borrow_date
+        ORDER BY br.borrow_ts, br.id
     ''', (patron_id,)).fetchall()
     conn.close()
     
@@ -130,19 +1019,154 @@ def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
     
     return borrowed_books
 
+def get_patron_loans(patron_id: str) -> List[Dict]:
+    """
+    Get every borrow record (current and returned) for a patron, with the
+    book title and author, oldest first, in a single query.
+    """
+    conn = get_read_connection()
+    records = conn.execute('''
+        SELECT br.book_id, br.borrow_date, br.due_date, br.return_date,
+               br.borrow_ts, br.due_ts, b.title, b.author
+        FROM borrow_records br
+        JOIN books b ON b.id = br.book_id
+        WHERE br.patron_id = ?
+        ORDER BY br.borrow_ts, br.id
+    ''', (patron_id,)).fetchall()
+    conn.close()
+    return [dict(record) for record in records]
+
+def iter_open_loans(batch_size: int = 10000):
+    """
+    Yield batches of (id, patron_id, book_id, due_day) rows for every
+    unreturned borrow record, where due_day is the 'YYYY-MM-DD' part of
+    the due date. Rows are fetched batch_size at a time.
+    """
+    conn = get_read_connection()
+    try:
+        cursor = conn.execute('''
+            SELECT id, patron_id, book_id, substr(due_date, 1, 10) AS due_day
+            FROM borrow_records
+            WHERE return_date IS NULL
+        ''')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+    finally:
+        conn.close()
+
+LOAN_EXPORT_COLUMNS = ('id', 'patron_id', 'book_id', 'title', 'author', 'isbn',
+                       'borrow_date', 'due_date', 'return_date')
+
+def iter_borrow_records(patron_id: Optional[str] = None, since_ts: Optional[int] = None,
+                        until_ts: Optional[int] = None, batch_size: int = 1000):
+    """
+    Yield batches of borrow records with their book's title, author and
+    ISBN, as tuples in LOAN_EXPORT_COLUMNS order. Rows are fetched
+    batch_size at a time from one read snapshot, so memory stays bounded
+    by the batch however large the table is.
+
+    With patron_id, that patron's history oldest first; otherwise every
+    record in id order. since_ts/until_ts bound borrow_ts (epoch seconds,
+    until exclusive).
+    """
+    conditions, params = [], []
+    if patron_id is not None:
+        conditions.append('br.patron_id = ?')
+        params.append(patron_id)
+    if since_ts is not None:
+        conditions.append('br.borrow_ts >= ?')
+        params.append(since_ts)
+    if until_ts is not None:
+        conditions.append('br.borrow_ts < ?')
+        params.append(until_ts)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    order = 'br.borrow_ts, br.id' if patron_id is not None else 'br.id'
+    conn = get_read_connection()
+    try:
+        cursor = conn.execute(f'''
+            SELECT br.id, br.patron_id, br.book_id, b.title, b.author, b.isbn,
+                   br.borrow_date, br.due_date, br.return_date
+            FROM borrow_records br
+            LEFT JOIN books b ON b.id = br.book_id
+            {where}
+            ORDER BY {order}
+        ''', params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+    finally:
+        conn.close()
+
+def get_catalog_version() -> Tuple[int, int]:
+    """
+    Get the catalog version and the UTC epoch second it last changed.
+    The version goes up with every write to the books table.
+    """
+    conn = get_read_connection()
+    row = conn.execute('SELECT version, modified_at FROM catalog_version WHERE id = 1').fetchone()
+    conn.close()
+    return row['version'], row['modified_at']
+
 def get_patron_borrow_count(patron_id: str) -> int:
-    """Get the number of books currently borrowed by a patron."""
-    conn = get_db_connection()
-    count = conn.execute('''
-        SELECT COUNT(*) as count FROM borrow_records 
-        WHERE patron_id = ? AND return_date IS NULL
-    ''', (patron_id,)).fetchone()['count']
+    """Get the number of books currently borrowed by a patron (from patron_summary)."""
+    conn = get_read_connection()
+    row = conn.execute(
+        'SELECT active_loans FROM patron_summary WHERE patron_id = ?', (patron_id,)
+    ).fetchone()
     conn.close()
+    return row['active_loans'] if row else 0
+
+def get_patron_summary(patron_id: str) -> Optional[Dict]:
+    """Get a patron's active loan count, earliest due date and last activity time."""
+    conn = get_read_connection()
+    row = conn.execute('SELECT * FROM patron_summary WHERE patron_id = ?', (patron_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def _rebuild_patron_summary(conn):
+    conn.execute('DELETE FROM patron_summary')
+    conn.execute(f'''
+        INSERT INTO patron_summary (patron_id, active_loans, earliest_due_date, last_activity)
+        {_PATRON_SUMMARY_SELECT}
+    ''')
+
+def rebuild_patron_summary() -> int:
+    """Recompute patron_summary from borrow_records; returns the number of patrons."""
+    with unit_of_work() as conn:
+        _rebuild_patron_summary(conn)
+        count = conn.execute('SELECT COUNT(*) FROM patron_summary').fetchone()[0]
     return count
 
+def check_patron_summary() -> List[Dict]:
+    """
+    Compare patron_summary with borrow_records.
+    Returns one dict per inconsistent patron with the 'stored' and 'expected'
+    rows (either may be None); an empty list means the table is consistent.
+    """
+    columns = ('active_loans', 'earliest_due_date', 'last_activity')
+    conn = get_read_connection()
+    expected = {row['patron_id']: dict(row) for row in conn.execute(_PATRON_SUMMARY_SELECT)}
+    stored = {row['patron_id']: dict(row) for row in conn.execute('SELECT * FROM patron_summary')}
+    conn.close()
+
+    problems = []
+    for patron_id in sorted(set(expected) | set(stored)):
+        have, want = stored.get(patron_id), expected.get(patron_id)
+        # A patron whose loans were all deleted may keep an all-empty row
+        if want is None and have and not have['active_loans'] and have['earliest_due_date'] is None:
+            continue
+        if have is None or want is None or any(have[c] != want[c] for c in columns):
+            problems.append({'patron_id': patron_id, 'stored': have, 'expected': want})
+    return problems
+
 def insert_book(title: str, author: str, isbn: str, total_copies: int, available_copies: int) -> bool:
     """Insert a new book into the database."""
-    conn = get_db_connection()
+    conn = get_write_connection()
     try:
         conn.execute('''
             INSERT INTO books (title, author, isbn, total_copies, available_copies)
@@ -150,19 +1174,47 @@ def insert_book(title: str, author: str, isbn: str, total_copies: int, available
         ''', (title, author, isbn, total_copies, available_copies))
         conn.commit()
         conn.close()
+        _invalidate_books(('isbn', isbn))
         return True
     except Exception as e:
         conn.close()
         return False
 
+def get_existing_isbns(isbns: List[str]) -> set:
+    """Get the subset of isbns that already exist in the catalog."""
+    conn = get_read_connection()
+    existing = set()
+    for start in range(0, len(isbns), 500):
+        chunk = isbns[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f'SELECT isbn FROM books WHERE isbn IN ({placeholders})', chunk)
+        existing.update(row['isbn'] for row in rows)
+    conn.close()
+    return existing
+
+def insert_books_bulk(books: List[Tuple[str, str, str, int, int]]) -> int:
+    """
+    Insert many (title, author, isbn, total_copies, available_copies) rows in
+    one transaction. Raises sqlite3.IntegrityError (and inserts nothing) if any
+    ISBN already exists.
+    """
+    with unit_of_work() as conn:
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?)
+        ''', books)
+        _invalidate_books()
+    return len(books)
+
 def insert_borrow_record(patron_id: str, book_id: int, borrow_date: datetime, due_date: datetime) -> bool:
     """Insert a new borrow record into the database."""
-    conn = get_db_connection()
+    conn = get_write_connection()
     try:
         conn.execute('''
-            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date)
-            VALUES (?, ?, ?, ?)
-        ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat()))
+            INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, borrow_ts, due_ts)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (patron_id, book_id, borrow_date.isoformat(), due_date.isoformat(),
+              to_epoch(borrow_date), to_epoch(due_date)))
         conn.commit()
         conn.close()
         return True
@@ -171,31 +1223,37 @@ def insert_borrow_record(patron_id: str, book_id: int, borrow_date: datetime, du
         return False
 
 def update_book_availability(book_id: int, change: int) -> bool:
-    """Update the available copies of a book by a given amount (+1 for return, -1 for borrow)."""
-    conn = get_db_connection()
+    """
+    Update the available copies of a book by a given amount (+1 for return, -1 for borrow).
+    The update is guarded so available copies stay between 0 and total copies;
+    returns False if the guard rejected it.
+    """
+    conn = get_write_connection()
     try:
-        conn.execute('''
-            UPDATE books SET available_copies = available_copies + ? WHERE id = ?
-        ''', (change, book_id))
+        cur = conn.execute('''
+            UPDATE books SET available_copies = available_copies + ?
+            WHERE id = ? AND available_copies + ? BETWEEN 0 AND total_copies
+        ''', (change, book_id, change))
         conn.commit()
         conn.close()
-        return True
+        _invalidate_books(('id', book_id))
+        return cur.rowcount == 1
     except Exception as e:
         conn.close()
         return False
 
 def update_borrow_record_return_date(patron_id: str, book_id: int, return_date: datetime) -> bool:
     """Update the return date for a borrow record."""
-    conn = get_db_connection()
+    conn = get_write_connection()
     try:
-        conn.execute('''
+        cur = conn.execute('''
             UPDATE borrow_records 
             SET return_date = ? 
             WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
         ''', (return_date.isoformat(), patron_id, book_id))
         conn.commit()
         conn.close()
-        return True
+        return cur.rowcount > 0
     except Exception as e:
         conn.close()
         return False
@@ -0,0 +1,178 @@
+"""
+Metrics module for Library Management System
+Aggregates SQL and request timings into histograms and renders them in the
+Prometheus text exposition format
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Upper bounds of the statements-per-request histogram buckets
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with one series per label combination."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...],
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict]:
+        """Get {labels: {'count', 'sum', 'buckets': [(le, cumulative count), ...]}}."""
+        with self._lock:
+            series = {labels: (list(counts), total, count)
+                      for labels, (counts, total, count) in self._series.items()}
+        result = {}
+        for labels, (counts, total, count) in series.items():
+            running, buckets = 0, []
+            for bound, bucket_count in zip(self.buckets, counts):
+                running += bucket_count
+                buckets.append((bound, running))
+            result[labels] = {'count': count, 'sum': total, 'buckets': buckets}
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for labels, data in sorted(self.snapshot().items()):
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels)]
+            for bound, count in data['buckets'] + [('+Inf', data['count'])]:
+                bucket_labels = ','.join(pairs + [f'le="{bound}"'])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {count}')
+            label_text = '{' + ','.join(pairs) + '}' if pairs else ''
+            lines.append(f'{self.name}_sum{label_text} {data["sum"]:.6f}')
+            lines.append(f'{self.name}_count{label_text} {data["count"]}')
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+SQL_SECONDS = Histogram('library_sql_statement_seconds',
+                        'Time spent in execute()/executemany() per SQL statement.', ('operation',))
+REQUEST_SECONDS = Histogram('library_http_request_seconds',
+                            'Flask request latency.', ('endpoint', 'method', 'status'))
+REQUEST_DB_SECONDS = Histogram('library_http_request_db_seconds',
+                               'SQL time per Flask request.', ('endpoint',))
+REQUEST_RENDER_SECONDS = Histogram('library_http_request_render_seconds',
+                                   'Template render time per Flask request.', ('endpoint',))
+REQUEST_STATEMENTS = Histogram('library_http_request_sql_statements',
+                               'SQL statements per Flask request.', ('endpoint',), COUNT_BUCKETS)
+STARTUP_SECONDS = Histogram('library_startup_phase_seconds',
+                            'Time spent in each create_app() phase.', ('phase',))
+ALL_METRICS = (SQL_SECONDS, REQUEST_SECONDS, REQUEST_DB_SECONDS, REQUEST_RENDER_SECONDS, REQUEST_STATEMENTS,
+               STARTUP_SECONDS)
+
+
+@lru_cache(maxsize=1024)
+def sql_operation(sql: str) -> str:
+    """The lower-cased leading keyword of a statement, e.g. 'select'."""
+    words = sql.split(None, 1)
+    return words[0].lower() if words else ''
+
+
+def observe_sql(sql: str, seconds: float):
+    SQL_SECONDS.observe(seconds, sql_operation(sql))
+
+
+def observe_startup(timings: Dict[str, float]):
+    """Record one application start, given {phase: seconds}."""
+    for phase, seconds in timings.items():
+        STARTUP_SECONDS.observe(seconds, phase)
+
+
+def render_prometheus() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics():
+    for metric in ALL_METRICS:
+        metric.clear()
+
+
+def init_app(app):
+    """
+    Install request hooks on a Flask app: each request's latency, SQL time,
+    statement count and template render time go into the histograms above,
+    and the response gets a Server-Timing header with the same breakdown.
+    """
+    from flask import before_render_template, g, request, template_rendered
+    from database import start_query_counter, stop_query_counter
+
+    @app.before_request
+    def _start_timing():
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql = start_query_counter()
+        g.metrics_render = 0.0
+
+    def _render_started(sender, **extra):
+        if 'metrics_started' in g:
+            g.metrics_render_started = time.perf_counter()
+
+    def _render_finished(sender, **extra):
+        started = g.pop('metrics_render_started', None)
+        if started is not None:
+            g.metrics_render += time.perf_counter() - started
+
+    before_render_template.connect(_render_started, app, weak=False)
+    template_rendered.connect(_render_finished, app, weak=False)
+
+    @app.after_request
+    def _finish_timing(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        sql = g.pop('metrics_sql')
+        stop_query_counter(sql)
+        total = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        render = g.metrics_render
+        REQUEST_SECONDS.observe(total, endpoint, request.method, str(response.status_code))
+        REQUEST_DB_SECONDS.observe(sql['seconds'], endpoint)
+        REQUEST_RENDER_SECONDS.observe(render, endpoint)
+        REQUEST_STATEMENTS.observe(sql['count'], endpoint)
+        other = max(0.0, total - sql['seconds'] - render)
+        response.headers.add('Server-Timing', ', '.join((
+            f'db;dur={sql["seconds"] * 1000:.2f};desc="{sql["count"]} queries"',
+            f'render;dur={render * 1000:.2f}',
+            f'app;dur={other * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        )))
+        return response
+
+    @app.teardown_request
+    def _discard_timing(exc):
+        # Requests that failed before after_request still release their counter
+        sql = g.pop('metrics_sql', None)
+        if sql is not None:
+            stop_query_counter(sql)
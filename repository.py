@@ -0,0 +1,455 @@
+"""
+Repository module for Library Management System
+Storage interface for the book and borrow-record operations the service
+layer uses, with the SQLite implementation and a pure in-memory one
+"""
+
+import itertools
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import database
+from timestamps import to_epoch
+from services.search_index import TrigramIndex
+
+
+class LibraryRepository(ABC):
+    """
+    Book and borrow-record storage.
+
+    Books are dicts with id, title, author, isbn, total_copies and
+    available_copies; borrow records have id, patron_id, book_id, the
+    borrow/due/return dates as ISO text and their *_ts epoch seconds.
+    Operations called inside unit_of_work() commit or roll back together,
+    and nested blocks roll back on their own, as in database.unit_of_work().
+    """
+
+    # Key that tells this store's rows apart in process-wide caches
+    store_key = ''
+    # Whether the shared trigram search index (built from SQLite) applies
+    uses_catalog_index = False
+
+    @abstractmethod
+    def unit_of_work(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_book_by_id(self, book_id: int) -> Optional[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_book_by_isbn(self, isbn: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_books_by_ids(self, book_ids: List[int]) -> List[Dict]:
+        """Get books by ID, in the order the IDs were given."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_all_books(self) -> List[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_books_page(self, after: Optional[Tuple[str, int]] = None, limit: int = 50) -> List[Dict]:
+        """Get up to limit books ordered by (title, id), after the given key."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def search_books(self, term: str, field: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Get books whose title or author contains term (case-insensitive)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def insert_book(self, title: str, author: str, isbn: str, total_copies: int, available_copies: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_book_availability(self, book_id: int, change: int) -> bool:
+        """Add change to a book's available copies, keeping them within 0..total_copies."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def insert_borrow_record(self, patron_id: str, book_id: int, borrow_date: datetime,
+                             due_date: datetime) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_borrow_record_return_date(self, patron_id: str, book_id: int, return_date: datetime) -> bool:
+        """Mark the patron's unreturned loans of the book as returned."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_active_borrow_record(self, patron_id: str, book_id: int) -> Optional[Dict]:
+        """Get an unreturned borrow record for the patron and book, with the book's title and author."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_patron_borrow_count(self, patron_id: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_patron_loans(self, patron_id: str) -> List[Dict]:
+        """Get every borrow record for a patron with the book title and author, oldest first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_catalog_version(self) -> Tuple[int, int]:
+        """Get a version that goes up with every book write, and when it last did (epoch seconds)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_sample_data(self):
+        """Add the demonstration books and loan if the store is empty."""
+        raise NotImplementedError
+
+
+class SQLiteRepository(LibraryRepository):
+    """The repository over database.py and the library.db file."""
+
+    uses_catalog_index = True
+
+    @property
+    def store_key(self):
+        return database.DATABASE
+
+    def unit_of_work(self):
+        return database.unit_of_work()
+
+    def get_book_by_id(self, book_id):
+        return database.get_book_by_id(book_id)
+
+    def get_book_by_isbn(self, isbn):
+        return database.get_book_by_isbn(isbn)
+
+    def get_books_by_ids(self, book_ids):
+        return database.get_books_by_ids(book_ids)
+
+    def get_all_books(self):
+        return database.get_all_books()
+
+    def get_books_page(self, after=None, limit=50):
+        return database.get_books_page(after, limit)
+
+    def search_books(self, term, field, limit=None, offset=0):
+        return database.search_books(term, field, limit, offset)
+
+    def insert_book(self, title, author, isbn, total_copies, available_copies):
+        return database.insert_book(title, author, isbn, total_copies, available_copies)
+
+    def update_book_availability(self, book_id, change):
+        return database.update_book_availability(book_id, change)
+
+    def insert_borrow_record(self, patron_id, book_id, borrow_date, due_date):
+        return database.insert_borrow_record(patron_id, book_id, borrow_date, due_date)
+
+    def update_borrow_record_return_date(self, patron_id, book_id, return_date):
+        return database.update_borrow_record_return_date(patron_id, book_id, return_date)
+
+    def get_active_borrow_record(self, patron_id, book_id):
+        conn = database.get_read_connection()
+        row = conn.execute('''
+            SELECT br.*, b.title, b.author
+            FROM borrow_records br
+            JOIN books b ON b.id = br.book_id
+            WHERE br.patron_id = ? AND br.book_id = ? AND br.return_date IS NULL
+        ''', (patron_id, book_id)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def get_patron_borrow_count(self, patron_id):
+        return database.get_patron_borrow_count(patron_id)
+
+    def get_patron_loans(self, patron_id):
+        return database.get_patron_loans(patron_id)
+
+    def get_catalog_version(self):
+        return database.get_catalog_version()
+
+    def add_sample_data(self):
+        database.add_sample_data()
+
+
+class InMemoryRepository(LibraryRepository):
+    """
+    Dict-backed repository for tests, benchmarks and load tests without
+    disk I/O. Each instance is an isolated store.
+
+    Books and loans are kept by ID, with an ISBN map, a sorted (title, id)
+    list for pages, a trigram index for searches, and per-patron loan
+    lists and active loan counts. One
+    re-entrant lock serialises access; a unit of work holds it throughout
+    and keeps an undo log per nesting level, so a failed block reverts
+    only its own changes.
+    """
+
+    _serial = itertools.count(1)
+
+    def __init__(self):
+        self.store_key = f'memory:{next(self._serial)}'
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._books: Dict[int, Dict] = {}
+        self._isbns: Dict[str, int] = {}
+        self._title_keys: List[Tuple[str, int]] = []
+        self._index = TrigramIndex()
+        self._loans: Dict[int, Dict] = {}
+        self._patron_loans: Dict[str, List[int]] = {}
+        self._active_loans: Dict[str, int] = {}
+        self._next_book_id = 1
+        self._next_loan_id = 1
+        self._version = 1
+        self._modified_at = int(time.time())
+
+    @contextmanager
+    def unit_of_work(self):
+        with self._lock:
+            frames = self._frames()
+            frames.append([])
+            try:
+                yield self
+            except BaseException:
+                for undo in reversed(frames.pop()):
+                    undo()
+                raise
+            done = frames.pop()
+            if frames:
+                frames[-1].extend(done)
+
+    def _frames(self) -> List[List[Callable]]:
+        frames = getattr(self._local, 'frames', None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def _on_rollback(self, undo: Callable):
+        frames = self._frames()
+        if frames:
+            frames[-1].append(undo)
+
+    def _catalog_changed(self):
+        previous = self._version, self._modified_at
+        self._version += 1
+        self._modified_at = int(time.time())
+
+        def undo():
+            self._version, self._modified_at = previous
+        self._on_rollback(undo)
+
+    def get_book_by_id(self, book_id):
+        with self._lock:
+            book = self._books.get(book_id)
+            return dict(book) if book else None
+
+    def get_book_by_isbn(self, isbn):
+        with self._lock:
+            book_id = self._isbns.get(isbn)
+            return dict(self._books[book_id]) if book_id is not None else None
+
+    def get_books_by_ids(self, book_ids):
+        with self._lock:
+            return [dict(self._books[book_id]) for book_id in book_ids if book_id in self._books]
+
+    def get_all_books(self):
+        with self._lock:
+            return [dict(self._books[book_id]) for _, book_id in self._title_keys]
+
+    def get_books_page(self, after=None, limit=50):
+        with self._lock:
+            start = bisect_right(self._title_keys, tuple(after)) if after is not None else 0
+            return [dict(self._books[book_id]) for _, book_id in self._title_keys[start:start + limit]]
+
+    def search_books(self, term, field, limit=None, offset=0):
+        if field not in ('title', 'author'):
+            raise ValueError(f"Unsupported search field: {field}")
+        with self._lock:
+            return self.get_books_by_ids(self._index.search(term, field, limit, offset))
+
+    def insert_book(self, title, author, isbn, total_copies, available_copies):
+        with self._lock:
+            if isbn in self._isbns:
+                return False
+            book_id = self._next_book_id
+            self._next_book_id += 1
+            self._books[book_id] = {'id': book_id, 'title': title, 'author': author, 'isbn': isbn,
+                                    'total_copies': total_copies, 'available_copies': available_copies}
+            self._isbns[isbn] = book_id
+            insort(self._title_keys, (title, book_id))
+            self._index.add(book_id, title, author)
+            self._catalog_changed()
+
+            def undo():
+                del self._books[book_id]
+                del self._isbns[isbn]
+                self._title_keys.remove((title, book_id))
+                self._index.remove(book_id)
+            self._on_rollback(undo)
+            return True
+
+    def update_book_availability(self, book_id, change):
+        with self._lock:
+            book = self._books.get(book_id)
+            if book is None or not 0 <= book['available_copies'] + change <= book['total_copies']:
+                return False
+            book['available_copies'] += change
+            self._catalog_changed()
+            self._on_rollback(lambda: book.__setitem__('available_copies', book['available_copies'] - change))
+            return True
+
+    def insert_borrow_record(self, patron_id, book_id, borrow_date, due_date):
+        with self._lock:
+            loan_id = self._next_loan_id
+            self._next_loan_id += 1
+            self._loans[loan_id] = {
+                'id': loan_id, 'patron_id': patron_id, 'book_id': book_id,
+                'borrow_date': borrow_date.isoformat(), 'due_date': due_date.isoformat(), 'return_date': None,
+                'borrow_ts': to_epoch(borrow_date), 'due_ts': to_epoch(due_date), 'return_ts': None,
+            }
+            self._patron_loans.setdefault(patron_id, []).append(loan_id)
+            self._active_loans[patron_id] = self._active_loans.get(patron_id, 0) + 1
+
+            def undo():
+                del self._loans[loan_id]
+                self._patron_loans[patron_id].remove(loan_id)
+                self._active_loans[patron_id] -= 1
+            self._on_rollback(undo)
+            return True
+
+    def _open_loans(self, patron_id, book_id) -> List[Dict]:
+        loans = (self._loans[loan_id] for loan_id in self._patron_loans.get(patron_id, ()))
+        return [loan for loan in loans if loan['book_id'] == book_id and loan['return_date'] is None]
+
+    def update_borrow_record_return_date(self, patron_id, book_id, return_date):
+        with self._lock:
+            loans = self._open_loans(patron_id, book_id)
+            for loan in loans:
+                loan['return_date'] = return_date.isoformat()
+                loan['return_ts'] = to_epoch(return_date)
+            self._active_loans[patron_id] = self._active_loans.get(patron_id, 0) - len(loans)
+
+            def undo():
+                for loan in loans:
+                    loan['return_date'] = loan['return_ts'] = None
+                self._active_loans[patron_id] += len(loans)
+            self._on_rollback(undo)
+            return bool(loans)
+
+    def get_active_borrow_record(self, patron_id, book_id):
+        with self._lock:
+            loans = self._open_loans(patron_id, book_id)
+            if not loans:
+                return None
+            book = self._books.get(book_id)
+            if book is None:
+                return None
+            return dict(loans[0], title=book['title'], author=book['author'])
+
+    def get_patron_borrow_count(self, patron_id):
+        with self._lock:
+            return self._active_loans.get(patron_id, 0)
+
+    def get_patron_loans(self, patron_id):
+        with self._lock:
+            loans = [self._loans[loan_id] for loan_id in self._patron_loans.get(patron_id, ())]
+            loans.sort(key=lambda loan: (loan['borrow_ts'], loan['id']))
+            return [{'book_id': loan['book_id'], 'borrow_date': loan['borrow_date'],
+                     'due_date': loan['due_date'], 'return_date': loan['return_date'],
+                     'borrow_ts': loan['borrow_ts'], 'due_ts': loan['due_ts'],
+                     'title': self._books[loan['book_id']]['title'],
+                     'author': self._books[loan['book_id']]['author']}
+                    for loan in loans if loan['book_id'] in self._books]
+
+    def get_catalog_version(self):
+        with self._lock:
+            return self._version, self._modified_at
+
+    def add_sample_data(self):
+        with self.unit_of_work():
+            if self._books:
+                return
+            for title, author, isbn, copies in database.SAMPLE_BOOKS:
+                self.insert_book(title, author, isbn, copies, copies)
+            # 1984 is out on loan, as in the SQLite sample data
+            now = datetime.now()
+            self.insert_borrow_record('123456', 3, now - timedelta(days=5), now + timedelta(days=9))
+            self.update_book_availability(3, -1)
+
+
+STORAGE_BACKENDS = {
+    'sqlite': SQLiteRepository,
+    'memory': InMemoryRepository,
+}
+
+_repository: LibraryRepository = SQLiteRepository()
+
+
+def create_repository(storage: str) -> LibraryRepository:
+    """Create a repository for a STORAGE setting ('sqlite' or 'memory')."""
+    try:
+        return STORAGE_BACKENDS[storage]()
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {storage}")
+
+
+def get_repository() -> LibraryRepository:
+    return _repository
+
+
+def set_repository(repository: LibraryRepository) -> LibraryRepository:
+    """Make repository the active store and return the previous one."""
+    global _repository
+    previous, _repository = _repository, repository
+    return previous
+
+
+# Module-level operations on the active repository, imported by the service layer
+
+def unit_of_work():
+    return _repository.unit_of_work()
+
+def get_book_by_id(book_id: int) -> Optional[Dict]:
+    return _repository.get_book_by_id(book_id)
+
+def get_book_by_isbn(isbn: str) -> Optional[Dict]:
+    return _repository.get_book_by_isbn(isbn)
+
+def get_books_by_ids(book_ids: List[int]) -> List[Dict]:
+    return _repository.get_books_by_ids(book_ids)
+
+def get_all_books() -> List[Dict]:
+    return _repository.get_all_books()
+
+def get_books_page(after: Optional[Tuple[str, int]] = None, limit: int = 50) -> List[Dict]:
+    return _repository.get_books_page(after, limit)
+
+def search_books(term: str, field: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+    return _repository.search_books(term, field, limit, offset)
+
+def insert_book(title: str, author: str, isbn: str, total_copies: int, available_copies: int) -> bool:
+    return _repository.insert_book(title, author, isbn, total_copies, available_copies)
+
+def update_book_availability(book_id: int, change: int) -> bool:
+    return _repository.update_book_availability(book_id, change)
+
+def insert_borrow_record(patron_id: str, book_id: int, borrow_date: datetime, due_date: datetime) -> bool:
+    return _repository.insert_borrow_record(patron_id, book_id, borrow_date, due_date)
+
+def update_borrow_record_return_date(patron_id: str, book_id: int, return_date: datetime) -> bool:
+    return _repository.update_borrow_record_return_date(patron_id, book_id, return_date)
+
+def get_active_borrow_record(patron_id: str, book_id: int) -> Optional[Dict]:
+    return _repository.get_active_borrow_record(patron_id, book_id)
+
+def get_patron_borrow_count(patron_id: str) -> int:
+    return _repository.get_patron_borrow_count(patron_id)
+
+def get_patron_loans(patron_id: str) -> List[Dict]:
+    return _repository.get_patron_loans(patron_id)
+
+def get_catalog_version() -> Tuple[int, int]:
+    return _repository.get_catalog_version()
@@ -2,8 +2,15 @@
 API Routes - JSON API endpoints
 """
 
-from flask import Blueprint, jsonify, request
-from services.library_service import calculate_late_fee_for_book, search_books_in_catalog
+from flask import Blueprint, Response, jsonify, request
+from database import get_cache_stats
+from metrics import render_prometheus
+from services.library_service import (
+    calculate_late_fee_for_book, search_books_in_catalog,
+    process_circulation_batch, MAX_BATCH_OPERATIONS,
+    get_catalog_page, CATALOG_PAGE_SIZE
+)
+from .http_cache import conditional_on_catalog
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -16,7 +23,29 @@ def get_late_fee(patron_id, book_id):
     result = calculate_late_fee_for_book(patron_id, book_id)
     return jsonify(result), 501 if 'not implemented' in result.get('status', '') else 200
 
+@api_bp.route('/books')
+@conditional_on_catalog
+def list_books_api():
+    """
+    List the catalog one page at a time, ordered by title.
+    JSON interface for R2: Book Catalog Display
+    """
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit', CATALOG_PAGE_SIZE, type=int)
+    
+    try:
+        page = get_catalog_page(cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'books': page['books'],
+        'count': len(page['books']),
+        'next_cursor': page['next_cursor']
+    })
+
 @api_bp.route('/search')
+@conditional_on_catalog
 def search_books_api():
     """
     Search for books via API endpoint.
@@ -24,16 +53,111 @@ def search_books_api():
     """
     search_term = request.args.get('q', '').strip()
     search_type = request.args.get('type', 'title')
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
     
     if not search_term:
         return jsonify({'error': 'Search term is required'}), 400
     
+    if (limit is not None and limit < 0) or offset < 0:
+        return jsonify({'error': 'limit and offset must be non-negative integers'}), 400
+    
     # Use business logic function
-    books = search_books_in_catalog(search_term, search_type)
+    books = search_books_in_catalog(search_term, search_type, limit, offset)
     
     return jsonify({
         'search_term': search_term,
         'search_type': search_type,
         'results': books,
-        'count': len(books)
+        'count': len(books),
+        'limit': limit,
+        'offset': offset
+    })
+
+@api_bp.route('/circulation/batch', methods=['POST'])
+def circulation_batch_api():
+    """
+    Borrow and return several books in one request.
+    Batch interface to R3: Book Borrowing and R4: Book Return Processing
+    
+    Body: {"operations": [{"action": "borrow"|"return", "patron_id": "123456", "book_id": 1}, ...]}
+    """
+    payload = request.get_json(silent=True) or {}
+    operations = payload.get('operations') if isinstance(payload, dict) else None
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+    
+    # Use business logic function
+    results = process_circulation_batch(operations)
+    succeeded = sum(1 for r in results if r['success'])
+    
+    return jsonify({
+        'results': results,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded
     })
+
+@api_bp.route('/cache_stats')
+def cache_stats_api():
+    """
+    Report hit/miss/eviction counters for the catalog cache.
+    """
+    return jsonify(get_cache_stats())
+
+@api_bp.route('/payment_gateway')
+def payment_gateway_api():
+    """
+    Report the payment gateway circuit breaker's state, counters and
+    rolling error-rate and latency window.
+    """
+    # Imported on first use, to keep it off the startup path
+    from services.circuit_breaker import payment_gateway
+
+    return jsonify(payment_gateway.stats())
+
+@api_bp.route('/metrics')
+def metrics_api():
+    """
+    Expose SQL statement, request latency, DB time and render time
+    histograms in the Prometheus text format.
+    """
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+def _export_response(filename, patron_id=None):
+    # Imported on first use, to keep it off the startup path
+    from services.loan_export import FORMATS, BATCH_SIZE, export_loans
+
+    fmt = request.args.get('format', 'ndjson')
+    batch_size = request.args.get('batch_size', BATCH_SIZE, type=int)
+    try:
+        chunks = export_loans(fmt, patron_id, request.args.get('since'), request.args.get('until'),
+                              batch_size)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    ext = 'csv' if fmt == 'csv' else 'ndjson'
+    return Response(chunks, mimetype=FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{filename}.{ext}"'
+    })
+
+@api_bp.route('/export/loans')
+def export_loans_api():
+    """
+    Stream every borrow record as NDJSON (default) or CSV.
+    Query parameters: format=ndjson|csv, since/until=YYYY-MM-DD (borrow
+    date, until exclusive), batch_size (rows read per fetch).
+    """
+    return _export_response('loans')
+
+@api_bp.route('/export/patrons/<patron_id>/history')
+def export_patron_history_api(patron_id):
+    """
+    Stream one patron's borrow history, oldest first, as NDJSON or CSV.
+    Takes the same query parameters as /api/export/loans.
+    """
+    if not patron_id.isdigit() or len(patron_id) != 6:
+        return jsonify({'error': 'Invalid patron ID. Must be exactly 6 digits.'}), 400
+    return _export_response(f'patron-{patron_id}-history', patron_id)
@@ -3,8 +3,9 @@ Catalog Routes - Book catalog related endpoints
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from database import get_all_books
-from services.library_service import add_book_to_catalog
+from services.library_service import add_book_to_catalog, get_catalog_page, CATALOG_PAGE_SIZE
+from .fragment_cache import render_catalog_rows
+from .http_cache import conditional_on_catalog
 
 catalog_bp = Blueprint('catalog', __name__)
 
@@ -14,13 +15,23 @@ def index():
     return redirect(url_for('catalog.catalog'))
 
 @catalog_bp.route('/catalog')
+@conditional_on_catalog
 def catalog():
     """
-    Display all books in the catalog.
+    Display the catalog one page at a time.
     Implements R2: Book Catalog Display
     """
-    books = get_all_books()
-    return render_template('catalog.html', books=books)
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit', CATALOG_PAGE_SIZE, type=int)
+    
+    try:
+        page = get_catalog_page(cursor, limit)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('catalog.catalog'))
+    
+    return render_template('catalog.html', books=page['books'], rows=render_catalog_rows(page['books']),
+                           next_cursor=page['next_cursor'], is_first_page=cursor is None)
 
 @catalog_bp.route('/add_book', methods=['GET', 'POST'])
 def add_book():
@@ -0,0 +1,54 @@
+"""
+Fragment Cache - Rendered catalog table rows, reused across requests
+"""
+
+from typing import Dict, Iterable
+
+from flask import current_app, request
+from markupsafe import Markup
+
+from database import LRUCache
+from repository import get_repository
+
+ROW_TEMPLATE = '_catalog_row.html'
+FRAGMENT_CACHE_SIZE = 20000
+
+# (store, script root, book id, available_copies, total_copies) -> html
+_fragments = LRUCache(FRAGMENT_CACHE_SIZE)
+
+
+def render_catalog_rows(books: Iterable[Dict]) -> Markup:
+    """
+    Render the catalog table rows for books, reusing each book's cached
+    row while its available and total copies are unchanged.
+
+    The copy counts are part of the key, so a borrow or return re-renders
+    just that book's row and the superseded fragment ages out of the LRU.
+    Titles, authors and ISBNs never change once a book is added.
+    """
+    template = None
+    parts = []
+    for book in books:
+        key = (get_repository().store_key, request.script_root, book['id'],
+               book['available_copies'], book['total_copies'])
+        found, html = _fragments.get(key)
+        if not found:
+            if template is None:
+                # Rendered without render_template, so rows don't count as
+                # separate page renders in the metrics
+                template = current_app.jinja_env.get_template(ROW_TEMPLATE)
+            generation = _fragments.generation
+            html = template.render(book=book)
+            _fragments.put(key, html, generation)
+        parts.append(html)
+    return Markup('\n'.join(parts))
+
+
+def get_fragment_cache_stats() -> Dict:
+    """Get hit/miss/eviction counters for the row fragment cache."""
+    return _fragments.stats()
+
+
+def clear_fragment_cache():
+    """Drop every cached row."""
+    _fragments.clear()
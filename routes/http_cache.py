@@ -0,0 +1,44 @@
+"""
+HTTP Cache - Conditional GET support for catalog-derived pages
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import make_response, request, session
+from werkzeug.http import is_resource_modified
+
+from repository import get_catalog_version
+
+
+def catalog_etag(version: int) -> str:
+    """Strong ETag for the current request at the given catalog version."""
+    return hashlib.sha256(f'{version}|{request.full_path}'.encode()).hexdigest()[:32]
+
+
+def conditional_on_catalog(view):
+    """
+    Serve a GET view with a strong ETag derived from the catalog version,
+    answering 304 Not Modified before the view runs when the client's copy
+    is still current. There is no Last-Modified: it has one-second
+    resolution, so a write in the same second would still validate. Requests with pending flash
+    messages always get a full response so the messages are shown.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or '_flashes' in session:
+            return view(*args, **kwargs)
+
+        version, _ = get_catalog_version()
+        etag = catalog_etag(version)
+
+        if not is_resource_modified(request.environ, etag=etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.cache_control.no_cache = True  # Clients may keep it but must revalidate
+        return response
+    return wrapper
@@ -0,0 +1,132 @@
+"""
+Catalog Import Module - Streaming bulk import of books from CSV or JSONL
+Rows are validated with the same R1 rules as add_book_to_catalog
+"""
+
+import csv
+import json
+import sqlite3
+from typing import Callable, Dict, Iterator, Optional, TextIO, Tuple
+
+from database import get_existing_isbns, insert_books_bulk, insert_book
+from services.library_service import validate_book_fields
+
+FIELDS = ('title', 'author', 'isbn', 'total_copies')
+DUPLICATE_ISBN = "A book with this ISBN already exists."
+
+RejectCallback = Callable[[int, Dict, str], None]
+
+
+def _read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """Yield (line_number, row) pairs one at a time from a CSV or JSONL stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else {'_error': "Invalid JSON object."}
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _text(value) -> Optional[str]:
+    """JSON numbers (e.g. the title 1984) become text; other non-strings give None."""
+    if value is None or isinstance(value, str):
+        return value or ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return None
+
+
+def _parse_row(row: Dict) -> Tuple[Optional[Tuple], Optional[str]]:
+    """Turn a raw row into an insertable tuple, or return the rejection reason."""
+    if '_error' in row:
+        return None, row['_error']
+    title = _text(row.get('title'))
+    author = _text(row.get('author'))
+    if title is None:
+        return None, "Title must be text."
+    if author is None:
+        return None, "Author must be text."
+    isbn = str(row.get('isbn') or '').strip()
+    copies = row.get('total_copies')
+    try:
+        total_copies = int(str(copies).strip()) if not isinstance(copies, int) else copies
+    except ValueError:
+        total_copies = None
+    error = validate_book_fields(title, author, isbn, total_copies)
+    if error:
+        return None, error
+    return (title.strip(), author.strip(), isbn, total_copies, total_copies), None
+
+
+def _flush(batch, on_reject: RejectCallback) -> int:
+    """Insert one batch, rejecting ISBNs that are already in the catalog."""
+    existing = get_existing_isbns([book[2] for _, _, book in batch])
+    to_insert = []
+    for line_number, row, book in batch:
+        if book[2] in existing:
+            on_reject(line_number, row, DUPLICATE_ISBN)
+        else:
+            to_insert.append((line_number, row, book))
+    if not to_insert:
+        return 0
+    try:
+        return insert_books_bulk([book for _, _, book in to_insert])
+    except sqlite3.IntegrityError:
+        # Another writer added one of these ISBNs meanwhile; insert one at a time
+        inserted = 0
+        for line_number, row, book in to_insert:
+            if insert_book(*book):
+                inserted += 1
+            else:
+                on_reject(line_number, row, DUPLICATE_ISBN)
+        return inserted
+
+
+def import_books(stream: TextIO, fmt: str = 'csv', batch_size: int = 1000,
+                 on_reject: Optional[RejectCallback] = None) -> Dict:
+    """
+    Import books from a CSV (with a header row) or JSONL stream.
+
+    Rows are read and validated one at a time and inserted in batches of
+    batch_size, each in a single transaction, so memory use depends on the
+    batch size rather than the file size. Rows that fail validation or
+    duplicate an existing ISBN (or one earlier in the file) are reported
+    through on_reject(line_number, row, reason) and skipped.
+
+    Returns:
+        dict: {'imported': int, 'rejected': int}
+    """
+    counts = {'imported': 0, 'rejected': 0}
+
+    def reject(line_number, row, reason):
+        counts['rejected'] += 1
+        if on_reject:
+            on_reject(line_number, row, reason)
+
+    batch = []
+    batch_isbns = set()
+    for line_number, row in _read_rows(stream, fmt):
+        book, error = _parse_row(row)
+        if error:
+            reject(line_number, row, error)
+            continue
+        if book[2] in batch_isbns:
+            reject(line_number, row, DUPLICATE_ISBN)
+            continue
+        batch.append((line_number, row, book))
+        batch_isbns.add(book[2])
+        if len(batch) >= batch_size:
+            counts['imported'] += _flush(batch, reject)
+            batch, batch_isbns = [], set()
+    if batch:
+        counts['imported'] += _flush(batch, reject)
+    return counts
@@ -0,0 +1,215 @@
+"""
+Circuit Breaker Module - Fail fast while the payment gateway is unhealthy
+Tracks error rate and latency over a rolling window and stops calling the
+gateway once either crosses its threshold
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict
+
+from services.payment_service import PaymentGateway
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the gateway while the circuit is open."""
+
+
+class GatewayTimeout(Exception):
+    """Raised when a gateway call runs past its latency budget."""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker over a rolling time window.
+
+    While closed, every call's outcome and duration is kept for
+    window_seconds. Once the window holds at least min_calls calls and the
+    share of failures reaches failure_rate, or the share of calls slower
+    than slow_call_seconds reaches slow_call_rate, the circuit opens and
+    calls are rejected for open_seconds. It then goes half-open and lets
+    half_open_calls trial calls through: if they all succeed it closes
+    with an empty window, and any failure opens it again.
+    """
+
+    def __init__(self, failure_rate: float = 0.5, slow_call_rate: float = 0.5,
+                 slow_call_seconds: float = 2.0, window_seconds: float = 60.0,
+                 min_calls: int = 10, open_seconds: float = 30.0, half_open_calls: int = 3,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._window = deque()  # (finished_at, failed, duration)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials_started = 0
+        self._trials_passed = 0
+        self._counters = {'calls': 0, 'successes': 0, 'failures': 0, 'slow_calls': 0,
+                          'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(self._clock())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trials_started = self._trials_passed = 0
+        return self._state
+
+    def _trim(self, now: float):
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
+
+    def _open(self, now: float):
+        self._state = OPEN
+        self._opened_at = now
+        self._counters['opened'] += 1
+
+    def acquire(self):
+        """Reserve a call, or raise CircuitOpenError if the circuit won't allow one."""
+        with self._lock:
+            state = self._current_state(self._clock())
+            if state == HALF_OPEN and self._trials_started < self.half_open_calls:
+                self._trials_started += 1
+            elif state != CLOSED:
+                self._counters['rejected'] += 1
+                raise CircuitOpenError("Payment gateway unavailable (circuit open).")
+
+    def release(self):
+        """Give back a call reserved with acquire() that never reached the gateway; counts as rejected."""
+        with self._lock:
+            self._counters['rejected'] += 1
+            if self._current_state(self._clock()) == HALF_OPEN and self._trials_started:
+                self._trials_started -= 1
+
+    def record(self, duration: float, failed: bool):
+        """Record the outcome of a call reserved with acquire()."""
+        now = self._clock()
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            self._counters['calls'] += 1
+            self._counters['failures' if failed else 'successes'] += 1
+            self._counters['slow_calls'] += slow
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._trials_passed += 1
+                    if self._trials_passed >= self.half_open_calls:
+                        self._state = CLOSED
+                        self._window.clear()
+                return
+            if state == OPEN:
+                return  # Finished after the circuit opened; already accounted for
+            self._window.append((now, failed, duration))
+            self._trim(now)
+            total = len(self._window)
+            if total < self.min_calls:
+                return
+            failures = sum(1 for _, f, _ in self._window if f)
+            slow_calls = sum(1 for _, _, d in self._window if d >= self.slow_call_seconds)
+            if failures / total >= self.failure_rate or slow_calls / total >= self.slow_call_rate:
+                self._open(now)
+
+    def stats(self) -> Dict:
+        """Get the state, lifetime counters and rolling-window figures."""
+        with self._lock:
+            now = self._clock()
+            state = self._current_state(now)
+            self._trim(now)
+            durations = sorted(d for _, _, d in self._window)
+            total = len(durations)
+            failures = sum(1 for _, f, _ in self._window if f)
+            return {
+                'state': state,
+                'counters': dict(self._counters),
+                'window': {
+                    'seconds': self.window_seconds,
+                    'calls': total,
+                    'failure_rate': round(failures / total, 4) if total else 0.0,
+                    'slow_call_rate': round(
+                        sum(1 for d in durations if d >= self.slow_call_seconds) / total, 4
+                    ) if total else 0.0,
+                    'p50_seconds': round(durations[total // 2], 4) if total else None,
+                    'p95_seconds': round(durations[min(total - 1, int(total * 0.95))], 4) if total else None,
+                },
+                'retry_in_seconds': round(max(0.0, self.open_seconds - (now - self._opened_at)), 3)
+                if state == OPEN else 0.0,
+            }
+
+
+class CircuitBreakerGateway(PaymentGateway):
+    """
+    PaymentGateway wrapper that runs calls through a CircuitBreaker.
+
+    Each call gets call_timeout seconds; past that the caller gets
+    GatewayTimeout (recorded as a failure) while the call finishes on one
+    of max_workers background threads; a call still queued for a thread is
+    cancelled and counted as rejected instead. A hung gateway costs request
+    workers at most call_timeout before the circuit opens and calls fail
+    immediately with CircuitOpenError. Raised exceptions, timeouts and
+    'failed' responses count as failures; declines and invalid amounts
+    (ValueError) do not, since they say nothing about gateway health.
+    """
+
+    def __init__(self, gateway: PaymentGateway = None, breaker: CircuitBreaker = None,
+                 call_timeout: float = 5.0, max_workers: int = 8):
+        super().__init__()
+        self.gateway = gateway or PaymentGateway()
+        self.breaker = breaker or CircuitBreaker()
+        self.call_timeout = call_timeout
+        self._calls = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gateway')
+
+    def _call(self, method, *args) -> dict:
+        self.breaker.acquire()
+        started = time.perf_counter()
+        future = self._calls.submit(method, *args)
+        # Not result(timeout=...): since Python 3.11 its TimeoutError is the
+        # builtin one, which the gateway may raise itself
+        if not wait([future], timeout=self.call_timeout).done:
+            if future.cancel():
+                # Still queued behind other slow calls: the gateway was never asked
+                self.breaker.release()
+                raise GatewayTimeout(f"Payment gateway busy; call not started within {self.call_timeout:g}s.")
+            self.breaker.record(self.call_timeout, failed=True)
+            raise GatewayTimeout(f"Payment gateway did not respond within {self.call_timeout:g}s.")
+        try:
+            result = future.result()
+        except ValueError:
+            self.breaker.record(time.perf_counter() - started, failed=False)
+            raise
+        except Exception:
+            self.breaker.record(time.perf_counter() - started, failed=True)
+            raise
+        failed = isinstance(result, dict) and result.get('status') == 'failed'
+        self.breaker.record(time.perf_counter() - started, failed=failed)
+        return result
+
+    def process_payment(self, patron_id: str, amount: float) -> dict:
+        return self._call(self.gateway.process_payment, patron_id, amount)
+
+    def refund_payment(self, transaction_id: str, amount: float) -> dict:
+        return self._call(self.gateway.refund_payment, transaction_id, amount)
+
+    def stats(self) -> Dict:
+        """Get the breaker's state and counters, plus the configured call timeout."""
+        return dict(self.breaker.stats(), call_timeout_seconds=self.call_timeout)
+
+
+# Shared, breaker-protected gateway for the running application
+payment_gateway = CircuitBreakerGateway()
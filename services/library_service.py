@@ -3,47 +3,70 @@ Library Service Module - Business Logic Functions
 Contains all the core business logic for the Library Management System
 """
 
+import base64
+import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from database import (
+from database import TransactionAborted
+from repository import (
     get_book_by_id, get_book_by_isbn, get_patron_borrow_count,
     insert_book, insert_borrow_record, update_book_availability,
-    update_borrow_record_return_date, get_all_books, get_db_connection
+    update_borrow_record_return_date, get_all_books, get_active_borrow_record,
+    unit_of_work, search_books, get_books_by_ids, get_books_page,
+    get_patron_loans, get_repository
 )
+from services.search_index import catalog_index
 
 
-def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -> Tuple[bool, str]:
+def _use_catalog_index() -> bool:
+    """The trigram index is built from SQLite, so it only serves the SQLite repository."""
+    return catalog_index.ready and get_repository().uses_catalog_index
+
+def validate_book_fields(title: str, author: str, isbn: str, total_copies: int) -> Optional[str]:
     """
-    Add a new book to the catalog.
-    Implements R1: Book Catalog Management
+    Check book fields against the R1 catalog rules.
     
-    Args:
-        title: Book title (max 200 chars)
-        author: Book author (max 100 chars)
-        isbn: 13-digit ISBN
-        total_copies: Number of copies (positive integer)
-        
     Returns:
-        tuple: (success: bool, message: str)
+        str: error message for the first rule that fails, or None if valid
     """
-    # Input validation
     if not title or not title.strip():
-        return False, "Title is required."
+        return "Title is required."
     
     if len(title.strip()) > 200:
-        return False, "Title must be less than 200 characters."
+        return "Title must be less than 200 characters."
     
     if not author or not author.strip():
-        return False, "Author is required."
+        return "Author is required."
     
     if len(author.strip()) > 100:
-        return False, "Author must be less than 100 characters."
+        return "Author must be less than 100 characters."
     
     if len(isbn) != 13:
-        return False, "ISBN must be exactly 13 digits."
+        return "ISBN must be exactly 13 digits."
     
     if not isinstance(total_copies, int) or total_copies <= 0:
-        return False, "Total copies must be a positive integer."
+        return "Total copies must be a positive integer."
+    
+    return None
+
+def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -> Tuple[bool, str]:
+    """
+    Add a new book to the catalog.
+    Implements R1: Book Catalog Management
+    
+    Args:
+        title: Book title (max 200 chars)
+        author: Book author (max 100 chars)
+        isbn: 13-digit ISBN
+        total_copies: Number of copies (positive integer)
+        
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    # Input validation
+    error = validate_book_fields(title, author, isbn, total_copies)
+    if error:
+        return False, error
     
     # Check for duplicate ISBN
     existing = get_book_by_isbn(isbn)
@@ -53,6 +76,8 @@ def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -
     # Insert new book
     success = insert_book(title.strip(), author.strip(), isbn, total_copies, total_copies)
     if success:
+        if _use_catalog_index():
+            catalog_index.refresh()
         return True, f'Book "{title.strip()}" has been successfully added to the catalog.'
     else:
         return False, "Database error occurred while adding the book."
@@ -73,57 +98,94 @@ def borrow_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
         return False, "Invalid patron ID. Must be exactly 6 digits."
     
-    # Check if book exists and is available
-    book = get_book_by_id(book_id)
-    if not book:
-        return False, "Book not found."
-    
-    if book['available_copies'] <= 0:
-        return False, "This book is currently not available."
-    
-    # Check patron's current borrowed books count
-    current_borrowed = get_patron_borrow_count(patron_id)
-    
-    if current_borrowed >= 5:
-        return False, "You have reached the maximum borrowing limit of 5 books."
-    
-    # Create borrow record
-    borrow_date = datetime.now()
-    due_date = borrow_date + timedelta(days=14)
+    try:
+        # Checks and writes run in one transaction so concurrent borrows
+        # cannot oversell copies or exceed the borrowing limit
+        with unit_of_work():
+            # Check if book exists and is available
+            book = get_book_by_id(book_id)
+            if not book:
+                return False, "Book not found."
+            
+            if book['available_copies'] <= 0:
+                return False, "This book is currently not available."
+            
+            # Check patron's current borrowed books count
+            current_borrowed = get_patron_borrow_count(patron_id)
+            
+            if current_borrowed >= 5:
+                return False, "You have reached the maximum borrowing limit of 5 books."
+            
+            # Create borrow record
+            borrow_date = datetime.now()
+            due_date = borrow_date + timedelta(days=14)
+            
+            # Insert borrow record and update availability
+            borrow_success = insert_borrow_record(patron_id, book_id, borrow_date, due_date)
+            if not borrow_success:
+                raise TransactionAborted("Database error occurred while creating borrow record.")
+            
+            # Guarded decrement: fails instead of going below zero
+            availability_success = update_book_availability(book_id, -1)
+            if not availability_success:
+                raise TransactionAborted("This book is currently not available.")
+    except TransactionAborted as e:
+        return False, str(e)
     
-    # Insert borrow record and update availability
-    borrow_success = insert_borrow_record(patron_id, book_id, borrow_date, due_date)
-    if not borrow_success:
-        return False, "Database error occurred while creating borrow record."
+    return True, f'Successfully borrowed "{book["title"]}". Due date: {due_date.strftime("%Y-%m-%d")}.'
+
+MAX_BATCH_OPERATIONS = 100
+
+def process_circulation_batch(operations: List[Dict]) -> List[Dict]:
+    """
+    Process several borrow/return operations for circulation desks and kiosks.
     
-    availability_success = update_book_availability(book_id, -1)
-    if not availability_success:
-        return False, "Database error occurred while updating book availability."
+    All operations run in one transaction; each one is a savepoint within it,
+    so a failed item does not undo the others. Borrow and return rules (R3/R4),
+    including the 5-book limit, apply exactly as for single requests and see
+    the effect of earlier items in the same batch.
     
-    return True, f'Successfully borrowed "{book["title"]}". Due date: {due_date.strftime("%Y-%m-%d")}.'
+    Args:
+        operations: dicts with 'action' ('borrow' or 'return'), 'patron_id'
+            and 'book_id'
+        
+    Returns:
+        list: one dict per operation with action, patron_id, book_id,
+            success and message
+    """
+    handlers = {'borrow': borrow_book_by_patron, 'return': return_book_by_patron}
+    results: List[Dict] = []
+    for op in operations:
+        op = op if isinstance(op, dict) else {}
+        results.append({'action': op.get('action'), 'patron_id': op.get('patron_id'),
+                        'book_id': op.get('book_id')})
+
+    try:
+        with unit_of_work():
+            for result in results:
+                action, patron_id, book_id = result['action'], result['patron_id'], result['book_id']
+                if action not in handlers:
+                    success, message = False, "Invalid action. Must be 'borrow' or 'return'."
+                elif not isinstance(patron_id, str):
+                    success, message = False, "Invalid patron ID. Must be exactly 6 digits."
+                elif not isinstance(book_id, int) or isinstance(book_id, bool):
+                    success, message = False, "Invalid book ID."
+                else:
+                    # Runs as a savepoint of the batch transaction
+                    success, message = handlers[action](patron_id.strip(), book_id)
+                result.update(success=success, message=message)
+    except TransactionAborted as e:
+        # The whole batch was rolled back
+        for result in results:
+            result.update(success=False, message=str(e))
+    return results
 
 def _get_active_borrow_record(patron_id: str, book_id: int) -> Optional[Dict]:
     """
     Internal helper to fetch the active (unreturned) borrow record for a patron/book.
     Returns None if no such record exists.
     """
-    try:
-        from database import get_db_connection
-    except ImportError:
-        return None
-
-    conn = get_db_connection()
-    row = conn.execute(
-        """
-        SELECT br.*, b.title, b.author
-        FROM borrow_records br
-        JOIN books b ON b.id = br.book_id
-        WHERE br.patron_id = ? AND br.book_id = ? AND br.return_date IS NULL
-        """,
-        (patron_id, book_id)
-    ).fetchone()
-    conn.close()
-    return dict(row) if row else None
+    return get_active_borrow_record(patron_id, book_id)
 
 
 def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
@@ -137,29 +199,35 @@ def return_book_by_patron(patron_id: str, book_id: int) -> Tuple[bool, str]:
     if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
         return False, "Invalid patron ID. Must be exactly 6 digits."
 
-    book = get_book_by_id(book_id)
-    if not book:
-        return False, "Book not found."
-
-    # Find active borrow record
-    active = _get_active_borrow_record(patron_id, book_id)
-    if not active:
-        return False, "Book not borrowed by this patron."
-
-    # Compute fee before mutating state
-    fee_info = calculate_late_fee_for_book(patron_id, book_id)
-    fee_amount = fee_info.get('fee_amount', 0.0)
-    days_overdue = fee_info.get('days_overdue', 0)
-
-    # Record return and update availability
-    now = datetime.now()
-    if not update_borrow_record_return_date(patron_id, book_id, now):
-        return False, "Database error occurred while updating return record."
-
-    # Only increment availability if it won't exceed total copies
-    if book['available_copies'] < book['total_copies']:
-        if not update_book_availability(book_id, +1):
-            return False, "Database error occurred while updating book availability."
+    try:
+        # Lookups and writes share one transaction so a copy is only
+        # returned once even under concurrent requests
+        with unit_of_work():
+            book = get_book_by_id(book_id)
+            if not book:
+                return False, "Book not found."
+
+            # Find active borrow record
+            active = _get_active_borrow_record(patron_id, book_id)
+            if not active:
+                return False, "Book not borrowed by this patron."
+
+            # Compute fee before mutating state
+            fee_info = calculate_late_fee_for_book(patron_id, book_id)
+            fee_amount = fee_info.get('fee_amount', 0.0)
+            days_overdue = fee_info.get('days_overdue', 0)
+
+            # Record return and update availability
+            now = datetime.now()
+            if not update_borrow_record_return_date(patron_id, book_id, now):
+                raise TransactionAborted("Database error occurred while updating return record.")
+
+            # Only increment availability if it won't exceed total copies
+            if book['available_copies'] < book['total_copies']:
+                if not update_book_availability(book_id, +1):
+                    raise TransactionAborted("Database error occurred while updating book availability.")
+    except TransactionAborted as e:
+        return False, str(e)
 
     title = book['title']
     if days_overdue > 0 and fee_amount > 0:
@@ -198,7 +266,13 @@ def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
     except Exception:
         return {'fee_amount': 0.00, 'days_overdue': 0, 'status': 'Invalid due date format'}
 
-    today = datetime.now()
+    return _compute_late_fee(due_date, datetime.now())
+
+def _compute_late_fee(due_date: datetime, today: datetime) -> Dict:
+    """
+    Compute the R5 late fee for a loan due on due_date, as of today:
+    $0.50/day for the first 7 days overdue, then $1.00/day, capped at $15.00.
+    """
     days_overdue = max(0, (today.date() - due_date.date()).days)
 
     if days_overdue <= 0:
@@ -213,11 +287,19 @@ def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
 
     return {'fee_amount': fee, 'days_overdue': days_overdue, 'status': 'Overdue'}
 
-def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
+def search_books_in_catalog(search_term: str, search_type: str,
+                            limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
     """
     Search for books in the catalog.
+    Implements R6: partial, case-insensitive title/author matches and exact
+    ISBN matches. Title/author searches use the in-memory trigram index once
+    it has been built, otherwise the full-text index (best matches first).
     
-    TODO: Implement R6 as per requirements
+    Args:
+        search_term: Text to search for
+        search_type: 'title', 'author' or 'isbn'
+        limit: Maximum number of results (None for all)
+        offset: Number of results to skip
     """
     if not isinstance(search_term, str) or not search_term.strip():
         return []
@@ -225,22 +307,19 @@ def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
     stype = (search_type or '').strip().lower()
     term = search_term.strip().lower()
 
-    books = get_all_books()
-    results: List[Dict] = []
-
     if stype in ('title', 'author'):
-        key = 'title' if stype == 'title' else 'author'
-        for b in books:
-            value = (b.get(key) or '').lower()
-            if term in value:
-                results.append(b)
+        if _use_catalog_index():
+            # In-memory trigram index: exact substring semantics, ordered by title
+            catalog_index.refresh()
+            return get_books_by_ids(catalog_index.search(term, stype, limit, offset))
+        return search_books(term, stype, limit, offset)
 
     elif stype == 'isbn':
-        # Exact match for 13-digit ISBN
+        # Exact match for 13-digit ISBN, looked up through the UNIQUE index
         if term.isdigit() and len(term) == 13:
-            for b in books:
-                if (b.get('isbn') or '').lower() == term:
-                    results.append(b)
+            book = get_book_by_isbn(term)
+            results = [book] if book else []
+            return results[offset:] if limit is None else results[offset:offset + limit]
         else:
             # If an invalid ISBN is searched, return no results per spec
             return []
@@ -249,30 +328,51 @@ def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
         # Unknown search type: return empty per spec
         return []
 
-    return results
+CATALOG_PAGE_SIZE = 50
+MAX_CATALOG_PAGE_SIZE = 200
+
+def _encode_catalog_cursor(book: Dict) -> str:
+    """Encode the (title, id) key of a book as an opaque URL-safe cursor."""
+    raw = json.dumps([book['title'], book['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def _decode_catalog_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a cursor from _encode_catalog_cursor; raises ValueError if malformed."""
+    try:
+        title, book_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid page cursor.")
+    if not isinstance(title, str) or not isinstance(book_id, int):
+        raise ValueError("Invalid page cursor.")
+    return title, book_id
+
+def get_catalog_page(cursor: Optional[str] = None, limit: int = CATALOG_PAGE_SIZE) -> Dict:
+    """
+    Get one page of the catalog ordered by title (R2), using keyset pagination.
+    
+    Args:
+        cursor: next_cursor from the previous page, or None for the first page
+        limit: page size, clamped to 1..MAX_CATALOG_PAGE_SIZE
+        
+    Returns:
+        dict: {'books': list, 'next_cursor': str or None}
+        
+    Raises:
+        ValueError: if cursor is malformed
+    """
+    limit = max(1, min(limit, MAX_CATALOG_PAGE_SIZE))
+    after = _decode_catalog_cursor(cursor) if cursor else None
+    # Fetch one extra row to know whether another page follows
+    books = get_books_page(after, limit + 1)
+    next_cursor = _encode_catalog_cursor(books[limit - 1]) if len(books) > limit else None
+    return {'books': books[:limit], 'next_cursor': next_cursor}
 
 def _fetch_patron_history(patron_id: str) -> List[Dict]:
     """
     Helper to fetch full borrow history for a patron.
     """
-    if get_db_connection is None:
-        return []
-
-    conn = get_db_connection()
-    rows = conn.execute(
-        """
-        SELECT br.*, b.title, b.author
-        FROM borrow_records br
-        JOIN books b ON b.id = br.book_id
-        WHERE br.patron_id = ?
-        ORDER BY datetime(br.borrow_date) ASC
-        """,
-        (patron_id,)
-    ).fetchall()
-    conn.close()
-
     history: List[Dict] = []
-    for r in rows:
+    for r in get_patron_loans(patron_id):
         history.append({
             'book_id': r['book_id'],
             'title': r['title'],
@@ -295,36 +395,43 @@ def get_patron_status_report(patron_id: str) -> Dict:
             'error': 'Invalid patron ID. Must be exactly 6 digits.'
         }
 
-    # Current borrows (with is_overdue flags) using DB helper from database.py
-    # Note: get_patron_borrowed_books returns parsed datetimes and an 'is_overdue' boolean
-    from database import get_patron_borrowed_books  # local import to avoid cycle at top
-    current = get_patron_borrowed_books(patron_id)
+    # Current loans, counts, fees and history all come from one query;
+    # fees are computed in memory instead of one lookup per overdue book
+    loans = get_patron_loans(patron_id)
+    now = datetime.now()
 
-    # Compute per-item late fees for currently borrowed books only
+    current_display = []
+    history: List[Dict] = []
     total_late_fees = 0.0
-    for item in current:
-        if item.get('is_overdue'):
-            lf = calculate_late_fee_for_book(patron_id, item['book_id'])
-            total_late_fees += float(lf.get('fee_amount', 0.0))
+    for loan in loans:
+        history.append({
+            'book_id': loan['book_id'],
+            'title': loan['title'],
+            'author': loan['author'],
+            'borrow_date': loan['borrow_date'],
+            'due_date': loan['due_date'],
+            'return_date': loan['return_date'],
+        })
+        if loan['return_date'] is not None:
+            continue
+
+        # Shape a clean current list for display
+        due_date = datetime.fromisoformat(loan['due_date'])
+        is_overdue = now > due_date
+        if is_overdue:
+            total_late_fees += _compute_late_fee(due_date, now)['fee_amount']
+        current_display.append({
+            'book_id': loan['book_id'],
+            'title': loan['title'],
+            'author': loan['author'],
+            'borrow_date': datetime.fromisoformat(loan['borrow_date']).isoformat(),
+            'due_date': due_date.isoformat(),
+            'is_overdue': is_overdue,
+        })
     total_late_fees = round(total_late_fees + 1e-9, 2)
 
     # Count currently borrowed
-    borrow_count = get_patron_borrow_count(patron_id)
-
-    # Full history (returned + current)
-    history = _fetch_patron_history(patron_id)
-
-    # Shape a clean current list for display
-    current_display = []
-    for item in current:
-        current_display.append({
-            'book_id': item['book_id'],
-            'title': item['title'],
-            'author': item['author'],
-            'borrow_date': item['borrow_date'].isoformat(),
-            'due_date': item['due_date'].isoformat(),
-            'is_overdue': bool(item['is_overdue']),
-        })
+    borrow_count = len(current_display)
 
     return {
         'patron_id': patron_id,
@@ -0,0 +1,72 @@
+"""
+Loan Export Module - Streaming export of borrow records as NDJSON or CSV
+Rows are read and encoded one batch at a time, for analytics pulls of the full history
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from database import LOAN_EXPORT_COLUMNS, iter_borrow_records
+from timestamps import to_epoch
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+
+
+def parse_day(value: Optional[str]) -> Optional[int]:
+    """Turn a YYYY-MM-DD date into epoch seconds at midnight, or None if not given."""
+    if not value:
+        return None
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}'; use YYYY-MM-DD.")
+    return to_epoch(datetime(day.year, day.month, day.day))
+
+
+def _ndjson_chunks(batches) -> Iterator[str]:
+    for batch in batches:
+        yield ''.join(json.dumps(dict(zip(LOAN_EXPORT_COLUMNS, row)), separators=(',', ':')) + '\n'
+                      for row in batch)
+
+
+def _csv_chunks(batches) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(LOAN_EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_loans(fmt: str = 'ndjson', patron_id: Optional[str] = None, since: Optional[str] = None,
+                 until: Optional[str] = None, batch_size: int = BATCH_SIZE) -> Iterator[str]:
+    """
+    Export borrow records, optionally for one patron and/or borrowed in
+    [since, until) (YYYY-MM-DD), as text chunks of one batch each.
+
+    Arguments are checked before this returns, so a ValueError can be
+    reported before any output; the database is read lazily as the
+    chunks are consumed.
+
+    Raises:
+        ValueError: for an unknown format, a bad date or batch size
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise ValueError(f"Batch size must be between 1 and {MAX_BATCH_SIZE}.")
+    batches = iter_borrow_records(patron_id, parse_day(since), parse_day(until), batch_size)
+    return _ndjson_chunks(batches) if fmt == 'ndjson' else _csv_chunks(batches)
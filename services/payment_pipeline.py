@@ -0,0 +1,131 @@
+"""
+Payment Pipeline Module - Settles all of a patron's late fees concurrently
+Gateway calls run on a bounded thread pool with per-call timeouts and retries
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List
+
+from repository import get_patron_loans
+from services.library_service import _compute_late_fee
+from services.payment_service import PaymentGateway
+
+MAX_WORKERS = 4
+CALL_TIMEOUT = 5.0
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.2
+
+# Gateway errors worth another attempt; anything else (e.g. ValueError) is final
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+
+def get_outstanding_fees(patron_id: str) -> List[Dict]:
+    """Get the R5 late fee owed on each of a patron's overdue, unreturned books."""
+    now = datetime.now()
+    fees = []
+    for loan in get_patron_loans(patron_id):
+        if loan['return_date'] is not None:
+            continue
+        try:
+            due_date = datetime.fromisoformat(loan['due_date'])
+        except ValueError:
+            continue  # Unparseable due dates owe nothing, as in calculate_late_fee_for_book
+        amount = _compute_late_fee(due_date, now)['fee_amount']
+        if amount > 0:
+            fees.append({'book_id': loan['book_id'], 'title': loan['title'], 'amount': amount})
+    return fees
+
+
+def _settle_one(calls: ThreadPoolExecutor, gateway: PaymentGateway, patron_id: str, fee: Dict,
+                timeout: float, retries: int, backoff: float) -> Dict:
+    """Pay one book's fee, retrying transient gateway errors with exponential backoff."""
+    result = dict(fee, success=False, transaction_id=None, attempts=0)
+    for attempt in range(retries + 1):
+        result['attempts'] = attempt + 1
+        call = calls.submit(gateway.process_payment, patron_id, fee['amount'])
+        # Wait rather than result(timeout=...): on Python 3.11+ the latter's
+        # TimeoutError is also what a gateway raises for its own timeouts
+        if not wait([call], timeout=timeout).done:
+            if not call.cancel():
+                # The charge may still go through, so a timed-out call is never retried
+                result.update(status='timeout', message=f"Payment timed out after {timeout:g}s.")
+                return result
+            # Never started, so nothing was charged: safe to try again
+            result.update(status='failed', message="Payment failed: gateway call was not started.")
+            if attempt < retries:
+                time.sleep(backoff * (2 ** attempt))
+            continue
+        try:
+            response = call.result()
+        except TRANSIENT_ERRORS as e:
+            result.update(status='failed', message=f"Payment failed: {str(e)}")
+            if attempt < retries:
+                time.sleep(backoff * (2 ** attempt))
+            continue
+        except Exception as e:
+            result.update(status='failed', message=f"Payment failed: {str(e)}")
+            return result
+
+        if response.get('status') == 'success':
+            result.update(success=True, status='paid', transaction_id=response.get('transaction_id'),
+                          message=f"Late fee of ${fee['amount']:.2f} paid successfully.")
+        else:
+            reason = response.get('reason', 'Unknown error')
+            result.update(status='declined', message=f"Payment declined: {reason}")
+        return result
+    return result
+
+
+def settle_patron_fees(patron_id: str, payment_gateway: PaymentGateway,
+                       max_workers: int = MAX_WORKERS, timeout: float = CALL_TIMEOUT,
+                       retries: int = MAX_RETRIES, backoff: float = RETRY_BACKOFF) -> Dict:
+    """
+    Pay every outstanding late fee for a patron, one gateway call per book,
+    with up to max_workers calls in flight.
+
+    Each call is abandoned after timeout seconds and reported as 'timeout'
+    without a retry, since the gateway may still complete the charge; a
+    call that never started is cancelled and counts as a transient error.
+    Transient errors (connection failures and the like) are retried up to
+    retries times, waiting backoff, 2*backoff, ... seconds between attempts.
+    Declines and other errors are final.
+
+    Returns:
+        dict: {'success': bool, 'message': str, 'total_paid': float, 'results': list}
+            where each result has book_id, title, amount, success, status
+            ('paid', 'declined', 'failed' or 'timeout'), transaction_id,
+            attempts and message, in borrow order
+    """
+    if not patron_id or not patron_id.isdigit() or len(patron_id) != 6:
+        return {'success': False, 'message': 'Invalid patron ID.', 'total_paid': 0.0, 'results': []}
+
+    fees = get_outstanding_fees(patron_id)
+    if not fees:
+        return {'success': False, 'message': 'No late fees to pay.', 'total_paid': 0.0, 'results': []}
+
+    workers = max(1, min(max_workers, len(fees)))
+    # A book stops at its first timed-out call, so with a thread per book no
+    # call ever waits behind an abandoned one and each timeout covers only
+    # the call itself; at most `workers` calls are live at once
+    calls = ThreadPoolExecutor(max_workers=len(fees), thread_name_prefix='payment-call')
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='payment') as books:
+            futures = [
+                books.submit(_settle_one, calls, payment_gateway, patron_id, fee, timeout, retries, backoff)
+                for fee in fees
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        # Don't wait on gateway calls that already timed out
+        calls.shutdown(wait=False)
+
+    paid = [r for r in results if r['success']]
+    total_paid = round(sum(r['amount'] for r in paid) + 1e-9, 2)
+    return {
+        'success': len(paid) == len(results),
+        'message': f"Paid {len(paid)} of {len(results)} late fees (${total_paid:.2f}).",
+        'total_paid': total_paid,
+        'results': results,
+    }
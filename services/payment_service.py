@@ -1,10 +1,16 @@
 import random
+import time
 
 class PaymentGateway:
-   
 
-    def process_payment(self, amount: float) -> dict:
-        #Simulate processing a payment for the given amount.
+    def __init__(self, latency: float = 0.0):
+        # Seconds each call takes, to simulate a slow remote gateway
+        self.latency = latency
+
+    def process_payment(self, patron_id: str, amount: float) -> dict:
+        #Simulate charging a patron the given amount.
+        if self.latency:
+            time.sleep(self.latency)
         if amount <= 0:
             raise ValueError("Invalid payment amount.")
 
@@ -14,8 +20,10 @@ class PaymentGateway:
         else:
             return {"status": "declined", "reason": "Insufficient funds"}
 
-    def refund_payment(self, amount: float) -> dict:
-        #Simulate refunding a payment for the given amount.
+    def refund_payment(self, transaction_id: str, amount: float) -> dict:
+        #Simulate refunding the given amount of a transaction.
+        if self.latency:
+            time.sleep(self.latency)
         if amount <= 0:
             raise ValueError("Invalid refund amount.")
 
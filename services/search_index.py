@@ -0,0 +1,166 @@
+"""
+Search Index Module - In-memory trigram index for catalog search
+Answers partial title/author searches without scanning the books table
+"""
+
+import heapq
+import threading
+from array import array
+from bisect import insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from database import get_read_connection
+
+FIELDS = ('title', 'author')
+
+
+def _trigrams(text: str) -> set:
+    """Get the distinct 3-character substrings of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    In-memory inverted index from lower-cased trigrams to book IDs.
+
+    Posting lists are sorted arrays of book IDs. A search takes the
+    posting lists of every trigram in the term, starts from the shortest
+    one and confirms each candidate with the same `term in value` check
+    the catalog search has always used, so results are exact. Terms
+    shorter than three characters are checked against every indexed
+    value in memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, array]] = {f: {} for f in FIELDS}
+        self._values: Dict[str, Dict[int, str]] = {f: {} for f in FIELDS}
+        self._titles: Dict[int, str] = {}
+        self._max_id = 0
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def _add(self, book_id: int, title: str, author: str):
+        if book_id in self._titles:
+            self._remove(book_id)
+        self._titles[book_id] = title
+        for field, value in (('title', title), ('author', author)):
+            value = (value or '').lower()
+            self._values[field][book_id] = value
+            postings = self._postings[field]
+            for gram in _trigrams(value):
+                ids = postings.get(gram)
+                if ids is None:
+                    postings[gram] = array('q', [book_id])
+                elif book_id > ids[-1]:
+                    ids.append(book_id)  # IDs usually arrive in ascending order
+                else:
+                    insort(ids, book_id)
+        self._max_id = max(self._max_id, book_id)
+
+    def _remove(self, book_id: int):
+        for field in FIELDS:
+            value = self._values[field].pop(book_id, None)
+            if value is None:
+                continue
+            postings = self._postings[field]
+            for gram in _trigrams(value):
+                ids = postings.get(gram)
+                if ids is not None and book_id in ids:
+                    ids.remove(book_id)
+                    if not ids:
+                        del postings[gram]
+        self._titles.pop(book_id, None)
+
+    def add(self, book_id: int, title: str, author: str):
+        """Add or replace one book in the index."""
+        with self._lock:
+            self._add(book_id, title, author)
+
+    def remove(self, book_id: int):
+        """Remove one book from the index."""
+        with self._lock:
+            self._remove(book_id)
+
+    def add_many(self, rows: Iterable[Tuple[int, str, str]]):
+        """Add (id, title, author) rows to the index."""
+        with self._lock:
+            for book_id, title, author in rows:
+                self._add(book_id, title, author)
+
+    def build(self):
+        """(Re)build the index from the books table."""
+        conn = get_read_connection()
+        try:
+            cursor = conn.execute('SELECT id, title, author FROM books ORDER BY id')
+            with self._lock:
+                self._postings = {f: {} for f in FIELDS}
+                self._values = {f: {} for f in FIELDS}
+                self._titles = {}
+                self._max_id = 0
+                for book_id, title, author in cursor:
+                    self._add(book_id, title, author)
+                self.ready = True
+        finally:
+            conn.close()
+
+    def build_in_background(self) -> threading.Thread:
+        """
+        Build the index on a daemon thread. Searches go to SQLite until it
+        is ready, and pick up books added meanwhile on their first refresh().
+        """
+        thread = threading.Thread(target=self.build, name='catalog-index-build', daemon=True)
+        thread.start()
+        return thread
+
+    def refresh(self):
+        """
+        Pick up books inserted since the index was last updated, including
+        rows written by other processes or by bulk loads.
+        """
+        conn = get_read_connection()
+        try:
+            rows = conn.execute(
+                'SELECT id, title, author FROM books WHERE id > ? ORDER BY id',
+                (self._max_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        if rows:
+            self.add_many(tuple(row) for row in rows)
+
+    def search(self, term: str, field: str, limit: Optional[int] = None, offset: int = 0) -> List[int]:
+        """
+        Get IDs of books whose field contains term (case-insensitive),
+        ordered by title then ID.
+        """
+        if field not in FIELDS:
+            raise ValueError(f"Unsupported search field: {field}")
+        term = term.lower()
+        with self._lock:
+            values = self._values[field]
+            grams = _trigrams(term)
+            if grams:
+                postings = self._postings[field]
+                lists = []
+                for gram in grams:
+                    ids = postings.get(gram)
+                    if ids is None:
+                        return []
+                    lists.append(ids)
+                candidates = min(lists, key=len)
+            else:
+                candidates = values.keys()
+            matches = [book_id for book_id in candidates if term in values[book_id]]
+            titles = self._titles
+            sort_key = lambda book_id: (titles[book_id], book_id)
+            if limit is None:
+                return sorted(matches, key=sort_key)[offset:]
+            # Only the requested page needs ordering
+            return heapq.nsmallest(offset + limit, matches, key=sort_key)[offset:]
+
+
+# Shared index for the running application, built (or started) by create_app()
+catalog_index = TrigramIndex()
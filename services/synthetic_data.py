@@ -0,0 +1,174 @@
+"""
+Synthetic Data Module - Deterministic, production-sized library data
+Generates a catalog and borrow history from a seed, for profiling and benchmarks
+"""
+
+import random
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from database import bulk_load, get_read_connection, unit_of_work
+from timestamps import to_epoch
+
+BATCH_SIZE = 50000
+LOAN_DAYS = 14
+MAX_ACTIVE_LOANS = 5
+MAX_PATRONS = 900000  # 6-digit patron IDs from 100000
+HISTORY_DAYS = 3 * 365
+DEFAULT_MIX = {'returned': 0.80, 'active': 0.12, 'overdue': 0.08}
+
+SYLLABLES = ("ka ri mo len ta vor in el an sha dor ith ul mer gra bel fen "
+             "tor ous ric ald win hal cor nes pra lin ost vey dun mar sil").split()
+TITLE_PATTERNS = ("{0}", "The {0}", "{0} {1}", "The {0} of {1}", "{0} and {1}",
+                  "A {0} for {1}", "{0} {1} {2}", "Return to {0}")
+
+
+def isbn13(body: str) -> str:
+    """Append the ISBN-13 check digit to a 12-digit body."""
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def _words(rng: random.Random, count: int) -> List[str]:
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+            for _ in range(count)]
+
+
+def zipf_cum_weights(n: int, exponent: float = 1.0) -> List[float]:
+    """Cumulative Zipf weights for ranks 1..n, sampled by bisecting a uniform draw."""
+    return list(accumulate(1.0 / rank ** exponent for rank in range(1, n + 1)))
+
+
+class LibraryGenerator:
+    """
+    Seeded generator for books and borrow records.
+
+    The same seed, sizes and as_of date always produce the same rows.
+    Book popularity follows a Zipf distribution over a shuffled ranking,
+    so a few titles account for most loans. Each loan is returned,
+    active (due after as_of) or overdue (due before as_of) according to
+    mix. Active and overdue loans respect each book's copies and the
+    five-book patron limit; loans that would break them are returned ones.
+    """
+
+    def __init__(self, books: int, patrons: int, loans: int, seed: int = 42,
+                 as_of: Optional[datetime] = None, zipf_exponent: float = 1.0,
+                 mix: Optional[Dict[str, float]] = None):
+        self.books = books
+        self.patrons = patrons
+        self.loans = loans
+        self.seed = seed
+        self.as_of = as_of or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.zipf_exponent = zipf_exponent
+        self.mix = dict(DEFAULT_MIX, **(mix or {}))
+        self.rng = random.Random(seed)
+        self.copies = [self.rng.choice((1, 1, 2, 2, 3, 4, 5)) for _ in range(books)]
+        self.active_per_book = [0] * books
+        self.active_per_patron = [0] * patrons
+
+    def book_rows(self) -> Iterator[Tuple[int, str, str, str, int, int]]:
+        """
+        Yield (id, title, author, isbn, total_copies, available_copies) rows.
+        Availability reflects the active loans, so run loan_rows() first.
+        """
+        rng = random.Random(self.seed + 1)
+        words, names = _words(rng, 20000), _words(rng, 5000)
+        # An affine map over 9-digit bodies gives unique, scattered ISBNs
+        step, offset = 7654321, rng.randrange(10 ** 9)
+        for n in range(self.books):
+            title = rng.choice(TITLE_PATTERNS).format(*(rng.choice(words) for _ in range(3)))
+            author = f"{rng.choice(names)} {rng.choice(names)}"
+            isbn = isbn13(f"978{(n * step + offset) % 10 ** 9:09d}")
+            yield n + 1, title, author, isbn, self.copies[n], self.copies[n] - self.active_per_book[n]
+
+    def loan_rows(self) -> Iterator[Tuple]:
+        """Yield borrow_records rows, including their *_ts columns."""
+        rng = self.rng
+        ranking = list(range(1, self.books + 1))
+        rng.shuffle(ranking)
+        cum_weights = zipf_cum_weights(self.books, self.zipf_exponent)
+        total_weight = cum_weights[-1]
+        statuses = list(self.mix)
+        status_weights = list(accumulate(self.mix[s] for s in statuses))
+        as_of = self.as_of
+        day = 86400
+
+        for _ in range(self.loans):
+            book_id = ranking[bisect_left(cum_weights, rng.random() * total_weight)]
+            patron = rng.randrange(self.patrons)
+            status = statuses[bisect_left(status_weights, rng.random() * status_weights[-1])]
+            if status != 'returned':
+                book = book_id - 1
+                if (self.active_per_book[book] < self.copies[book]
+                        and self.active_per_patron[patron] < MAX_ACTIVE_LOANS):
+                    self.active_per_book[book] += 1
+                    self.active_per_patron[patron] += 1
+                else:
+                    status = 'returned'
+
+            if status == 'active':
+                borrowed = as_of - timedelta(seconds=rng.randrange(LOAN_DAYS * day))
+            elif status == 'overdue':
+                borrowed = as_of - timedelta(days=LOAN_DAYS + 1, seconds=rng.randrange(60 * day))
+            else:
+                borrowed = as_of - timedelta(days=LOAN_DAYS, seconds=rng.randrange(HISTORY_DAYS * day))
+            due = borrowed + timedelta(days=LOAN_DAYS)
+            returned = None
+            if status == 'returned':
+                # Mostly on time, with a tail of late returns
+                kept_days = rng.randint(1, LOAN_DAYS) if rng.random() < 0.85 else rng.randint(LOAN_DAYS + 1, 45)
+                returned = min(as_of, borrowed + timedelta(days=kept_days, seconds=rng.randrange(day)))
+            yield (str(100000 + patron), book_id, borrowed.isoformat(), due.isoformat(),
+                   returned.isoformat() if returned else None,
+                   to_epoch(borrowed), to_epoch(due), to_epoch(returned) if returned else None)
+
+
+def _batches(rows: Iterator, size: int) -> Iterator[List]:
+    while True:
+        batch = [row for _, row in zip(range(size), rows)]
+        if not batch:
+            return
+        yield batch
+
+
+def generate_library(books: int, patrons: int, loans: int, seed: int = 42,
+                     as_of: Optional[datetime] = None, zipf_exponent: float = 1.0,
+                     mix: Optional[Dict[str, float]] = None, batch_size: int = BATCH_SIZE) -> Dict:
+    """
+    Fill an empty database with a generated catalog and borrow history.
+
+    Rows are written batch_size at a time, one transaction per batch, with
+    triggers and secondary indexes suspended (see database.bulk_load).
+
+    Returns:
+        dict: {'books': int, 'loans': int, 'active': int}
+    """
+    conn = get_read_connection()
+    existing = conn.execute('''
+        SELECT EXISTS (SELECT 1 FROM books) OR EXISTS (SELECT 1 FROM borrow_records)
+    ''').fetchone()[0]
+    conn.close()
+    if existing:
+        raise ValueError("The database already has data; generate into an empty database.")
+    if books < 1 or not 1 <= patrons <= MAX_PATRONS or loans < 0:
+        raise ValueError(f"Need at least one book, 1 to {MAX_PATRONS} patrons and no negative loan count.")
+
+    generator = LibraryGenerator(books, patrons, loans, seed, as_of, zipf_exponent, mix)
+    with bulk_load():
+        # Loans first, so book availability can account for active loans
+        for batch in _batches(generator.loan_rows(), batch_size):
+            with unit_of_work() as conn:
+                conn.executemany('''
+                    INSERT INTO borrow_records
+                        (patron_id, book_id, borrow_date, due_date, return_date, borrow_ts, due_ts, return_ts)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', batch)
+        for batch in _batches(generator.book_rows(), batch_size):
+            with unit_of_work() as conn:
+                conn.executemany('''
+                    INSERT INTO books (id, title, author, isbn, total_copies, available_copies)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', batch)
+    return {'books': books, 'loans': loans, 'active': sum(generator.active_per_book)}
@@ -0,0 +1,150 @@
+"""
+Slow query log for Library Management System
+Records statements that run past a threshold, with their parameter shape,
+duration and query plan, in a rotating JSON-lines file
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Configuration; change with configure()
+THRESHOLD = 0.1                    # seconds; None disables the log
+LOG_FILE = 'slow_queries.log'
+MAX_BYTES = 5 * 1024 * 1024        # rotate after this many bytes
+BACKUP_COUNT = 5                   # rotated files to keep
+
+# Statements worth an EXPLAIN QUERY PLAN
+_EXPLAINABLE = ('select', 'insert', 'update', 'delete', 'with', 'replace')
+
+_logger = logging.getLogger('library.slow_queries')
+_logger.propagate = False
+_handler: Optional[RotatingFileHandler] = None
+
+
+def configure(threshold: Optional[float] = THRESHOLD, log_file: str = LOG_FILE,
+              max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT):
+    """Set the threshold (seconds, or None to disable) and the log file rotation."""
+    global THRESHOLD, LOG_FILE, MAX_BYTES, BACKUP_COUNT, _handler
+    THRESHOLD, LOG_FILE, MAX_BYTES, BACKUP_COUNT = threshold, log_file, max_bytes, backup_count
+    if _handler is not None:
+        _logger.removeHandler(_handler)
+        _handler.close()
+        _handler = None
+
+
+def _get_handler() -> RotatingFileHandler:
+    global _handler
+    if _handler is None:
+        # Opened on the first slow query, so runs without any don't create the file
+        _handler = RotatingFileHandler(LOG_FILE, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                       encoding='utf-8', delay=True)
+        _handler.setFormatter(logging.Formatter('%(message)s'))
+        _logger.addHandler(_handler)
+        _logger.setLevel(logging.INFO)
+    return _handler
+
+
+def parameter_shape(parameters) -> object:
+    """Describe parameters by type (never value), e.g. ['str', 'int'] or {'id': 'int'}."""
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    try:
+        return [type(value).__name__ for value in parameters]
+    except TypeError:
+        return type(parameters).__name__
+
+
+def explain(conn: sqlite3.Connection, sql: str, parameters) -> Optional[List[str]]:
+    """Get the EXPLAIN QUERY PLAN detail lines, or None if the statement can't be explained."""
+    words = sql.split(None, 1)
+    if not words or words[0].lower() not in _EXPLAINABLE or parameters is None:
+        return None
+    try:
+        # The base class method, so the plan query isn't itself timed or logged
+        rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+    except sqlite3.Error:
+        return None
+    return [row[-1] for row in rows]
+
+
+def record(conn: sqlite3.Connection, sql: str, parameters, seconds: float, many: bool = False):
+    """
+    Log one slow statement. For executemany() calls the parameters are not
+    kept (the iterable has been consumed) and no plan is captured.
+    """
+    _get_handler()
+    entry = {
+        'ts': round(time.time(), 3),
+        'ms': round(seconds * 1000, 3),
+        'sql': ' '.join(sql.split()),
+        'params': 'executemany' if many else parameter_shape(parameters),
+        'plan': None if many else explain(conn, sql, parameters),
+    }
+    _logger.info(json.dumps(entry))
+
+
+def log_files(log_file: Optional[str] = None) -> List[str]:
+    """The log file and its rotated backups, oldest first."""
+    log_file = log_file or LOG_FILE
+    backups = [path for path in glob.glob(glob.escape(log_file) + '.*')
+               if path.rsplit('.', 1)[-1].isdigit()]
+    backups.sort(key=lambda path: int(path.rsplit('.', 1)[-1]), reverse=True)
+    return backups + ([log_file] if os.path.exists(log_file) else [])
+
+
+def read_entries(paths: Iterable[str]) -> Iterator[Dict]:
+    """Yield the logged entries from each file, skipping lines that aren't valid JSON."""
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def fingerprint(sql: str) -> str:
+    """Normalise a statement so variable-length IN (?, ?, ...) lists group together."""
+    return re.sub(r'\?(\s*,\s*\?)+', '?, ...', ' '.join(sql.split()))
+
+
+def is_full_scan(plan: Optional[List[str]]) -> bool:
+    return any(detail.startswith('SCAN ') and 'USING' not in detail for detail in plan or ())
+
+
+def summarize(entries: Iterable[Dict]) -> List[Dict]:
+    """
+    Group entries by statement and rank them by total time.
+
+    Returns:
+        list: dicts with sql, count, total_ms, mean_ms, max_ms, params,
+            plan (from the slowest run) and full_scan, slowest total first
+    """
+    groups: Dict[str, Dict] = {}
+    for entry in entries:
+        key = fingerprint(entry.get('sql', ''))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {'sql': key, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                   'params': entry.get('params'), 'plan': entry.get('plan')}
+        ms = entry.get('ms', 0.0)
+        group['count'] += 1
+        group['total_ms'] += ms
+        if ms >= group['max_ms']:
+            group['max_ms'] = ms
+            group['plan'] = entry.get('plan') or group['plan']
+    ranked = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+    for group in ranked:
+        group['total_ms'] = round(group['total_ms'], 3)
+        group['mean_ms'] = round(group['total_ms'] / group['count'], 3)
+        group['full_scan'] = is_full_scan(group['plan'])
+    return ranked
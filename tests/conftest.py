@@ -0,0 +1,22 @@
+import pytest
+import database as db
+import repository
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    # Point the database module at a fresh, empty database file for one test.
+    path = str(tmp_path / "library.db")
+    monkeypatch.setattr(db, "DATABASE", path)
+    db.init_database()
+    yield path
+    db.close_all_connections()
+
+
+@pytest.fixture
+def memory_store():
+    # Run the service layer against a fresh in-memory repository for one test.
+    store = repository.InMemoryRepository()
+    previous = repository.set_repository(store)
+    yield store
+    repository.set_repository(previous)
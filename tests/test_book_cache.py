@@ -0,0 +1,124 @@
+import threading
+
+import database as db
+
+
+def _counts():
+    stats = db.get_cache_stats()
+    return stats["hits"], stats["misses"]
+
+
+def test_repeat_lookup_is_a_cache_hit(temp_db):
+    db.insert_book("Cached", "Author", "9780000000031", 2, 2)
+    book_id = db.get_book_by_isbn("9780000000031")["id"]
+    hits, misses = _counts()
+    assert db.get_book_by_id(book_id)["title"] == "Cached"
+    assert _counts() == (hits + 1, misses)
+
+
+def test_cached_rows_are_copies(temp_db):
+    # Callers mutating a returned dict must not corrupt the cache.
+    db.insert_book("Cached", "Author", "9780000000032", 2, 2)
+    book = db.get_book_by_isbn("9780000000032")
+    book["title"] = "changed"
+    assert db.get_book_by_id(book["id"])["title"] == "Cached"
+
+
+def test_availability_update_invalidates(temp_db):
+    db.insert_book("Cached", "Author", "9780000000033", 2, 2)
+    book = db.get_book_by_isbn("9780000000033")
+    db.get_all_books()
+    assert db.update_book_availability(book["id"], -1)
+    assert db.get_book_by_id(book["id"])["available_copies"] == 1
+    assert db.get_all_books()[0]["available_copies"] == 1
+
+
+def test_insert_invalidates_catalog_listing(temp_db):
+    assert db.get_all_books() == []
+    db.insert_book("New", "Author", "9780000000034", 1, 1)
+    assert [b["title"] for b in db.get_all_books()] == ["New"]
+
+
+def test_missing_isbn_is_not_cached(temp_db):
+    # A negative lookup must not hide a book added afterwards.
+    assert db.get_book_by_isbn("9780000000035") is None
+    db.insert_book("Later", "Author", "9780000000035", 1, 1)
+    assert db.get_book_by_isbn("9780000000035")["title"] == "Later"
+
+
+def test_rolled_back_write_is_not_cached(temp_db):
+    # Values read inside a transaction that later rolls back are never cached.
+    db.insert_book("Cached", "Author", "9780000000036", 2, 2)
+    book_id = db.get_book_by_isbn("9780000000036")["id"]
+    try:
+        with db.unit_of_work():
+            db.update_book_availability(book_id, -1)
+            assert db.get_book_by_id(book_id)["available_copies"] == 1
+            raise db.TransactionAborted("rollback")
+    except db.TransactionAborted:
+        pass
+    assert db.get_book_by_id(book_id)["available_copies"] == 2
+
+
+def test_cache_is_bounded_and_counts_evictions():
+    cache = db.LRUCache(2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key, cache.generation)
+    assert cache.get("a") == (False, None)
+    assert cache.get("c") == (True, "c")
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_stale_read_is_not_stored_after_invalidation():
+    # A value loaded before a concurrent invalidation is discarded.
+    cache = db.LRUCache(10)
+    generation = cache.generation
+    cache.invalidate("k")
+    cache.put("k", "stale", generation)
+    assert cache.get("k") == (False, None)
+
+
+def test_concurrent_reads_and_writes_stay_consistent(temp_db):
+    db.insert_book("Busy", "Author", "9780000000037", 50, 50)
+    book_id = db.get_book_by_isbn("9780000000037")["id"]
+
+    def writer():
+        for _ in range(25):
+            db.update_book_availability(book_id, -1)
+
+    def reader():
+        for _ in range(200):
+            db.get_book_by_id(book_id)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert db.get_book_by_id(book_id)["available_copies"] == 25
+
+
+def test_transaction_reads_bypass_rows_cached_by_other_threads(temp_db, monkeypatch):
+    # One copy, borrowed and returned in one batch while another thread
+    # caches the last committed row in between: the return must still
+    # restore the copy
+    import services.library_service as ls
+    db.insert_book("Single Copy", "Author", "9780000000039", 1, 1)
+    book_id = db.get_book_by_isbn("9780000000039")["id"]
+    original_return = ls.return_book_by_patron
+
+    def return_after_concurrent_read(patron_id, book_id):
+        reader = threading.Thread(target=db.get_book_by_id, args=(book_id,))
+        reader.start()
+        reader.join()
+        return original_return(patron_id, book_id)
+
+    monkeypatch.setattr(ls, "return_book_by_patron", return_after_concurrent_read)
+    results = ls.process_circulation_batch([
+        {"action": "borrow", "patron_id": "123456", "book_id": book_id},
+        {"action": "return", "patron_id": "123456", "book_id": book_id},
+    ])
+    assert [r["success"] for r in results] == [True, True]
+    assert db.get_book_by_id(book_id)["available_copies"] == 1
+    assert db.get_patron_borrow_count("123456") == 0
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+import database as db
+import services.library_service as ls
+from timestamps import from_epoch, to_epoch
+
+
+def _book(isbn, copies=5):
+    db.insert_book("Book", "Author", isbn, copies, copies)
+    return db.get_book_by_isbn(isbn)["id"]
+
+
+def _epochs(conn, book_id):
+    return tuple(conn.execute(
+        "SELECT borrow_ts, due_ts, return_ts FROM borrow_records WHERE book_id = ?", (book_id,)
+    ).fetchone())
+
+
+def test_epoch_round_trip_matches_sqlite(temp_db):
+    # to_epoch agrees with strftime('%s') and from_epoch inverts it
+    moment = datetime(2025, 3, 9, 2, 30, 15, 123456)
+    conn = db.get_db_connection()
+    sqlite_value = conn.execute("SELECT CAST(strftime('%s', ?) AS INTEGER)", (moment.isoformat(),)).fetchone()[0]
+    conn.close()
+    assert to_epoch(moment) == sqlite_value
+    assert from_epoch(sqlite_value) == moment.replace(microsecond=0)
+
+
+def test_writes_keep_epoch_columns_in_sync(temp_db):
+    # Service writes and raw text-only inserts both get epoch columns
+    book_id = _book("9780000000501")
+    assert ls.borrow_book_by_patron("123456", book_id)[0]
+    conn = db.get_db_connection()
+    borrow_ts, due_ts, return_ts = _epochs(conn, book_id)
+    assert due_ts - borrow_ts == 14 * 86400
+    assert return_ts is None
+
+    assert ls.return_book_by_patron("123456", book_id)[0]
+    assert _epochs(conn, book_id)[2] is not None
+
+    raw_book = _book("9780000000502")
+    conn.execute(
+        "INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date, return_date) VALUES (?, ?, ?, ?, ?)",
+        ("654321", raw_book, "2024-01-01T09:00:00", "2024-01-15T09:00:00", "2024-01-10T12:00:00")
+    )
+    conn.commit()
+    assert _epochs(conn, raw_book) == (
+        to_epoch(datetime(2024, 1, 1, 9)),
+        to_epoch(datetime(2024, 1, 15, 9)),
+        to_epoch(datetime(2024, 1, 10, 12)),
+    )
+    conn.close()
+
+
+def test_backfill_converts_existing_rows_in_batches(temp_db):
+    # Rows from before the migration are filled; unparseable dates stay NULL
+    book_id = _book("9780000000503")
+    conn = db.get_db_connection()
+    base = datetime(2024, 5, 1)
+    for day in range(7):
+        conn.execute(
+            "INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) VALUES (?, ?, ?, ?)",
+            ("123456", book_id, (base + timedelta(days=day)).isoformat(),
+             (base + timedelta(days=day + 14)).isoformat())
+        )
+    conn.execute(
+        "INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) VALUES (?, ?, ?, ?)",
+        ("123456", book_id, "not a date", "not a date")
+    )
+    conn.execute("UPDATE borrow_records SET borrow_ts = NULL, due_ts = NULL, return_ts = NULL")
+    conn.commit()
+
+    assert db.backfill_borrow_record_epochs(batch_size=3) == 7
+    missing = conn.execute("SELECT COUNT(*) FROM borrow_records WHERE borrow_ts IS NULL").fetchone()[0]
+    conn.close()
+    assert missing == 1
+    assert db.backfill_borrow_record_epochs(batch_size=3) == 0
+
+
+def test_interrupted_backfill_resumes_on_next_startup(temp_db):
+    # Rows left unconverted by a process that died after migration 5 are
+    # filled by the next ensure_schema() or migrate_database()
+    book_id = _book("9780000000506")
+    db.insert_borrow_record("123456", book_id, datetime(2024, 5, 1), datetime(2024, 5, 15))
+    conn = db.get_db_connection()
+    conn.execute("UPDATE borrow_records SET borrow_ts = NULL, due_ts = NULL")
+    conn.commit()
+    plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + db._EPOCH_PENDING_SQL))
+    assert "idx_borrow_records_epoch_pending" in plan
+
+    assert db.ensure_schema() is False
+    assert _epochs(conn, book_id)[:2] == (to_epoch(datetime(2024, 5, 1)), to_epoch(datetime(2024, 5, 15)))
+    conn.execute("UPDATE borrow_records SET borrow_ts = NULL")
+    conn.commit()
+    db.migrate_database()
+    assert _epochs(conn, book_id)[0] is not None
+    conn.close()
+
+
+def test_history_and_current_loans_order_by_epoch(temp_db):
+    # Ordering uses borrow_ts and the dict shapes are unchanged
+    first, second = _book("9780000000504"), _book("9780000000505")
+    now = datetime.now()
+    db.insert_borrow_record("123456", second, now - timedelta(days=2), now + timedelta(days=12))
+    db.insert_borrow_record("123456", first, now - timedelta(days=20), now - timedelta(days=6))
+
+    history = ls._fetch_patron_history("123456")
+    assert [h["book_id"] for h in history] == [first, second]
+    assert set(history[0]) == {"book_id", "title", "author", "borrow_date", "due_date", "return_date"}
+
+    current = db.get_patron_borrowed_books("123456")
+    assert [c["book_id"] for c in current] == [first, second]
+    assert isinstance(current[0]["due_date"], datetime)
+    assert [c["is_overdue"] for c in current] == [True, False]
+    assert ls.calculate_late_fee_for_book("123456", first)["days_overdue"] == 6
+
+
+def test_history_query_uses_epoch_index(temp_db):
+    conn = db.get_db_connection()
+    plan = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM borrow_records WHERE patron_id = ? ORDER BY borrow_ts, id",
+        ("123456",)
+    ))
+    conn.close()
+    assert "idx_borrow_records_patron_borrow_ts" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,84 @@
+import io
+import json
+
+import database as db
+import cli
+from services.catalog_import import import_books
+
+
+CSV_DATA = """title,author,isbn,total_copies
+The Great Gatsby,F. Scott Fitzgerald,9780743273565,3
+,No Title,9780000000041,1
+Short ISBN,Author,123,1
+Bad Copies,Author,9780000000042,zero
+Duplicate In File,Author,9780743273565,1
+Second Book,Author Two,9780000000043,2
+"""
+
+
+def _collect():
+    rejected = []
+    return rejected, lambda line, row, reason: rejected.append((line, reason))
+
+
+def test_csv_import_reuses_catalog_validation(temp_db):
+    rejected, on_reject = _collect()
+    counts = import_books(io.StringIO(CSV_DATA), "csv", batch_size=2, on_reject=on_reject)
+    assert counts == {"imported": 2, "rejected": 4}
+    assert [reason for _, reason in rejected] == [
+        "Title is required.",
+        "ISBN must be exactly 13 digits.",
+        "Total copies must be a positive integer.",
+        "A book with this ISBN already exists.",
+    ]
+    assert [line for line, _ in rejected] == [3, 4, 5, 6]
+    book = db.get_book_by_isbn("9780000000043")
+    assert book["total_copies"] == 2 and book["available_copies"] == 2
+
+
+def test_jsonl_import_rejects_existing_and_malformed_rows(temp_db):
+    db.insert_book("Existing", "Author", "9780000000044", 1, 1)
+    lines = [
+        json.dumps({"title": "New", "author": "A", "isbn": "9780000000045", "total_copies": 1}),
+        json.dumps({"title": "Dup", "author": "A", "isbn": "9780000000044", "total_copies": 1}),
+        "not json",
+        "",
+        json.dumps({"title": "Also New", "author": "A", "isbn": "9780000000046", "total_copies": "4"}),
+    ]
+    rejected, on_reject = _collect()
+    counts = import_books(io.StringIO("\n".join(lines)), "jsonl", on_reject=on_reject)
+    assert counts == {"imported": 2, "rejected": 2}
+    # Duplicates of existing books are found when the batch is flushed
+    assert sorted(rejected) == [(2, "A book with this ISBN already exists."), (3, "Invalid JSON object.")]
+    assert db.get_book_by_isbn("9780000000046")["total_copies"] == 4
+
+
+def test_import_jsonl_non_text_title_or_author(temp_db):
+    lines = [
+        json.dumps({"title": 1984, "author": "George Orwell", "isbn": "9780000000047", "total_copies": 1}),
+        json.dumps({"title": "Lists", "author": ["A", "B"], "isbn": "9780000000048", "total_copies": 1}),
+        json.dumps({"title": {"en": "Map"}, "author": "A", "isbn": "9780000000049", "total_copies": 1}),
+    ]
+    rejected, on_reject = _collect()
+    counts = import_books(io.StringIO("\n".join(lines)), "jsonl", on_reject=on_reject)
+    assert counts == {"imported": 1, "rejected": 2}
+    assert sorted(rejected) == [(2, "Author must be text."), (3, "Title must be text.")]
+    assert db.get_book_by_isbn("9780000000047")["title"] == "1984"
+
+
+def test_import_large_file_in_batches(temp_db):
+    rows = "".join(f"Book {i},Author,{9780000100000 + i},1\n" for i in range(2500))
+    counts = import_books(io.StringIO("title,author,isbn,total_copies\n" + rows), "csv", batch_size=1000)
+    assert counts == {"imported": 2500, "rejected": 0}
+    assert len(db.get_all_books()) == 2500
+
+
+def test_cli_import_books(temp_db, tmp_path, capsys):
+    source = tmp_path / "books.csv"
+    source.write_text(CSV_DATA)
+    rejects = tmp_path / "rejects.csv"
+    status = cli.main(["--database", temp_db, "import-books", str(source), "--rejects", str(rejects)])
+    assert status == 1  # some rows were rejected
+    assert "Imported 2 book(s), rejected 4." in capsys.readouterr().out
+    assert rejects.read_text().splitlines()[0] == "line,isbn,reason"
+    assert len(rejects.read_text().splitlines()) == 5
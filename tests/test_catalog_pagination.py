@@ -0,0 +1,80 @@
+import pytest
+from flask import Flask
+
+import database as db
+import services.library_service as ls
+from routes import register_blueprints
+
+
+@pytest.fixture
+def catalog(temp_db):
+    # Repeated titles make sure the id tie-breaker is part of the key.
+    titles = ["Beta", "Alpha", "Gamma", "Alpha", "Delta", "Alpha", "Epsilon"]
+    for i, title in enumerate(titles):
+        db.insert_book(title, "Author", f"{9780000000100 + i}", 1, 1)
+    return sorted((b["title"], b["id"]) for b in db.get_all_books())
+
+
+@pytest.fixture
+def client(temp_db):
+    app = Flask("app")  # resolve templates relative to the application package
+    app.secret_key = "test"
+    register_blueprints(app)
+    return app.test_client()
+
+
+def test_pages_cover_catalog_in_order_without_duplicates(catalog):
+    seen, cursor = [], None
+    while True:
+        page = ls.get_catalog_page(cursor, limit=3)
+        seen.extend((b["title"], b["id"]) for b in page["books"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == catalog
+
+
+def test_last_full_page_has_no_next_cursor(catalog):
+    page = ls.get_catalog_page(limit=len(catalog))
+    assert len(page["books"]) == len(catalog)
+    assert page["next_cursor"] is None
+
+
+def test_page_size_is_clamped(catalog, monkeypatch):
+    monkeypatch.setattr(ls, "MAX_CATALOG_PAGE_SIZE", 2)
+    assert len(ls.get_catalog_page(limit=1000)["books"]) == 2
+    assert len(ls.get_catalog_page(limit=0)["books"]) == 1
+
+
+def test_malformed_cursor_is_rejected(catalog):
+    with pytest.raises(ValueError):
+        ls.get_catalog_page("not-a-cursor")
+
+
+def test_keyset_query_uses_title_index(temp_db):
+    conn = db.get_db_connection()
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM books WHERE (title, id) > (?, ?) "
+                        "ORDER BY title, id LIMIT ?", ("a", 1, 10)).fetchall()
+    conn.close()
+    assert "idx_books_title_id" in " ".join(row["detail"] for row in plan)
+
+
+def test_catalog_route_links_to_next_page(client, catalog):
+    response = client.get("/catalog?limit=3")
+    html = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert html.count("<tr>") == 4  # header + 3 rows
+    assert "Next Page" in html
+
+
+def test_catalog_route_recovers_from_bad_cursor(client, catalog):
+    response = client.get("/catalog?cursor=garbage")
+    assert response.status_code == 302
+
+
+def test_books_api(client, catalog):
+    first = client.get("/api/books?limit=4").get_json()
+    assert first["count"] == 4
+    second = client.get(f"/api/books?limit=4&cursor={first['next_cursor']}").get_json()
+    assert second["count"] == 3 and second["next_cursor"] is None
+    assert client.get("/api/books?cursor=garbage").status_code == 400
@@ -0,0 +1,173 @@
+import time
+
+import pytest
+from flask import Flask
+
+import services.library_service as ls
+from routes import register_blueprints
+from services import circuit_breaker as cb
+from services.payment_service import PaymentGateway
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyGateway(PaymentGateway):
+    """Simulated gateway that fails or stalls on demand."""
+
+    def __init__(self):
+        super().__init__()
+        self.fail = False
+        self.calls = 0
+
+    def process_payment(self, patron_id, amount):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError("gateway down")
+        return {"status": "success", "transaction_id": "TXN1234"}
+
+    def refund_payment(self, transaction_id, amount):
+        self.calls += 1
+        return {"status": "failed", "reason": "Gateway error"} if self.fail else {"status": "refunded"}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _gateway(clock, **breaker_options):
+    options = dict(min_calls=4, failure_rate=0.5, open_seconds=30, half_open_calls=2, clock=clock)
+    options.update(breaker_options)
+    flaky = FlakyGateway()
+    return flaky, cb.CircuitBreakerGateway(flaky, cb.CircuitBreaker(**options), call_timeout=1.0)
+
+
+def test_opens_on_error_rate_and_fails_fast(clock):
+    flaky, gateway = _gateway(clock)
+    for _ in range(2):
+        gateway.process_payment("123456", 5.0)
+    flaky.fail = True
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            gateway.process_payment("123456", 5.0)
+    assert gateway.breaker.state == cb.OPEN
+
+    # Open: rejected without touching the gateway
+    calls = flaky.calls
+    with pytest.raises(cb.CircuitOpenError):
+        gateway.process_payment("123456", 5.0)
+    assert flaky.calls == calls
+    stats = gateway.stats()
+    assert stats["counters"]["rejected"] == 1
+    assert stats["counters"]["opened"] == 1
+    assert stats["window"]["failure_rate"] == 0.5
+
+
+def test_half_open_trials_close_or_reopen(clock):
+    flaky, gateway = _gateway(clock)
+    flaky.fail = True
+    for _ in range(4):
+        with pytest.raises(ConnectionError):
+            gateway.process_payment("123456", 5.0)
+    clock.now += 30
+    assert gateway.breaker.state == cb.HALF_OPEN
+
+    # A failed trial re-opens the circuit
+    with pytest.raises(ConnectionError):
+        gateway.process_payment("123456", 5.0)
+    assert gateway.breaker.state == cb.OPEN
+
+    # Enough successful trials close it with a fresh window
+    clock.now += 30
+    flaky.fail = False
+    gateway.process_payment("123456", 5.0)
+    gateway.process_payment("123456", 5.0)
+    assert gateway.breaker.state == cb.CLOSED
+    assert gateway.stats()["window"]["calls"] == 0
+
+
+def test_slow_calls_and_gateway_errors_count_against_the_gateway(clock):
+    flaky, gateway = _gateway(clock, slow_call_seconds=0.01, slow_call_rate=0.5)
+    flaky.latency = 0.02
+    for _ in range(4):
+        gateway.process_payment("123456", 5.0)
+    assert gateway.breaker.state == cb.OPEN
+
+    # 'failed' refund responses are failures; old outcomes leave the window
+    flaky, gateway = _gateway(clock, window_seconds=60)
+    flaky.fail = True
+    gateway.refund_payment("TXN1234", 5.0)
+    gateway.refund_payment("TXN1234", 5.0)
+    clock.now += 61
+    flaky.fail = False
+    for _ in range(3):
+        gateway.refund_payment("TXN1234", 5.0)
+    assert gateway.breaker.state == cb.CLOSED
+    assert gateway.stats()["window"]["calls"] == 3
+
+
+def test_call_timeout_frees_the_caller(clock):
+    flaky, gateway = _gateway(clock)
+    gateway.call_timeout = 0.05
+    flaky.latency = 0.5
+    started = time.perf_counter()
+    with pytest.raises(cb.GatewayTimeout):
+        gateway.process_payment("123456", 5.0)
+    assert time.perf_counter() - started < 0.4
+    assert gateway.stats()["counters"]["failures"] == 1
+
+
+def test_gateway_raised_timeout_is_a_fast_failure(clock):
+    # The gateway's own TimeoutError is passed through and timed as it ran
+    def upstream_timeout(patron_id, amount):
+        raise TimeoutError("upstream")
+
+    flaky, gateway = _gateway(clock, slow_call_seconds=0.5)
+    flaky.process_payment = upstream_timeout
+    with pytest.raises(TimeoutError, match="upstream"):
+        gateway.process_payment("123456", 5.0)
+    counters = gateway.stats()["counters"]
+    assert (counters["failures"], counters["slow_calls"]) == (1, 0)
+
+
+def test_queued_call_timeout_is_cancelled_as_rejection(clock):
+    # The only worker is stuck on a slow call, so the next call never starts
+    flaky = FlakyGateway()
+    flaky.latency = 0.5
+    gateway = cb.CircuitBreakerGateway(flaky, cb.CircuitBreaker(clock=clock), call_timeout=0.05, max_workers=1)
+    with pytest.raises(cb.GatewayTimeout):
+        gateway.process_payment("123456", 5.0)
+    with pytest.raises(cb.GatewayTimeout, match="not started"):
+        gateway.process_payment("123456", 5.0)
+    time.sleep(0.5)
+    assert flaky.calls == 1
+    counters = gateway.stats()["counters"]
+    assert (counters["failures"], counters["rejected"]) == (1, 1)
+
+
+def test_pay_late_fees_fails_fast_through_open_breaker(clock, mocker):
+    mocker.patch("services.library_service.calculate_late_fee_for_book", return_value={"fee_amount": 5.0})
+    mocker.patch("services.library_service.get_book_by_id", return_value={"title": "MockBook"})
+    flaky, gateway = _gateway(clock, min_calls=1)
+    flaky.fail = True
+    assert ls.pay_late_fees("123456", 1, gateway)["success"] is False
+    result = ls.pay_late_fees("123456", 1, gateway)
+    assert result["message"] == "Payment failed: Payment gateway unavailable (circuit open)."
+    assert flaky.calls == 1
+
+
+def test_payment_gateway_status_endpoint():
+    app = Flask("app")
+    register_blueprints(app)
+    data = app.test_client().get("/api/payment_gateway").get_json()
+    assert data["state"] == cb.CLOSED
+    assert set(data["counters"]) == {"calls", "successes", "failures", "slow_calls", "rejected", "opened"}
+    assert data["call_timeout_seconds"] == cb.payment_gateway.call_timeout
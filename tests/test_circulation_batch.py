@@ -0,0 +1,85 @@
+import pytest
+from flask import Flask
+
+import database as db
+import services.library_service as ls
+from routes import register_blueprints
+
+
+@pytest.fixture
+def books(temp_db):
+    db.insert_book("One Copy", "Author", "9780000000051", 1, 1)
+    db.insert_book("Many Copies", "Author", "9780000000052", 10, 10)
+    return db.get_book_by_isbn("9780000000051")["id"], db.get_book_by_isbn("9780000000052")["id"]
+
+
+@pytest.fixture
+def client(temp_db):
+    app = Flask(__name__)
+    register_blueprints(app)
+    return app.test_client()
+
+
+def test_batch_returns_result_per_item(books):
+    one, many = books
+    results = ls.process_circulation_batch([
+        {"action": "borrow", "patron_id": "111111", "book_id": one},
+        {"action": "borrow", "patron_id": "222222", "book_id": one},
+        {"action": "return", "patron_id": "111111", "book_id": one},
+        {"action": "renew", "patron_id": "111111", "book_id": one},
+        {"action": "borrow", "patron_id": "111111", "book_id": "x"},
+    ])
+    assert [r["success"] for r in results] == [True, False, True, False, False]
+    assert "not available" in results[1]["message"].lower()
+    assert "invalid action" in results[3]["message"].lower()
+    assert db.get_book_by_id(one)["available_copies"] == 1
+
+
+def test_batch_enforces_borrow_limit_across_items(books):
+    # Earlier items in the batch count toward the 5-book limit.
+    _, many = books
+    ops = [{"action": "borrow", "patron_id": "333333", "book_id": many} for _ in range(6)]
+    results = ls.process_circulation_batch(ops)
+    assert [r["success"] for r in results] == [True] * 5 + [False]
+    assert "maximum borrowing limit" in results[5]["message"].lower()
+    assert db.get_patron_borrow_count("333333") == 5
+    assert db.get_book_by_id(many)["available_copies"] == 5
+
+
+def test_failed_item_does_not_undo_others(books, monkeypatch):
+    # A rolled-back item leaves earlier and later items committed.
+    one, many = books
+    real_update = ls.update_book_availability
+    calls = []
+
+    def flaky_update(book_id, change):
+        calls.append(book_id)
+        return False if len(calls) == 2 else real_update(book_id, change)
+
+    monkeypatch.setattr(ls, "update_book_availability", flaky_update)
+    results = ls.process_circulation_batch([
+        {"action": "borrow", "patron_id": "444444", "book_id": many},
+        {"action": "borrow", "patron_id": "444444", "book_id": one},
+        {"action": "borrow", "patron_id": "555555", "book_id": many},
+    ])
+    assert [r["success"] for r in results] == [True, False, True]
+    assert db.get_patron_borrow_count("444444") == 1
+    assert db.get_book_by_id(one)["available_copies"] == 1
+
+
+def test_batch_endpoint(client, books):
+    one, _ = books
+    response = client.post("/api/circulation/batch", json={"operations": [
+        {"action": "borrow", "patron_id": "666666", "book_id": one},
+        {"action": "borrow", "patron_id": "abc", "book_id": one},
+    ]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["succeeded"] == 1 and body["failed"] == 1
+    assert body["results"][1]["message"].startswith("Invalid patron ID")
+
+
+def test_batch_endpoint_rejects_bad_payload(client):
+    assert client.post("/api/circulation/batch", json={}).status_code == 400
+    ops = [{"action": "borrow", "patron_id": "111111", "book_id": 1}] * (ls.MAX_BATCH_OPERATIONS + 1)
+    assert client.post("/api/circulation/batch", json={"operations": ops}).status_code == 400
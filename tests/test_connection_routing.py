@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+
+import pytest
+
+import database as db
+import services.library_service as ls
+
+
+def test_read_connections_are_read_only(temp_db):
+    conn = db.get_read_connection()
+    try:
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert "mode=ro" in conn.pool_key
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO books (title, author, isbn, total_copies, available_copies) "
+                         "VALUES ('x', 'y', '9780000001001', 1, 1)")
+    finally:
+        conn.close()
+    # Returned to its own pool, separate from the read-write connections
+    assert db.get_read_connection() is conn
+    conn.close()
+    other = db.get_db_connection()
+    assert other is not conn
+    other.close()
+
+
+def test_read_helpers_use_read_only_connections(temp_db, monkeypatch):
+    opened = []
+    original = db._open_connection
+    monkeypatch.setattr(db, "_open_connection",
+                        lambda path, read_only=False: opened.append(read_only) or original(path, read_only))
+    db.close_all_connections()
+    db.get_all_books()
+    ls.search_books_in_catalog("gatsby", "title")
+    ls._fetch_patron_history("123456")
+    db.get_patron_loans("123456")
+    assert opened and all(opened)
+
+
+def test_unit_of_work_reads_its_own_writes(temp_db):
+    with db.unit_of_work() as conn:
+        assert db.get_read_connection() is conn
+        assert db.get_write_connection() is conn
+        db.insert_book("Uncommitted", "Author", "9780000001002", 1, 1)
+        assert db.get_book_by_isbn("9780000001002") is not None
+
+
+def test_writes_share_one_writer_connection(temp_db):
+    first = db.get_write_connection()
+    first.close()
+    with db.unit_of_work() as conn:
+        assert conn is first
+    assert db.insert_book("Writer", "Author", "9780000001003", 1, 1)
+    assert db.get_write_connection() is first
+    first.close()
+
+
+def test_writer_is_exclusive_across_threads(temp_db, monkeypatch):
+    monkeypatch.setattr(db, "WRITE_LOCK_TIMEOUT", 0.05)
+    writer = db.get_write_connection()
+    errors = []
+
+    def try_write():
+        try:
+            db.get_write_connection()
+        except db.TransactionAborted as e:
+            errors.append(str(e))
+
+    thread = threading.Thread(target=try_write)
+    thread.start()
+    thread.join()
+    writer.close()
+    assert errors == ["Database is busy. Please try again."]
+
+    # Once released, other threads can write
+    done = []
+    thread = threading.Thread(target=lambda: done.append(db.insert_book("Next", "A", "9780000001004", 1, 1)))
+    thread.start()
+    thread.join()
+    assert done == [True]
+
+
+def test_reads_do_not_wait_for_an_open_write_transaction(temp_db):
+    db.insert_book("Committed", "Author", "9780000001005", 1, 1)
+    seen = []
+    with db.unit_of_work():
+        db.insert_book("Pending", "Author", "9780000001006", 1, 1)
+        thread = threading.Thread(target=lambda: seen.append(
+            [b["title"] for b in db.search_books("", "title")]))
+        thread.start()
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+    assert "Committed" in seen[0] and "Pending" not in seen[0]
+
+
+def test_threads_racing_on_first_write_share_one_writer(temp_db, monkeypatch):
+    db.close_all_connections()
+    opened = []
+    original = db._open_connection
+    monkeypatch.setattr(db, "_open_connection",
+                        lambda path, read_only=False: opened.append(read_only) or original(path, read_only))
+    start = threading.Barrier(4)
+    writers = []
+
+    def write():
+        start.wait()
+        conn = db.get_write_connection()
+        writers.append(conn)
+        conn.close()
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert opened.count(False) == 1
+    assert all(conn is writers[0] for conn in writers)
+
+
+def test_close_all_connections_leaves_a_held_writer_alone(temp_db):
+    writer = db.get_write_connection()
+    done = []
+    thread = threading.Thread(target=lambda: done.append(db.close_all_connections()))
+    thread.start()
+    thread.join()
+    assert done == [None]
+    writer.execute("SELECT 1")
+    writer.close()  # still registered, so releasing it doesn't fail
+    assert db.get_write_connection() is writer
+    writer.close()
+    db.close_all_connections()
+    fresh = db.get_write_connection()
+    assert fresh is not writer
+    fresh.close()
@@ -0,0 +1,77 @@
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import cli
+import database as db
+import services.library_service as ls
+from services import fee_engine
+
+
+def test_fee_tiers_and_cap():
+    today = date(2024, 3, 1)
+    due = np.array(["2024-03-05", "2024-03-01", "2024-02-25", "2024-02-21", "2024-01-01", "NaT"],
+                   dtype="datetime64[D]")
+    days, cents = fee_engine.compute_late_fees(due, today)
+    assert days.tolist() == [0, 0, 5, 9, 60, 0]
+    assert cents.tolist() == [0, 0, 250, 550, 1500, 0]
+
+
+def test_engine_matches_per_book_calculation(temp_db):
+    # Every open loan's fee agrees with calculate_late_fee_for_book to the cent.
+    rng = random.Random(5)
+    now = datetime.now()
+    for book_id in range(1, 41):
+        db.insert_book(f"Book {book_id}", "Author", f"{9780000000300 + book_id}", 1, 1)
+        due = now - timedelta(days=rng.randint(-10, 40), hours=rng.randint(0, 23))
+        db.insert_borrow_record(f"{100000 + book_id % 7}", book_id, due - timedelta(days=14), due)
+
+    fees = fee_engine.outstanding_fees()
+    assert len(fees["loan_id"]) == 40
+    for patron_id, book_id, days, cents in zip(fees["patron_id"], fees["book_id"],
+                                               fees["days_overdue"], fees["fee_cents"]):
+        expected = ls.calculate_late_fee_for_book(str(patron_id), int(book_id))
+        assert int(days) == expected["days_overdue"]
+        assert int(cents) == round(expected["fee_amount"] * 100)
+
+
+def test_returned_loans_are_excluded(temp_db):
+    db.insert_book("Book", "Author", "9780000000350", 1, 1)
+    due = datetime.now() - timedelta(days=30)
+    db.insert_borrow_record("123456", 1, due - timedelta(days=14), due)
+    db.update_borrow_record_return_date("123456", 1, datetime.now())
+    assert len(fee_engine.outstanding_fees()["loan_id"]) == 0
+    assert fee_engine.outstanding_fees_by_patron() == []
+
+
+def test_per_patron_aggregate(temp_db):
+    today = date(2024, 3, 1)
+    for book_id, (patron, due) in enumerate([("111111", "2024-02-25"), ("111111", "2024-01-01"),
+                                             ("222222", "2024-03-10")], start=1):
+        db.insert_book(f"Book {book_id}", "Author", f"{9780000000360 + book_id}", 1, 1)
+        due_date = datetime.fromisoformat(due)
+        db.insert_borrow_record(patron, book_id, due_date - timedelta(days=14), due_date)
+
+    assert fee_engine.outstanding_fees_by_patron(today) == [
+        {"patron_id": "111111", "open_loans": 2, "overdue_loans": 2, "total_fee": 17.5},
+        {"patron_id": "222222", "open_loans": 1, "overdue_loans": 0, "total_fee": 0.0},
+    ]
+
+
+def test_malformed_due_date_owes_nothing(temp_db):
+    db.insert_book("Book", "Author", "9780000000370", 1, 1)
+    conn = db.get_db_connection()
+    conn.execute("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) "
+                 "VALUES ('123456', 1, 'x', 'not a date')")
+    conn.commit()
+    conn.close()
+    assert fee_engine.outstanding_fees()["fee_cents"].tolist() == [0]
+
+
+def test_cli_fees(temp_db, capsys):
+    db.insert_book("Book", "Author", "9780000000380", 1, 1)
+    db.insert_borrow_record("123456", 1, datetime(2024, 1, 1), datetime(2024, 1, 15))
+    assert cli.main(["--database", temp_db, "fees", "--date", "2024-01-20"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == ["patron_id,open_loans,overdue_loans,total_fee", "123456,1,1,2.50"]
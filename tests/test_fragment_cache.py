@@ -0,0 +1,59 @@
+import pytest
+from flask import Flask, render_template
+
+import database as db
+from routes import register_blueprints
+from routes import fragment_cache
+
+
+@pytest.fixture
+def app(temp_db):
+    fragment_cache.clear_fragment_cache()
+    db.insert_book("Fragment <One>", "Author", "9780000001101", 2, 2)
+    db.insert_book("Fragment Two", "Author", "9780000001102", 1, 1)
+    app = Flask("app")
+    app.secret_key = "test"
+    register_blueprints(app)
+    yield app
+    fragment_cache.clear_fragment_cache()
+
+
+def _books():
+    return sorted(db.get_all_books(), key=lambda b: b["id"])
+
+
+def test_cached_rows_match_the_full_template_loop(app):
+    with app.test_request_context("/catalog"):
+        books = _books()
+        uncached = render_template("catalog.html", books=books, next_cursor=None, is_first_page=True)
+        cached = render_template("catalog.html", books=books, rows=fragment_cache.render_catalog_rows(books),
+                                 next_cursor=None, is_first_page=True)
+    assert cached.split() == uncached.split()
+    assert "Fragment &lt;One&gt;" in cached
+
+
+def test_rows_are_reused_until_availability_changes(app):
+    with app.test_request_context("/catalog"):
+        first = fragment_cache.render_catalog_rows(_books())
+        stats = fragment_cache.get_fragment_cache_stats()
+        assert fragment_cache.render_catalog_rows(_books()) == first
+        after = fragment_cache.get_fragment_cache_stats()
+        assert after["hits"] - stats["hits"] == 2
+
+        book_id = db.get_book_by_isbn("9780000001102")["id"]
+        db.update_book_availability(book_id, -1)
+        rows = fragment_cache.render_catalog_rows(_books())
+        final = fragment_cache.get_fragment_cache_stats()
+        assert final["hits"] - after["hits"] == 1
+        assert final["misses"] - after["misses"] == 1
+    assert rows.count("Not Available") == 1 and first.count("Not Available") == 0
+
+
+def test_catalog_page_uses_cached_rows(app):
+    client = app.test_client()
+    first = client.get("/catalog").get_data(as_text=True)
+    hits = fragment_cache.get_fragment_cache_stats()["hits"]
+    client.post("/borrow", data={"patron_id": "123456", "book_id": db.get_book_by_isbn("9780000001102")["id"]})
+    page = client.get("/catalog").get_data(as_text=True)
+    assert fragment_cache.get_fragment_cache_stats()["hits"] == hits + 1
+    assert "1/1 Available" in first and "Not Available" in page
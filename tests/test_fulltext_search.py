@@ -0,0 +1,78 @@
+import database as db
+import services.library_service as ls
+
+
+def _seed():
+    db.insert_book("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565", 3, 3)
+    db.insert_book("Great Expectations", "Charles Dickens", "9780141439563", 1, 1)
+    db.insert_book("To Kill a Mockingbird", "Harper Lee", "9780061120084", 2, 2)
+    db.insert_book('Say "Hello"', "Quoted Author", "9780000000011", 1, 1)
+
+
+def test_fulltext_index_created(temp_db):
+    conn = db.get_db_connection()
+    assert db._has_fulltext_index(conn)
+    conn.close()
+
+
+def test_title_substring_matches_inside_words(temp_db):
+    # Partial matches are substrings, not just whole words.
+    _seed()
+    titles = {b["title"] for b in ls.search_books_in_catalog("reat", "title")}
+    assert titles == {"The Great Gatsby", "Great Expectations"}
+
+
+def test_author_search_is_case_insensitive(temp_db):
+    _seed()
+    results = ls.search_books_in_catalog("DICKENS", "author")
+    assert [b["isbn"] for b in results] == ["9780141439563"]
+
+
+def test_short_terms_fall_back_to_scan(temp_db):
+    # Terms under three characters cannot use the trigram index but still match.
+    _seed()
+    results = ls.search_books_in_catalog("ee", "author")
+    assert [b["author"] for b in results] == ["Harper Lee"]
+
+
+def test_quotes_in_term_are_literal(temp_db):
+    _seed()
+    results = ls.search_books_in_catalog('"hello"', "title")
+    assert [b["title"] for b in results] == ['Say "Hello"']
+
+
+def test_index_follows_inserts_and_updates(temp_db):
+    # Triggers keep the full-text index in sync with the books table.
+    _seed()
+    db.insert_book("Bleak House", "Charles Dickens", "9780141439723", 1, 1)
+    assert len(ls.search_books_in_catalog("dickens", "author")) == 2
+
+    conn = db.get_db_connection()
+    conn.execute("UPDATE books SET title = 'Renamed' WHERE isbn = '9780141439723'")
+    conn.commit()
+    conn.close()
+    assert ls.search_books_in_catalog("bleak", "title") == []
+    assert len(ls.search_books_in_catalog("renamed", "title")) == 1
+
+
+def test_limit_and_offset(temp_db):
+    _seed()
+    first = ls.search_books_in_catalog("great", "title", limit=1)
+    second = ls.search_books_in_catalog("great", "title", limit=1, offset=1)
+    assert len(first) == 1 and len(second) == 1
+    assert first[0]["id"] != second[0]["id"]
+
+
+def test_results_reflect_current_availability(temp_db):
+    _seed()
+    book_id = db.get_book_by_isbn("9780061120084")["id"]
+    db.update_book_availability(book_id, -1)
+    result = ls.search_books_in_catalog("mockingbird", "title")[0]
+    assert result["available_copies"] == 1
+
+
+def test_isbn_lookup_uses_unique_index(temp_db):
+    _seed()
+    results = ls.search_books_in_catalog("9780743273565", "isbn")
+    assert [b["title"] for b in results] == ["The Great Gatsby"]
+    assert ls.search_books_in_catalog("9780743273565", "isbn", offset=1) == []
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+import database as db
+import services.library_service as ls
+from routes import register_blueprints
+
+
+@pytest.fixture
+def client(temp_db):
+    db.insert_book("Caching Basics", "Author", "9780000000701", 2, 2)
+    app = Flask("app")  # resolve templates relative to the application package
+    app.secret_key = "test"
+    register_blueprints(app)
+    return app.test_client()
+
+
+def test_catalog_version_bumps_on_every_book_write(temp_db):
+    version, _ = db.get_catalog_version()
+    db.insert_book("Versioned", "Author", "9780000000702", 1, 1)
+    book_id = db.get_book_by_isbn("9780000000702")["id"]
+    db.update_book_availability(book_id, -1)
+    db.insert_books_bulk([("Bulk", "Author", "9780000000703", 1, 1)])
+    assert db.get_catalog_version()[0] == version + 3
+
+    # Borrow records alone don't change the catalog version
+    db.insert_borrow_record("123456", book_id, datetime.now(), datetime.now())
+    assert db.get_catalog_version()[0] == version + 3
+
+
+@pytest.mark.parametrize("url", ["/catalog", "/search?q=cach&type=title", "/api/search?q=cach", "/api/books"])
+def test_conditional_get_returns_304_until_catalog_changes(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert "Last-Modified" not in first.headers
+
+    repeat = client.get(url, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+    assert repeat.headers["ETag"] == etag
+
+    book_id = db.get_book_by_isbn("9780000000701")["id"]
+    assert ls.borrow_book_by_patron("123456", book_id)[0]
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_if_modified_since_alone_never_validates(client):
+    # Seconds can't tell apart a write made just after the client's copy,
+    # so only the ETag validates
+    assert client.get("/api/books").status_code == 200
+    book_id = db.get_book_by_isbn("9780000000701")["id"]
+    assert ls.borrow_book_by_patron("123456", book_id)[0]
+    future = "Fri, 01 Jan 2100 00:00:00 GMT"
+    assert client.get("/api/books", headers={"If-Modified-Since": future}).status_code == 200
+
+
+def test_etag_depends_on_the_query(client):
+    first = client.get("/api/search?q=cach").headers["ETag"]
+    other = client.get("/api/search?q=basic").headers["ETag"]
+    assert first != other
+    assert client.get("/api/search?q=basic", headers={"If-None-Match": first}).status_code == 200
+
+
+def test_view_is_skipped_for_304(client, monkeypatch):
+    etag = client.get("/api/search?q=cach").headers["ETag"]
+    monkeypatch.setattr("routes.api_routes.search_books_in_catalog",
+                        lambda *a: pytest.fail("search ran for a conditional hit"))
+    assert client.get("/api/search?q=cach", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_pending_flash_messages_bypass_304(client):
+    # A redirect with a flash must show the message, not a cached page
+    etag = client.get("/catalog").headers["ETag"]
+    with client.session_transaction() as session:
+        session["_flashes"] = [("error", "Book not found.")]
+    response = client.get("/catalog", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert b"Book not found." in response.data
+
+
+def test_errors_carry_no_etag(client):
+    response = client.get("/api/search?q=")
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
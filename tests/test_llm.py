@@ -180,19 +180,19 @@ def test_late_fee_cap(monkeypatch, mock_borrow_record):
 # ----------------------------------------------------------------------
 
 def test_search_books_title_partial(monkeypatch, mock_book):
-    monkeypatch.setattr(ls, "get_all_books", lambda: [mock_book])
+    monkeypatch.setattr(ls, "search_books", lambda *a, **k: [mock_book])
     result = ls.search_books_in_catalog("test", "title")
     assert len(result) == 1
 
 
 def test_search_books_isbn_exact(monkeypatch, mock_book):
-    monkeypatch.setattr(ls, "get_all_books", lambda: [mock_book])
+    monkeypatch.setattr(ls, "get_book_by_isbn", lambda x: mock_book)
     result = ls.search_books_in_catalog("1234567890123", "isbn")
     assert len(result) == 1
 
 
 def test_search_books_invalid_type(monkeypatch, mock_book):
-    monkeypatch.setattr(ls, "get_all_books", lambda: [mock_book])
+    monkeypatch.setattr(ls, "search_books", lambda *a, **k: [mock_book])
     result = ls.search_books_in_catalog("test", "unknown")
     assert result == []
 
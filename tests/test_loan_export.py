@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+import cli
+import database as db
+from routes import register_blueprints
+from services.loan_export import export_loans
+
+
+@pytest.fixture
+def loans(temp_db):
+    db.insert_book("Export One", "Author A", "9780000000901", 5, 5)
+    db.insert_book("Export, Two", "Author \"B\"", "9780000000902", 5, 5)
+    for n in range(7):
+        borrowed = datetime(2024, 1, 1 + n)
+        db.insert_borrow_record("123456" if n % 2 else "654321", 1 + n % 2, borrowed, borrowed)
+    db.update_borrow_record_return_date("654321", 1, datetime(2024, 2, 1))
+
+
+@pytest.fixture
+def client(loans):
+    app = Flask("app")
+    register_blueprints(app)
+    return app.test_client()
+
+
+def _ndjson(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_ndjson_export_streams_one_chunk_per_batch(loans):
+    chunks = list(export_loans("ndjson", batch_size=3))
+    assert len(chunks) == 3
+    rows = _ndjson("".join(chunks))
+    assert [row["id"] for row in rows] == list(range(1, 8))
+    assert rows[1]["title"] == "Export, Two" and rows[1]["isbn"] == "9780000000902"
+    assert rows[0]["return_date"] == "2024-02-01T00:00:00"
+    assert rows[1]["return_date"] is None
+
+
+def test_csv_export_round_trips(loans):
+    rows = list(csv.DictReader(io.StringIO("".join(export_loans("csv", batch_size=2)))))
+    assert len(rows) == 7
+    assert rows[1]["author"] == 'Author "B"'
+    assert rows[1]["return_date"] == ""
+    # Header only when nothing matches
+    assert "".join(export_loans("csv", patron_id="999999")) == ",".join(db.LOAN_EXPORT_COLUMNS) + "\n"
+
+
+def test_patron_and_date_filters(loans):
+    rows = _ndjson("".join(export_loans(patron_id="123456")))
+    assert [row["borrow_date"][:10] for row in rows] == ["2024-01-02", "2024-01-04", "2024-01-06"]
+    rows = _ndjson("".join(export_loans(since="2024-01-03", until="2024-01-05")))
+    assert [row["id"] for row in rows] == [3, 4]
+
+
+def test_invalid_arguments_fail_before_reading(loans):
+    for kwargs in ({"fmt": "xml"}, {"since": "01/02/2024"}, {"batch_size": 0}):
+        with pytest.raises(ValueError):
+            export_loans(**kwargs)
+
+
+def test_export_reads_lazily_from_one_connection(loans, monkeypatch):
+    opened = []
+    original = db.get_read_connection
+    monkeypatch.setattr(db, "get_read_connection", lambda: opened.append(1) or original())
+    chunks = export_loans("ndjson", batch_size=2)
+    assert opened == []
+    assert len(list(chunks)) == 4
+    assert opened == [1]
+
+
+def test_export_endpoints(client):
+    response = client.get("/api/export/loans?batch_size=2")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+    assert len(_ndjson(response.get_data(as_text=True))) == 7
+
+    response = client.get("/api/export/patrons/654321/history?format=csv")
+    assert response.mimetype == "text/csv"
+    assert 'filename="patron-654321-history.csv"' in response.headers["Content-Disposition"]
+    assert len(list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))) == 4
+
+    assert client.get("/api/export/loans?format=xml").status_code == 400
+    assert client.get("/api/export/loans?since=yesterday").status_code == 400
+    assert client.get("/api/export/patrons/12/history").status_code == 400
+
+
+def test_cli_export(loans, tmp_path, capsys):
+    out = tmp_path / "loans.csv"
+    assert cli.main(["--database", db.DATABASE, "export-loans", "--format", "csv",
+                     "--patron", "123456", "--output", str(out)]) == 0
+    assert len(list(csv.DictReader(out.open()))) == 3
+    assert cli.main(["--database", db.DATABASE, "export-loans", "--since", "2024-01-07"]) == 0
+    assert len(_ndjson(capsys.readouterr().out)) == 1
+    assert cli.main(["--database", db.DATABASE, "export-loans", "--until", "bad"]) == 1
@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from flask import Flask
+
+import database as db
+import metrics
+from routes import register_blueprints
+
+
+@pytest.fixture
+def client(temp_db):
+    metrics.reset_metrics()
+    app = Flask("app")  # resolve templates relative to the application package
+    app.secret_key = "test"
+    register_blueprints(app)
+    metrics.init_app(app)
+    yield app.test_client()
+    metrics.reset_metrics()
+
+
+def _timing(response):
+    parts = dict(re.findall(r'(\w+);dur=([\d.]+)', response.headers["Server-Timing"]))
+    return {name: float(value) for name, value in parts.items()}
+
+
+def test_count_queries_also_times_statements(temp_db):
+    with db.count_queries() as outer:
+        db.get_book_by_id(1)
+        with db.count_queries() as inner:
+            db.get_all_books()
+    assert inner["count"] >= 1 and inner["seconds"] > 0
+    assert outer["count"] > inner["count"]
+    assert outer["seconds"] >= inner["seconds"]
+
+
+def test_equal_counters_are_stopped_by_identity(temp_db):
+    first, second = db.start_query_counter(), db.start_query_counter()
+    db.stop_query_counter(second)
+    db.get_all_books()
+    db.stop_query_counter(first)
+    assert (first["count"], second["count"]) == (1, 0)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("demo_seconds", "Demo.", ("kind",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "a")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{kind="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{kind="a",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{kind="a",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{kind="a"} 4' in lines
+    assert 'demo_seconds_sum{kind="a"} 4.050000' in lines
+
+
+def test_server_timing_breaks_down_db_and_render(client):
+    response = client.get("/catalog")
+    timing = _timing(response)
+    assert set(timing) == {"db", "render", "app", "total"}
+    assert timing["render"] > 0 and timing["db"] > 0
+    assert timing["total"] >= timing["db"] + timing["render"] - 0.01
+    assert re.search(r'desc="\d+ queries"', response.headers["Server-Timing"])
+
+
+def test_metrics_endpoint_exposes_histograms(client):
+    client.get("/api/search?q=gatsby")
+    client.get("/catalog")
+    response = client.get("/api/metrics")
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert "# TYPE library_sql_statement_seconds histogram" in text
+    assert re.search(r'library_sql_statement_seconds_count\{operation="select"\} [1-9]', text)
+    assert re.search(r'library_http_request_seconds_count\{endpoint="catalog.catalog",method="GET",status="200"\} 1', text)
+    assert 'library_http_request_render_seconds_count{endpoint="catalog.catalog"} 1' in text
+    assert re.search(r'library_http_request_sql_statements_bucket\{endpoint="api.search_books_api",le="\+Inf"\} 1', text)
@@ -0,0 +1,68 @@
+import sqlite3
+
+import database as db
+
+
+def _query_plan(sql, params=()):
+    conn = db.get_db_connection()
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    conn.close()
+    return " ".join(row["detail"] for row in rows)
+
+
+def test_init_database_sets_latest_version(temp_db):
+    # A fresh database is created at the newest schema version.
+    assert db.get_schema_version() == len(db.MIGRATIONS)
+
+
+def test_migrate_database_is_idempotent(temp_db):
+    # Running migrations again is a no-op.
+    assert db.migrate_database() == len(db.MIGRATIONS)
+    assert db.migrate_database() == len(db.MIGRATIONS)
+
+
+def test_existing_database_is_upgraded_in_place(tmp_path, monkeypatch):
+    # A library.db created before migrations existed keeps its rows and gains the indexes.
+    path = str(tmp_path / "old.db")
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE books (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                "author TEXT NOT NULL, isbn TEXT UNIQUE NOT NULL, total_copies INTEGER NOT NULL, "
+                "available_copies INTEGER NOT NULL)")
+    old.execute("CREATE TABLE borrow_records (id INTEGER PRIMARY KEY AUTOINCREMENT, patron_id TEXT NOT NULL, "
+                "book_id INTEGER NOT NULL, borrow_date TEXT NOT NULL, due_date TEXT NOT NULL, return_date TEXT)")
+    old.execute("INSERT INTO borrow_records (patron_id, book_id, borrow_date, due_date) "
+                "VALUES ('123456', 1, '2024-01-01T00:00:00', '2024-01-15T00:00:00')")
+    old.commit()
+    old.close()
+
+    monkeypatch.setattr(db, "DATABASE", path)
+    try:
+        db.init_database()
+        assert db.get_schema_version() == len(db.MIGRATIONS)
+        assert db.get_patron_borrow_count("123456") == 1
+        conn = db.get_db_connection()
+        names = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        conn.close()
+        assert "idx_borrow_records_active_patron" in names
+        assert "idx_borrow_records_book_patron" in names
+    finally:
+        db.close_all_connections()
+
+
+def test_borrow_count_uses_partial_index(temp_db):
+    # get_patron_borrow_count must not scan borrow_records.
+    plan = _query_plan("SELECT COUNT(*) FROM borrow_records WHERE patron_id = ? AND return_date IS NULL",
+                       ("123456",))
+    assert "idx_borrow_records_active_patron" in plan
+
+
+def test_active_record_lookup_uses_index(temp_db):
+    plan = _query_plan("SELECT * FROM borrow_records WHERE patron_id = ? AND book_id = ? AND return_date IS NULL",
+                       ("123456", 1))
+    assert "USING INDEX" in plan or "USING COVERING INDEX" in plan
+    assert "SCAN borrow_records" not in plan
+
+
+def test_history_lookup_uses_index(temp_db):
+    plan = _query_plan("SELECT * FROM borrow_records WHERE patron_id = ?", ("123456",))
+    assert "idx_borrow_records_patron" in plan
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import database as db
+import services.library_service as ls
+
+
+def _seed_patron(patron_id="123456"):
+    now = datetime.now()
+    for i in range(4):
+        db.insert_book(f"Book {i}", f"Author {i}", f"{9780000000200 + i}", 2, 2)
+    # (book_id, days since borrowed, returned?); returns are recorded before
+    # the same book is borrowed again
+    loans = [(1, 90, True), (4, 30, True), (1, 40, False), (2, 20, False), (3, 3, False)]
+    for book_id, age, returned in loans:
+        borrowed = now - timedelta(days=age)
+        db.insert_borrow_record(patron_id, book_id, borrowed, borrowed + timedelta(days=14))
+        if returned:
+            db.update_borrow_record_return_date(patron_id, book_id, borrowed + timedelta(days=10))
+
+
+def _legacy_report(patron_id):
+    # The previous multi-query implementation, kept here as the reference result.
+    current = db.get_patron_borrowed_books(patron_id)
+    fees = sum(ls.calculate_late_fee_for_book(patron_id, item["book_id"])["fee_amount"]
+               for item in current if item["is_overdue"])
+    return {
+        "total_late_fees": round(fees + 1e-9, 2),
+        "borrow_count": db.get_patron_borrow_count(patron_id),
+        "history": ls._fetch_patron_history(patron_id),
+        "current_borrowed": [dict(item, borrow_date=item["borrow_date"].isoformat(),
+                                  due_date=item["due_date"].isoformat())
+                             for item in current],
+    }
+
+
+def test_report_matches_previous_implementation(temp_db):
+    _seed_patron()
+    report = ls.get_patron_status_report("123456")
+    legacy = _legacy_report("123456")
+    assert report["borrow_count"] == legacy["borrow_count"] == 3
+    assert report["total_late_fees"] == legacy["total_late_fees"] == 15.0 + 3.0
+    assert report["current_borrowed"] == legacy["current_borrowed"]
+    assert report["history"] == legacy["history"]
+
+
+def test_report_dates_keep_their_stored_precision(temp_db):
+    # Epoch columns hold whole seconds; returned dates still come from the ISO text
+    db.insert_book("Precise", "Author", "9780000000210", 1, 1)
+    borrowed = datetime(2024, 3, 1, 9, 30, 15, 123456)
+    db.insert_borrow_record("123456", 1, borrowed, borrowed + timedelta(days=14))
+    report = ls.get_patron_status_report("123456")
+    assert report["current_borrowed"][0]["borrow_date"] == borrowed.isoformat()
+    assert report["history"][0]["borrow_date"] == borrowed.isoformat()
+    current = db.get_patron_borrowed_books("123456")[0]
+    assert current["due_date"] == borrowed + timedelta(days=14)
+
+
+def test_report_runs_a_single_query(temp_db):
+    _seed_patron()
+    with db.count_queries() as legacy_queries:
+        _legacy_report("123456")
+    with db.count_queries() as queries:
+        ls.get_patron_status_report("123456")
+    assert queries["count"] == 1
+    assert legacy_queries["count"] == 5  # 3 lookups + one per overdue book
+
+
+def test_report_for_patron_without_loans(temp_db):
+    with db.count_queries() as queries:
+        report = ls.get_patron_status_report("654321")
+    assert queries["count"] == 1
+    assert report["current_borrowed"] == [] and report["history"] == []
+    assert report["borrow_count"] == 0 and report["total_late_fees"] == 0.0
+
+
+def test_count_queries_nests(temp_db):
+    with db.count_queries() as outer:
+        db.get_patron_borrow_count("123456")
+        with db.count_queries() as inner:
+            db.get_patron_borrow_count("123456")
+    assert inner["count"] == 1
+    assert outer["count"] == 2
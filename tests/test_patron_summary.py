@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import cli
+import database as db
+import services.library_service as ls
+
+
+def _book(isbn, copies=5):
+    db.insert_book("Book", "Author", isbn, copies, copies)
+    return db.get_book_by_isbn(isbn)["id"]
+
+
+def test_summary_follows_borrow_and_return(temp_db):
+    first, second = _book("9780000000401"), _book("9780000000402")
+    assert ls.borrow_book_by_patron("123456", first)[0]
+    assert ls.borrow_book_by_patron("123456", second)[0]
+    summary = db.get_patron_summary("123456")
+    assert summary["active_loans"] == 2
+    assert summary["earliest_due_date"] is not None
+
+    before = db.get_patron_summary("123456")["last_activity"]
+    assert ls.return_book_by_patron("123456", first)[0]
+    summary = db.get_patron_summary("123456")
+    assert summary["active_loans"] == 1
+    assert summary["last_activity"] > before  # the return time
+    assert db.check_patron_summary() == []
+
+
+def test_earliest_due_date_is_recomputed_on_return(temp_db):
+    first, second = _book("9780000000403"), _book("9780000000404")
+    now = datetime.now()
+    db.insert_borrow_record("123456", first, now - timedelta(days=20), now - timedelta(days=6))
+    db.insert_borrow_record("123456", second, now, now + timedelta(days=14))
+    assert db.get_patron_summary("123456")["earliest_due_date"] == (now - timedelta(days=6)).isoformat()
+    db.update_borrow_record_return_date("123456", first, now)
+    assert db.get_patron_summary("123456")["earliest_due_date"] == (now + timedelta(days=14)).isoformat()
+
+
+def test_borrow_limit_check_is_a_primary_key_lookup(temp_db):
+    conn = db.get_db_connection()
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT active_loans FROM patron_summary "
+                        "WHERE patron_id = ?", ("123456",)).fetchall()
+    conn.close()
+    assert "sqlite_autoindex_patron_summary" in " ".join(row["detail"] for row in plan)
+
+
+def test_borrow_limit_enforced_from_summary(temp_db):
+    book_id = _book("9780000000405", copies=10)
+    results = [ls.borrow_book_by_patron("123456", book_id)[0] for _ in range(6)]
+    assert results == [True] * 5 + [False]
+    assert db.get_patron_borrow_count("123456") == 5
+
+
+def test_checker_detects_and_rebuild_repairs(temp_db):
+    book_id = _book("9780000000406")
+    ls.borrow_book_by_patron("123456", book_id)
+    conn = db.get_db_connection()
+    conn.execute("UPDATE patron_summary SET active_loans = 4 WHERE patron_id = '123456'")
+    conn.commit()
+    conn.close()
+
+    problems = db.check_patron_summary()
+    assert [p["patron_id"] for p in problems] == ["123456"]
+    assert problems[0]["expected"]["active_loans"] == 1
+
+    assert db.rebuild_patron_summary() == 1
+    assert db.check_patron_summary() == []
+
+
+def test_deleted_loans_leave_consistent_summary(temp_db):
+    book_id = _book("9780000000407")
+    ls.borrow_book_by_patron("123456", book_id)
+    conn = db.get_db_connection()
+    conn.execute("DELETE FROM borrow_records")
+    conn.commit()
+    conn.close()
+    assert db.get_patron_borrow_count("123456") == 0
+    assert db.check_patron_summary() == []
+
+
+def test_cli_check_summary(temp_db, capsys):
+    assert cli.main(["--database", temp_db, "check-summary"]) == 0
+    assert "0 inconsistent patron(s)." in capsys.readouterr().out
+    assert cli.main(["--database", temp_db, "check-summary", "--rebuild"]) == 0
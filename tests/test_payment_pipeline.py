@@ -0,0 +1,146 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+import database as db
+from services import payment_pipeline as pp
+from services.payment_service import PaymentGateway
+
+
+class ScriptedGateway(PaymentGateway):
+    """Simulated gateway whose responses are scripted per call."""
+
+    def __init__(self, latency=0.0, script=None):
+        super().__init__(latency)
+        self.script = list(script or [])
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def process_payment(self, patron_id, amount):
+        with self._lock:
+            self.calls.append((patron_id, amount))
+            step = self.script.pop(0) if self.script else "success"
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if isinstance(step, Exception):
+                raise step
+            if step == "success":
+                return {"status": "success", "transaction_id": f"TXN{len(self.calls):04d}"}
+            return {"status": "declined", "reason": "Insufficient funds"}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _overdue_loans(count, days_overdue=10):
+    now = datetime.now()
+    book_ids = []
+    for i in range(count):
+        isbn = f"97800000006{i:02d}"
+        db.insert_book(f"Book {i}", "Author", isbn, 1, 1)
+        book_id = db.get_book_by_isbn(isbn)["id"]
+        db.insert_borrow_record("123456", book_id, now - timedelta(days=14 + days_overdue),
+                                now - timedelta(days=days_overdue))
+        book_ids.append(book_id)
+    return book_ids
+
+
+def test_settles_every_overdue_book_concurrently(temp_db):
+    # One call per book, several in flight at once, results per book
+    book_ids = _overdue_loans(4)
+    gateway = ScriptedGateway(latency=0.05)
+    result = pp.settle_patron_fees("123456", gateway, max_workers=4)
+    assert result["success"] is True
+    assert [r["book_id"] for r in result["results"]] == book_ids
+    assert all(r["status"] == "paid" and r["amount"] == 6.5 for r in result["results"])
+    assert result["total_paid"] == 26.0
+    assert gateway.max_in_flight > 1
+    assert gateway.calls == [("123456", 6.5)] * 4
+
+
+def test_transient_errors_are_retried_with_backoff(temp_db):
+    # Two connection errors then success: three attempts
+    _overdue_loans(1)
+    gateway = ScriptedGateway(script=[ConnectionError("reset"), ConnectionError("reset"), "success"])
+    result = pp.settle_patron_fees("123456", gateway, retries=2, backoff=0.001)
+    assert result["results"][0]["status"] == "paid"
+    assert result["results"][0]["attempts"] == 3
+
+
+def test_retries_run_out_and_declines_are_final(temp_db):
+    _overdue_loans(2)
+    gateway = ScriptedGateway(script=["declined", ConnectionError("down"), ConnectionError("down")])
+    result = pp.settle_patron_fees("123456", gateway, max_workers=1, retries=1, backoff=0.001)
+    declined, failed = result["results"]
+    assert (declined["status"], declined["attempts"]) == ("declined", 1)
+    assert (failed["status"], failed["attempts"]) == ("failed", 2)
+    assert result["success"] is False
+    assert result["total_paid"] == 0.0
+
+
+def test_gateway_raised_timeouts_are_retried(temp_db):
+    # A TimeoutError from the gateway itself is transient, not our deadline
+    _overdue_loans(1)
+    gateway = ScriptedGateway(script=[TimeoutError("upstream timed out"), "success"])
+    result = pp.settle_patron_fees("123456", gateway, timeout=5.0, backoff=0.001)
+    assert (result["results"][0]["status"], result["results"][0]["attempts"]) == ("paid", 2)
+
+
+def test_slow_calls_time_out_without_retry(temp_db):
+    # A timed-out charge may still complete, so it is not repeated
+    _overdue_loans(1)
+    gateway = ScriptedGateway(latency=0.5)
+    started = time.perf_counter()
+    result = pp.settle_patron_fees("123456", gateway, timeout=0.05)
+    assert time.perf_counter() - started < 0.4
+    assert result["results"][0]["status"] == "timeout"
+    assert len(gateway.calls) == 1
+
+
+def test_timeout_starts_when_the_call_runs(temp_db):
+    # With one worker, the second book's call must not wait behind the
+    # first book's abandoned call and time out before it ever runs
+    _overdue_loans(2)
+    gateway = ScriptedGateway(latency=0.5)
+    result = pp.settle_patron_fees("123456", gateway, max_workers=1, timeout=0.1)
+    assert [r["status"] for r in result["results"]] == ["timeout", "timeout"]
+    assert len(gateway.calls) == 2
+    assert gateway.max_in_flight == 2
+
+
+def test_queued_call_is_cancelled_and_retried():
+    # A call that times out before it starts charged nothing, so it is retried
+    gateway = ScriptedGateway()
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as calls:
+        calls.submit(release.wait)
+        result = pp._settle_one(calls, gateway, "123456", {"book_id": 1, "amount": 6.5},
+                                timeout=0.01, retries=1, backoff=0.001)
+        release.set()
+    assert (result["status"], result["attempts"]) == ("failed", 2)
+    assert gateway.calls == []
+
+
+def test_simulated_gateway_accepts_patron_and_amount(temp_db, monkeypatch):
+    # The stock simulated gateway works with the pipeline
+    _overdue_loans(2)
+    monkeypatch.setattr("services.payment_service.random.choice", lambda options: options[0])
+    result = pp.settle_patron_fees("123456", PaymentGateway())
+    assert result["success"] is True
+    assert all(r["transaction_id"].startswith("TXN") for r in result["results"])
+
+
+@pytest.mark.parametrize("patron_id, message", [("12", "Invalid patron ID."), ("654321", "No late fees to pay.")])
+def test_nothing_to_settle(temp_db, patron_id, message):
+    gateway = ScriptedGateway()
+    result = pp.settle_patron_fees(patron_id, gateway)
+    assert result["message"] == message
+    assert gateway.calls == []
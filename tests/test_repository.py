@@ -0,0 +1,153 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_module
+import database as db
+import repository
+import services.library_service as ls
+from services import payment_pipeline, search_index
+from services.payment_service import PaymentGateway
+from timestamps import to_epoch
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def repo(request, tmp_path, monkeypatch):
+    if request.param == "sqlite":
+        monkeypatch.setattr(db, "DATABASE", str(tmp_path / "library.db"))
+        db.init_database()
+    store = repository.create_repository(request.param)
+    previous = repository.set_repository(store)
+    yield store
+    repository.set_repository(previous)
+    db.close_all_connections()
+
+
+def test_books(repo):
+    assert repo.insert_book("Zebra", "Ann Author", "9780000001201", 2, 2)
+    assert repo.insert_book("Apple", "Bob Writer", "9780000001202", 1, 1)
+    assert not repo.insert_book("Duplicate", "X", "9780000001201", 1, 1)
+
+    apple = repo.get_book_by_isbn("9780000001202")
+    assert repo.get_book_by_id(apple["id"]) == apple
+    assert apple == {"id": apple["id"], "title": "Apple", "author": "Bob Writer",
+                     "isbn": "9780000001202", "total_copies": 1, "available_copies": 1}
+    assert repo.get_book_by_id(999) is None and repo.get_book_by_isbn("9780000009999") is None
+
+    zebra = repo.get_book_by_isbn("9780000001201")
+    assert [b["title"] for b in repo.get_books_by_ids([zebra["id"], 999, apple["id"]])] == ["Zebra", "Apple"]
+    assert [b["title"] for b in repo.get_all_books()] == ["Apple", "Zebra"]
+    assert [b["title"] for b in repo.get_books_page(None, 1)] == ["Apple"]
+    assert [b["title"] for b in repo.get_books_page(("Apple", apple["id"]), 5)] == ["Zebra"]
+    assert [b["title"] for b in repo.search_books("WRITER", "author")] == ["Apple"]
+
+    # Availability stays within 0..total_copies
+    assert not repo.update_book_availability(apple["id"], +1)
+    assert repo.update_book_availability(apple["id"], -1)
+    assert not repo.update_book_availability(apple["id"], -1)
+    assert repo.get_book_by_id(apple["id"])["available_copies"] == 0
+
+
+def test_borrow_records(repo):
+    repo.insert_book("Loaned", "Author", "9780000001203", 3, 3)
+    book_id = repo.get_book_by_isbn("9780000001203")["id"]
+    start = datetime(2024, 3, 1, 12, 0)
+    for days in (2, 0):
+        assert repo.insert_borrow_record("123456", book_id, start + timedelta(days=days),
+                                         start + timedelta(days=days + 14))
+    assert repo.get_patron_borrow_count("123456") == 2
+    active = repo.get_active_borrow_record("123456", book_id)
+    assert active["title"] == "Loaned"
+    assert active["due_ts"] == to_epoch(datetime.fromisoformat(active["due_date"]))
+    loans = repo.get_patron_loans("123456")
+    assert [loan["borrow_date"] for loan in loans] == ["2024-03-01T12:00:00", "2024-03-03T12:00:00"]
+
+    assert repo.update_borrow_record_return_date("123456", book_id, start + timedelta(days=5))
+    assert repo.get_patron_borrow_count("123456") == 0
+    assert repo.get_active_borrow_record("123456", book_id) is None
+    assert not repo.update_borrow_record_return_date("123456", book_id, start)
+    assert all(loan["return_date"] == "2024-03-06T12:00:00" for loan in repo.get_patron_loans("123456"))
+
+
+def test_unit_of_work_rolls_back_nested_blocks(repo):
+    repo.insert_book("Kept", "Author", "9780000001204", 1, 1)
+    book_id = repo.get_book_by_isbn("9780000001204")["id"]
+    version = repo.get_catalog_version()[0]
+    with repo.unit_of_work():
+        repo.insert_borrow_record("123456", book_id, datetime.now(), datetime.now())
+        with pytest.raises(db.TransactionAborted):
+            with repo.unit_of_work():
+                repo.update_book_availability(book_id, -1)
+                repo.insert_book("Undone", "Author", "9780000001205", 1, 1)
+                raise db.TransactionAborted("nested")
+    assert repo.get_book_by_isbn("9780000001205") is None
+    assert repo.get_book_by_id(book_id)["available_copies"] == 1
+    assert repo.get_patron_borrow_count("123456") == 1
+    assert repo.get_catalog_version()[0] == version
+
+    with pytest.raises(RuntimeError):
+        with repo.unit_of_work():
+            repo.update_borrow_record_return_date("123456", book_id, datetime.now())
+            raise RuntimeError
+    assert repo.get_patron_borrow_count("123456") == 1
+
+
+def test_service_layer_runs_on_the_memory_store(memory_store):
+    assert ls.add_book_to_catalog("Memory Book", "Author", "9780000001206", 1)[0]
+    book_id = memory_store.get_book_by_isbn("9780000001206")["id"]
+    assert ls.borrow_book_by_patron("123456", book_id)[0]
+    assert ls.borrow_book_by_patron("654321", book_id) == (False, "This book is currently not available.")
+    report = ls.get_patron_status_report("123456")
+    assert report["borrow_count"] == 1 and report["current_borrowed"][0]["title"] == "Memory Book"
+    assert [b["id"] for b in ls.search_books_in_catalog("memory", "title")] == [book_id]
+    assert ls.return_book_by_patron("123456", book_id)[0]
+    assert memory_store.get_book_by_id(book_id)["available_copies"] == 1
+
+
+def test_late_fees_settle_on_the_memory_store(memory_store):
+    memory_store.insert_book("Overdue", "Author", "9780000001208", 1, 1)
+    book_id = memory_store.get_book_by_isbn("9780000001208")["id"]
+    now = datetime.now()
+    memory_store.insert_borrow_record("123456", book_id, now - timedelta(days=24), now - timedelta(days=10))
+    gateway = PaymentGateway()
+    gateway.process_payment = lambda patron_id, amount: {"status": "success", "transaction_id": "TXN0001"}
+    result = payment_pipeline.settle_patron_fees("123456", gateway)
+    assert result["success"] is True
+    assert [r["book_id"] for r in result["results"]] == [book_id]
+
+
+def test_memory_stores_are_isolated(memory_store):
+    other = repository.InMemoryRepository()
+    memory_store.insert_book("Mine", "Author", "9780000001207", 1, 1)
+    assert other.get_all_books() == []
+    assert other.store_key != memory_store.store_key
+
+
+def test_create_app_with_memory_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "unused.db"))
+    monkeypatch.setattr(search_index, "catalog_index", search_index.TrigramIndex())
+    previous = repository.get_repository()
+    try:
+        client = app_module.create_app({"STORAGE": "memory"}).test_client()
+        assert "The Great Gatsby" in client.get("/catalog").get_data(as_text=True)
+        client.post("/borrow", data={"patron_id": "123456", "book_id": 1})
+        assert repository.get_book_by_id(1)["available_copies"] == 2
+        assert client.get("/api/search?q=mockingbird").get_json()["count"] == 1
+    finally:
+        repository.set_repository(previous)
+    assert not os.path.exists(str(tmp_path / "unused.db"))
+
+
+def test_unknown_storage_backend():
+    with pytest.raises(ValueError):
+        repository.create_repository("postgres")
+
+
+def test_incomplete_backend_cannot_be_created():
+    class PartialRepository(repository.LibraryRepository):
+        def get_book_by_id(self, book_id):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialRepository()
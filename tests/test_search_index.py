@@ -0,0 +1,96 @@
+import random
+import string
+
+import pytest
+import database as db
+import services.library_service as ls
+from services.search_index import TrigramIndex
+
+
+def _scan(books, term, field):
+    # Reference semantics: the original substring scan over every book.
+    term = term.lower()
+    hits = [b for b in books if term in (b[field] or "").lower()]
+    return [b["id"] for b in sorted(hits, key=lambda b: (b["title"], b["id"]))]
+
+
+def _random_books(n, seed=7):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + " éÉ'-"
+    return [{"id": i,
+             "title": "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 20))),
+             "author": "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 12)))}
+            for i in range(1, n + 1)]
+
+
+def test_index_matches_substring_scan():
+    # Every query returns exactly what `term in value` returns, in title order.
+    books = _random_books(400)
+    index = TrigramIndex()
+    index.add_many((b["id"], b["title"], b["author"]) for b in books)
+    rng = random.Random(11)
+    for _ in range(300):
+        source = rng.choice(books)
+        field = rng.choice(["title", "author"])
+        value = source[field]
+        start = rng.randint(0, len(value) - 1)
+        term = value[start:start + rng.randint(1, 5)]
+        if rng.random() < 0.5:
+            term = term.upper()
+        assert index.search(term, field) == _scan(books, term, field)
+
+
+def test_index_missing_trigram_returns_empty():
+    index = TrigramIndex()
+    index.add(1, "The Great Gatsby", "F. Scott Fitzgerald")
+    assert index.search("xyz", "title") == []
+
+
+def test_index_replace_and_remove():
+    index = TrigramIndex()
+    index.add(1, "Bleak House", "Charles Dickens")
+    index.add(1, "Hard Times", "Charles Dickens")
+    assert index.search("bleak", "title") == []
+    assert index.search("times", "title") == [1]
+    index.remove(1)
+    assert index.search("dickens", "author") == []
+    assert len(index) == 0
+
+
+def test_index_limit_and_offset():
+    index = TrigramIndex()
+    index.add_many([(1, "B book", "x"), (2, "A book", "x"), (3, "C book", "x")])
+    assert index.search("book", "title") == [2, 1, 3]
+    assert index.search("book", "title", limit=1, offset=1) == [1]
+
+
+def test_index_rejects_unknown_field():
+    with pytest.raises(ValueError):
+        TrigramIndex().search("abc", "isbn")
+
+
+def test_service_uses_index_and_picks_up_new_books(temp_db, monkeypatch):
+    # Once built, the index serves search and follows catalog additions.
+    index = TrigramIndex()
+    monkeypatch.setattr(ls, "catalog_index", index)
+    db.insert_book("The Great Gatsby", "F. Scott Fitzgerald", "9780743273565", 3, 3)
+    index.build()
+    assert index.ready and len(index) == 1
+
+    success, _ = ls.add_book_to_catalog("Great Expectations", "Charles Dickens", "9780141439563", 1)
+    assert success
+    assert len(index) == 2
+
+    # Rows written without going through the service are caught up on search
+    db.insert_book("Greatest Hits", "Various", "9780000000021", 1, 1)
+    titles = [b["title"] for b in ls.search_books_in_catalog("great", "title")]
+    assert titles == ["Great Expectations", "Greatest Hits", "The Great Gatsby"]
+
+
+def test_service_results_have_current_availability(temp_db, monkeypatch):
+    index = TrigramIndex()
+    monkeypatch.setattr(ls, "catalog_index", index)
+    db.insert_book("1984", "George Orwell", "9780451524935", 2, 2)
+    index.build()
+    db.update_book_availability(1, -1)
+    assert ls.search_books_in_catalog("orwell", "author")[0]["available_copies"] == 1
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+import cli
+import database as db
+import slow_queries
+
+
+@pytest.fixture
+def slow_log(tmp_path):
+    # Log every statement to a temporary file
+    path = str(tmp_path / "slow.log")
+    slow_queries.configure(threshold=0.0, log_file=path, max_bytes=1024 * 1024, backup_count=2)
+    yield path
+    slow_queries.configure()
+
+
+def _entries(path):
+    return list(slow_queries.read_entries(slow_queries.log_files(path)))
+
+
+def test_slow_statement_is_logged_with_shape_and_plan(temp_db, slow_log):
+    conn = db.get_db_connection()
+    conn.execute("SELECT * FROM borrow_records WHERE due_date < ?", ("2024-01-01",)).fetchall()
+    conn.close()
+    entry = [e for e in _entries(slow_log) if "due_date < ?" in e["sql"]][0]
+    assert entry["params"] == ["str"]
+    assert "2024-01-01" not in json.dumps(entry)
+    assert entry["ms"] >= 0
+    assert any(detail.startswith("SCAN borrow_records") for detail in entry["plan"])
+
+
+def test_threshold_filters_fast_statements(temp_db, tmp_path):
+    path = str(tmp_path / "slow.log")
+    slow_queries.configure(threshold=60.0, log_file=path)
+    try:
+        db.get_all_books()
+    finally:
+        slow_queries.configure()
+    assert _entries(path) == []
+
+
+def test_executemany_and_ddl_are_logged_without_plan(temp_db, slow_log):
+    db.insert_books_bulk([("Bulk", "Author", "9780000000901", 1, 1)])
+    entry = [e for e in _entries(slow_log) if e["sql"].startswith("INSERT INTO books")][0]
+    assert entry["params"] == "executemany"
+    assert entry["plan"] is None
+
+
+def test_log_rotates(temp_db, tmp_path):
+    path = str(tmp_path / "slow.log")
+    slow_queries.configure(threshold=0.0, log_file=path, max_bytes=2000, backup_count=2)
+    try:
+        for _ in range(50):
+            db.get_book_by_isbn("9780743273565")
+            db.clear_book_cache()
+    finally:
+        slow_queries.configure()
+    files = slow_queries.log_files(path)
+    assert files[-1] == path and len(files) == 3
+    assert files[0].endswith(".2")
+
+
+def test_summary_ranks_by_total_time_and_groups_in_lists():
+    entries = [
+        {"sql": "SELECT * FROM books WHERE id IN (?, ?)", "ms": 5.0, "plan": ["SEARCH books USING INTEGER PRIMARY KEY (rowid=?)"]},
+        {"sql": "SELECT * FROM books WHERE id IN (?,?,?)", "ms": 7.0, "plan": None},
+        {"sql": "SELECT * FROM borrow_records WHERE due_date < ?", "ms": 9.0, "plan": ["SCAN borrow_records"]},
+    ]
+    ranked = slow_queries.summarize(entries)
+    assert [g["sql"] for g in ranked] == ["SELECT * FROM books WHERE id IN (?, ...)",
+                                         "SELECT * FROM borrow_records WHERE due_date < ?"]
+    assert (ranked[0]["count"], ranked[0]["total_ms"], ranked[0]["max_ms"]) == (2, 12.0, 7.0)
+    assert ranked[0]["full_scan"] is False and ranked[1]["full_scan"] is True
+
+
+def test_cli_slow_queries(temp_db, slow_log, capsys):
+    conn = db.get_db_connection()
+    conn.execute("SELECT COUNT(*) FROM borrow_records WHERE due_date < ?", ("2024-01-01",)).fetchone()
+    conn.close()
+    slow_queries.configure(threshold=None, log_file=slow_log)
+    assert cli.main(["--database", temp_db, "slow-queries", "--log", slow_log, "--top", "50"]) == 0
+    out = capsys.readouterr().out
+    assert "FULL SCAN" in out
+    assert "plan: SCAN borrow_records" in out
+
+    assert cli.main(["--database", temp_db, "slow-queries", "--log", slow_log, "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)[0]["count"] >= 1
@@ -0,0 +1,52 @@
+import pytest
+
+import app as app_module
+import database as db
+from services import search_index
+
+
+@pytest.fixture
+def index(monkeypatch):
+    # A private index, so the shared one isn't left built over a test database
+    index = search_index.TrigramIndex()
+    monkeypatch.setattr(search_index, "catalog_index", index)
+    return index
+
+
+def test_development_start_initialises_and_seeds(temp_db, index):
+    app = app_module.create_app()
+    assert app.config["PRODUCTION"] is False
+    assert len(db.get_all_books()) == 3
+    assert index.ready
+    timings = app.config["STARTUP_TIMINGS"]
+    assert {"imports", "schema", "sample_data", "search_index", "blueprints", "total"} <= set(timings)
+    assert timings["total"] >= sum(v for k, v in timings.items() if k != "total")
+
+
+def test_production_start_skips_ddl_on_a_current_schema(temp_db, index, monkeypatch):
+    def fail():
+        raise AssertionError("should not run")
+    monkeypatch.setattr(db, "init_database", fail)
+    monkeypatch.setattr(db, "add_sample_data", fail)
+    monkeypatch.setattr(index, "build_in_background", lambda: index.build())
+
+    app = app_module.create_app({"PRODUCTION": True})
+    assert db.get_all_books() == []
+    assert index.ready
+    assert app.test_client().get("/api/search?q=x").status_code == 200
+
+
+def test_production_start_creates_a_missing_schema(tmp_path, monkeypatch, index):
+    monkeypatch.setattr(db, "DATABASE", str(tmp_path / "new.db"))
+    monkeypatch.setattr(index, "build_in_background", lambda: index.build())
+    assert not db.schema_is_current()
+    app_module.create_app({"PRODUCTION": True})
+    assert db.schema_is_current()
+    assert db.get_all_books() == []
+    db.close_all_connections()
+
+
+def test_production_mode_from_environment(temp_db, index, monkeypatch):
+    monkeypatch.setenv("LIBRARY_PRODUCTION", "true")
+    assert app_module.create_app().config["PRODUCTION"] is True
+    assert db.ensure_schema() is False
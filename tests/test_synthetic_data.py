@@ -0,0 +1,102 @@
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+import cli
+import database as db
+from services import synthetic_data as sd
+from timestamps import to_epoch
+
+AS_OF = datetime(2026, 1, 1)
+
+
+def _dump():
+    conn = db.get_db_connection()
+    books = [tuple(r) for r in conn.execute("SELECT * FROM books ORDER BY id")]
+    loans = [tuple(r) for r in conn.execute("SELECT * FROM borrow_records ORDER BY id")]
+    conn.close()
+    return books, loans
+
+
+def test_isbn13_check_digit():
+    assert sd.isbn13("978030640615") == "9780306406157"
+    assert sd.isbn13("978186197271") == "9781861972712"
+
+
+def test_rows_are_reproducible():
+    # Same seed and as_of date give identical rows; another seed doesn't
+    def rows(seed):
+        gen = sd.LibraryGenerator(200, 50, 2000, seed=seed, as_of=AS_OF)
+        loans = list(gen.loan_rows())
+        return loans, list(gen.book_rows())
+    assert rows(7) == rows(7)
+    assert rows(7) != rows(8)
+
+
+def test_generated_library_is_consistent(temp_db):
+    counts = sd.generate_library(500, 100, 5000, seed=3, as_of=AS_OF, batch_size=700)
+    books, loans = _dump()
+    assert (len(books), len(loans)) == (500, 5000)
+
+    # Valid, unique ISBN-13s
+    isbns = [b[3] for b in books]
+    assert len(set(isbns)) == 500
+    assert all(sd.isbn13(isbn[:12]) == isbn for isbn in isbns)
+
+    # Availability and the borrow limit agree with unreturned loans
+    conn = db.get_db_connection()
+    mismatched = conn.execute('''
+        SELECT COUNT(*) FROM books b
+        WHERE b.available_copies != b.total_copies -
+            (SELECT COUNT(*) FROM borrow_records br WHERE br.book_id = b.id AND br.return_date IS NULL)
+    ''').fetchone()[0]
+    over_limit = conn.execute(
+        "SELECT COUNT(*) FROM patron_summary WHERE active_loans > 5").fetchone()[0]
+    as_of = to_epoch(AS_OF)
+    overdue = conn.execute(
+        "SELECT COUNT(*) FROM borrow_records WHERE return_date IS NULL AND due_ts < ?", (as_of,)).fetchone()[0]
+    conn.close()
+    assert mismatched == 0 and over_limit == 0
+    assert 0 < overdue < counts["active"]
+    assert db.check_patron_summary() == []
+
+    # Zipf popularity: the busiest book is borrowed far more than the median one
+    per_book = sorted(Counter(loan[2] for loan in loans).values(), reverse=True)
+    assert per_book[0] > 20 * per_book[len(per_book) // 2]
+
+
+def test_triggers_and_indexes_are_restored(temp_db):
+    before = _schema_objects()
+    version = db.get_catalog_version()[0]
+    sd.generate_library(50, 10, 200, as_of=AS_OF)
+    assert _schema_objects() == before
+    assert db.get_catalog_version()[0] > version
+    assert db.search_books(db.get_book_by_id(1)["title"][:5], "title")
+
+
+def test_refuses_to_generate_over_existing_data(temp_db):
+    db.insert_book("Existing", "Author", "9780000000801", 1, 1)
+    with pytest.raises(ValueError):
+        sd.generate_library(10, 10, 10)
+
+
+def test_cli_generate_is_reproducible(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(db, "DATABASE", db.DATABASE)
+    dumps = []
+    for name in ("a.db", "b.db"):
+        args = ["--database", str(tmp_path / name), "generate", "--books", "100", "--patrons", "20",
+                "--loans", "800", "--seed", "9", "--as-of", "2026-01-01"]
+        assert cli.main(args) == 0
+        db.DATABASE = str(tmp_path / name)
+        dumps.append(_dump())
+        db.close_all_connections()
+    assert dumps[0] == dumps[1]
+    assert "Generated 100 book(s) and 800 loan(s)" in capsys.readouterr().out
+
+
+def _schema_objects():
+    conn = db.get_db_connection()
+    names = {tuple(r) for r in conn.execute("SELECT type, name FROM sqlite_master WHERE type IN ('index', 'trigger')")}
+    conn.close()
+    return names
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+import database as db
+import services.library_service as ls
+
+
+def _add_book(isbn="9780000000001", copies=1):
+    db.insert_book("Stress Book", "Author", isbn, copies, copies)
+    return db.get_book_by_isbn(isbn)["id"]
+
+
+def test_unit_of_work_commits_on_success(temp_db):
+    # Helpers inside the block share one transaction that commits at the end.
+    with db.unit_of_work():
+        db.insert_book("Book", "Author", "9780000000002", 1, 1)
+    assert db.get_book_by_isbn("9780000000002") is not None
+
+
+def test_unit_of_work_rolls_back_on_abort(temp_db):
+    # Raising TransactionAborted discards every write in the block.
+    with pytest.raises(db.TransactionAborted):
+        with db.unit_of_work():
+            db.insert_book("Book", "Author", "9780000000003", 1, 1)
+            raise db.TransactionAborted("stop")
+    assert db.get_book_by_isbn("9780000000003") is None
+
+
+def test_nested_unit_of_work_rolls_back_savepoint_only(temp_db):
+    # A failing nested block keeps the outer block's writes.
+    with db.unit_of_work():
+        db.insert_book("Outer", "Author", "9780000000004", 1, 1)
+        with pytest.raises(db.TransactionAborted):
+            with db.unit_of_work():
+                db.insert_book("Inner", "Author", "9780000000005", 1, 1)
+                raise db.TransactionAborted("inner")
+    assert db.get_book_by_isbn("9780000000004") is not None
+    assert db.get_book_by_isbn("9780000000005") is None
+
+
+def test_guarded_decrement_never_goes_negative(temp_db):
+    # The conditional UPDATE refuses to take the last copy twice.
+    book_id = _add_book(copies=1)
+    assert db.update_book_availability(book_id, -1) is True
+    assert db.update_book_availability(book_id, -1) is False
+    assert db.get_book_by_id(book_id)["available_copies"] == 0
+
+
+def test_guarded_increment_never_exceeds_total(temp_db):
+    book_id = _add_book(copies=1)
+    assert db.update_book_availability(book_id, +1) is False
+    assert db.get_book_by_id(book_id)["available_copies"] == 1
+
+
+def test_failed_borrow_leaves_no_borrow_record(temp_db, monkeypatch):
+    # If the availability update fails, the borrow record is rolled back too.
+    book_id = _add_book(copies=1)
+    monkeypatch.setattr(ls, "update_book_availability", lambda *a, **k: False)
+    success, msg = ls.borrow_book_by_patron("123456", book_id)
+    assert success is False
+    assert "not available" in msg.lower()
+    assert db.get_patron_borrow_count("123456") == 0
+
+
+def test_concurrent_borrows_do_not_oversell(temp_db):
+    # Many threads race for a few copies; exactly `copies` borrows succeed.
+    copies = 3
+    book_id = _add_book(copies=copies)
+    results = []
+    lock = threading.Lock()
+
+    def borrower(n):
+        ok, _ = ls.borrow_book_by_patron(f"{100000 + n}", book_id)
+        with lock:
+            results.append(ok)
+
+    threads = [threading.Thread(target=borrower, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    book = db.get_book_by_id(book_id)
+    assert results.count(True) == copies
+    assert book["available_copies"] == 0
+
+
+def test_concurrent_borrow_and_return_keeps_inventory_consistent(temp_db):
+    # Interleaved borrows and returns never drive availability out of range.
+    copies = 2
+    book_id = _add_book(copies=copies)
+
+    def cycle(n):
+        patron = f"{200000 + n}"
+        for _ in range(5):
+            ls.borrow_book_by_patron(patron, book_id)
+            ls.return_book_by_patron(patron, book_id)
+
+    threads = [threading.Thread(target=cycle, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    book = db.get_book_by_id(book_id)
+    active = sum(db.get_patron_borrow_count(f"{200000 + n}") for n in range(6))
+    assert 0 <= book["available_copies"] <= copies
+    assert book["available_copies"] == copies - active
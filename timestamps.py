@@ -0,0 +1,21 @@
+"""
+Timestamps module for Library Management System
+Conversions between naive datetimes and the integer epoch seconds kept in
+the borrow_records *_ts columns, shared by storage and services
+"""
+
+import calendar
+from datetime import datetime, timedelta
+
+
+def to_epoch(value: datetime) -> int:
+    """
+    Convert a naive datetime to the integer seconds stored in the *_ts columns.
+    Like SQLite's strftime('%s', ...), the wall-clock time is read as UTC.
+    """
+    return calendar.timegm(value.timetuple())
+
+
+def from_epoch(seconds: int) -> datetime:
+    """Convert a *_ts column value back to the naive datetime it was made from."""
+    return datetime(1970, 1, 1) + timedelta(seconds=seconds)